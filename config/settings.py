@@ -62,6 +62,10 @@ def load_settings(channel_name: str) -> dict:
         "SPREADSHEET_ID": channel_env.get("SPREADSHEET_ID"),
         "SOURCE_URLS": raw.get("source_urls", []),
         "GEMINI_API_KEY": channel_env.get("GEMINI_API_KEY"),
+        # テスト・ベンチマークではローカルの代替サーバー（tests/gemini_standin.py）に向ける
+        "GEMINI_BASE_URL": channel_env.get(
+            "GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta"
+        ),
         "YOUTUBE_API_KEY": channel_env.get("YOUTUBE_API_KEY"),
         # 画像保存フォルダ
         "SAVE_DIR": BASE_DIR / "data" / channel_name / "images",
@@ -117,19 +121,90 @@ def load_settings(channel_name: str) -> dict:
         "SPLIT_RANGE_START": raw.get("split_range_start", 25),
         "SPLIT_RANGE_END": raw.get("split_range_end", 60),
         "SPLIT_KUGIRI": raw.get("split_kugiri", ["。", "、", "」"]),
+        # 一覧ページのリンク抽出に lxml 高速版を使うか（結果は従来版と同じ）
+        "FAST_TOP_PAGE_PARSE": raw.get("fast_top_page_parse", True),
         # gemini内部固定値
         "GEMINI_MODEL": "gemini-2.5-flash-lite",
         "MAX_GEMINI_TOKENS": 1024,
+        # Gemini のクォータ（全チャンネル共有。超えないように送信を待たせる）
+        "GEMINI_RPM": 60,
+        "GEMINI_TPM": 250000,
+        "GEMINI_MAX_CONCURRENCY": 4,
+        # 1回の送信のタイムアウトと、再試行を含めた1呼び出しの上限（秒）
+        "GEMINI_TIMEOUT": 60,
+        "GEMINI_DEADLINE": raw.get("gemini_deadline", 180),
+        "GEMINI_RETRIES": raw.get("gemini_retries", 4),
         "IS_TARGET_GENRE_WORD": raw.get("IS_TARGET_GENRE_WORD", channel_name),
+        # ジャンル判定をまとめて行う（1回の問い合わせに入れる記事数はトークン予算で決める）
+        "BATCH_JUDGE": raw.get("batch_judge", True),
+        "JUDGE_BATCH_TOKEN_BUDGET": raw.get("judge_batch_token_budget", 6000),
+        "JUDGE_BATCH_MAX_ARTICLES": raw.get("judge_batch_max_articles", 30),
+        "JUDGE_BATCH_COMMENT_CHARS": raw.get("judge_batch_comment_chars", 400),
+        # プロンプトに入れるコメント・スレッド本文の最大文字数（ステップごと）
+        "PROMPT_BUDGETS": {
+            "judge": 1500,
+            "summarize_comments": 6000,
+            "enrich": 6000,
+            "thread": 4000,
+            **(raw.get("prompt_budgets") or {}),
+        },
+        # 記事ごとの処理（詳細取得・コメント取得・記事情報の作成・画像の保存など）を
+        # 依存関係に沿って並行に実行するスレッド数
+        "ARTICLE_TASK_WORKERS": 4,
+        # タイトル・要約・人物を1回の問い合わせで作る（応答が不正なら個別のプロンプトに戻す）
+        "FUSED_ENRICHMENT": raw.get("fused_enrichment", True),
+        "FUSED_ENRICHMENT_MAX_TOKENS": raw.get("fused_enrichment_max_tokens", 4096),
+        # ジャンル判定の前段のローカル分類器（確信度が高い記事は Gemini に聞かない）
+        "PREFILTER_ENABLED": raw.get("prefilter_enabled", True),
+        "PREFILTER_DIR": BASE_DIR / "data" / "prefilter",
+        "PREFILTER_REJECT_THRESHOLD": raw.get("prefilter_reject_threshold", 0.02),
+        "PREFILTER_ACCEPT_THRESHOLD": raw.get("prefilter_accept_threshold", 0.98),
+        "PREFILTER_MIN_SAMPLES": raw.get("prefilter_min_samples", 300),
+        "PREFILTER_COMMENT_CHARS": 200,
+        # Gemini 応答のキャッシュ（全チャンネル共有の SQLite）
+        "GEMINI_CACHE_PATH": BASE_DIR / "data" / "gemini_cache.sqlite3",
+        "GEMINI_CACHE_TTL": raw.get("gemini_cache_ttl", 24 * 3600),
+        "GEMINI_CACHE_MAX_BYTES": 50 * 1024 * 1024,
+        # 記事によらないプロンプトの前半を Gemini の cachedContents に登録して使い回す
+        # （最小トークン数はモデルごとの登録できる下限。短い前半はそのまま送る）
+        "GEMINI_CONTEXT_CACHE": raw.get("gemini_context_cache", True),
+        "GEMINI_CONTEXT_CACHE_TTL": 3600,
+        "GEMINI_CONTEXT_CACHE_MIN_TOKENS": 1024,
         # log
         "LOG_DIR": BASE_DIR / "logs" / channel_name,
         "OAUTH_LOG_DIR": BASE_DIR / "logs" / "OAUTHD",
+        # Gemini の使用量（トークン数・所要時間）の記録。全チャンネル共通
+        "GEMINI_USAGE_DIR": BASE_DIR / "logs" / "gemini_usage",
         # 認証
         "JSON_PATH": BASE_DIR / "credentials" / channel_name,
         "TOKEN_PICKLE_PATH": BASE_DIR / "credentials" / channel_name / "token.pickle",
         # 通信
         "TIMEOUT": 10,
         "RETRIES": 3,
+        # 記事詳細ページなどの並列取得での同一ホストへの並列数
+        "PREFETCH_PER_HOST": raw.get("prefetch_per_host", 4),
+        # asyncio 取得エンジン（async_fetcher）の全体の同時実行数
+        "ASYNC_FETCH_CONCURRENCY": raw.get("async_fetch_concurrency", 16),
+        # 一覧ページが「変更なし」でもこの秒数を過ぎたら取り直す（コメント数待ちの記事の再確認用）
+        "LIST_PAGE_RECHECK_SEC": raw.get("list_page_recheck_sec", 900),
+        # 記事ページのディスクキャッシュ（チャンネル間で共有）
+        # TTL は source_urls の各要素に cache_ttl を書けば取得元ごとに上書きできる
+        "HTTP_CACHE_DIR": BASE_DIR / "data" / "http_cache",
+        "HTTP_CACHE_TTL": raw.get("http_cache_ttl", 600),
+        "HTTP_CACHE_MAX_BYTES": 200 * 1024 * 1024,
+        # stream_parse: true の取得元で読み込む記事ページの最大バイト数
+        # source_urls の各要素に max_html_bytes を書けば取得元ごとに上書きできる
+        "MAX_HTML_BYTES": raw.get("max_html_bytes", 8 * 1024 * 1024),
+        # チャンネル間で共有する記事インデックス（article_index）
+        # シンプル情報はコメント数が変わるので短め、ジャンル判定は長めに使い回す
+        "ARTICLE_INDEX_INFO_TTL": raw.get("article_index_info_ttl", 600),
+        "ARTICLE_INDEX_VERDICT_TTL": raw.get("article_index_verdict_ttl", 24 * 3600),
+        "ARTICLE_INDEX_MAX_ENTRIES": 5000,
+        # 一覧ページのクロール済み位置（取得元ごと）
+        # 既知のURLが WATERMARK_STOP_AFTER_KNOWN 件続いたらそこから下は見ない
+        "WATERMARK_DIR": BASE_DIR / "data" / "watermarks",
+        "WATERMARK_SIZE": raw.get("watermark_size", 300),
+        "WATERMARK_STOP_AFTER_KNOWN": raw.get("watermark_stop_after_known", 3),
         # Youtube
         "CHANNEL_ID": raw.get("channel_id", ""),
     }
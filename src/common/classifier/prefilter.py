@@ -0,0 +1,419 @@
+# common/classifier/prefilter.py
+"""
+ジャンル判定の前段に置くローカル分類器（チャンネルごと・CPU のみ）。
+
+Gemini がこれまでに出した判定を教師データにして、
+記事のジャンル・タイトル・コメント冒頭の文字 n-gram から
+「そのチャンネルの対象記事である確率」を Naive Bayes で求める。
+
+- 確率が settings["PREFILTER_REJECT_THRESHOLD"] 以下なら対象外、
+  settings["PREFILTER_ACCEPT_THRESHOLD"] 以上なら対象と判定し、Gemini に聞かない
+- その間（判断のつかない記事）だけを Gemini に送る
+
+教師データ
+- judge.py が Gemini の判定を受け取るたびに
+  data/prefilter/<channel>.examples.jsonl に追記する（全チャンネル分）
+- 追記した判定が PREFILTER_MIN_SAMPLES 件に満たないうちは、logs/<channel>/app.log の
+  「ターゲットジャンル外…」「ターゲットジャンルのため…」の行も使う
+  ログから取れるのはタイトルだけなので、その間は「タイトルのみ」のモデルにする
+  （追記した判定もタイトルだけにし、推論もタイトルだけで行う。
+  特徴量の違う教師データを混ぜると、評価の適合率があてにならない）
+  対象記事のログのタイトルは20文字で切れているので、タイトルはすべて20文字に揃える
+  （揃えないと「タイトルが長い＝対象外」を覚えてしまう）
+
+学習と評価
+    python -m src.common.classifier.prefilter report baseball
+    python -m src.common.classifier.prefilter train baseball
+report は古い順に8割で学習し、新しい2割（Gemini の判定）で閾値ごとの適合率を出す。
+train は同じ評価を表示したうえで全件で学習し、モデルを保存する。
+"""
+
+import argparse
+import json
+import math
+import re
+import threading
+from pathlib import Path
+from time import time
+
+# この分類器が出した判定の reason の先頭（教師データに混ぜないための目印）
+REASON_PREFIX = "ローカル判定"
+
+NGRAM_RANGE = (1, 3)
+# 学習データで1回しか出ない n-gram はモデルに残さない
+MIN_NGRAM_COUNT = 2
+ALPHA = 1.0
+HOLDOUT_RATIO = 0.2
+
+REJECT_LOG_PATTERN = re.compile(
+    r"ターゲットジャンル外の記事のためスキップします。タイトル:(?P<title>.*),URL:(?P<url>\S+) 理由:(?P<reason>.*)$"
+)
+ACCEPT_LOG_PATTERN = re.compile(
+    r"=== ターゲットジャンルのため詳しい記事内容を取得  (?P<title>.*?)\.\.\. URL:(?P<url>\S+) ,理由:(?P<reason>.*)$"
+)
+# 対象記事のログに出るタイトルの文字数（article_pipeline の title[:20]）
+LOG_TITLE_CHARS = 20
+# Gemini を通さずに対象と決めた記事（教師データにしない）
+SKIP_REASONS = ("geminiを通さずにターゲットジャンルと判定",)
+
+_lock = threading.Lock()
+# {モデルのパス: (mtime, model)}
+_models = {}
+
+
+# ---------------------------------------------------------
+# 特徴量
+# ---------------------------------------------------------
+def build_text(simple_info: dict, comment_chars: int) -> str:
+    comments = simple_info.get("comments") or ""
+    if isinstance(comments, (list, tuple)):
+        comments = "\n".join(comments)
+    return "\n".join(
+        [
+            str(simple_info.get("genre") or ""),
+            str(simple_info.get("title") or ""),
+            comments[:comment_chars],
+        ]
+    )
+
+
+def build_title_text(title: str | None) -> str:
+    """タイトルのみのモデル用。ログのタイトルに合わせて LOG_TITLE_CHARS 文字で切る。"""
+    return build_text({"title": (title or "")[:LOG_TITLE_CHARS]}, 0)
+
+
+def example_text(simple_info: dict, model: dict) -> str:
+    """model と同じ特徴量の作り方で simple_info をテキストにする。"""
+    if model.get("title_only"):
+        return build_title_text(simple_info.get("title"))
+    return build_text(simple_info, model["comment_chars"])
+
+
+def char_ngrams(text: str) -> set[str]:
+    """空白を詰めた文字 n-gram の集合（文書内の出現回数は数えない）。"""
+    text = re.sub(r"\s+", " ", text).strip()
+    ngrams = set()
+    for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+        for i in range(len(text) - n + 1):
+            gram = text[i : i + n]
+            if gram.strip():
+                ngrams.add(gram)
+    return ngrams
+
+
+# ---------------------------------------------------------
+# 学習・推論
+# ---------------------------------------------------------
+def train_model(
+    examples: list[dict], comment_chars: int, title_only: bool = False
+) -> dict:
+    """
+    {"text", "is_target"} のリストから多項 Naive Bayes のモデル（JSON にできる dict）を作る。
+    title_only は examples の text がタイトルのみ（build_title_text）のときに True にする。
+    """
+    doc_counts = [0, 0]
+    counts = {}
+    for example in examples:
+        label = int(bool(example["is_target"]))
+        doc_counts[label] += 1
+        for gram in char_ngrams(example["text"]):
+            counts.setdefault(gram, [0, 0])[label] += 1
+
+    counts = {
+        gram: c for gram, c in counts.items() if c[0] + c[1] >= MIN_NGRAM_COUNT
+    }
+    totals = [sum(c[label] for c in counts.values()) for label in (0, 1)]
+
+    return {
+        "version": 1,
+        "trained_at": time(),
+        "samples": sum(doc_counts),
+        "comment_chars": comment_chars,
+        "title_only": title_only,
+        "doc_counts": doc_counts,
+        "totals": totals,
+        "counts": counts,
+    }
+
+
+def predict_proba(model: dict, text: str) -> float:
+    """対象記事である確率を返す。"""
+    doc_counts = model["doc_counts"]
+    totals = model["totals"]
+    counts = model["counts"]
+    vocab = len(counts)
+
+    scores = []
+    for label in (0, 1):
+        score = math.log((doc_counts[label] + ALPHA) / (sum(doc_counts) + 2 * ALPHA))
+        denominator = math.log(totals[label] + ALPHA * vocab)
+        for gram in char_ngrams(text):
+            c = counts.get(gram)
+            if c is not None:
+                score += math.log(c[label] + ALPHA) - denominator
+        scores.append(score)
+
+    diff = scores[1] - scores[0]
+    # exp のオーバーフロー対策
+    if diff > 50:
+        return 1.0
+    if diff < -50:
+        return 0.0
+    return 1 / (1 + math.exp(-diff))
+
+
+# ---------------------------------------------------------
+# モデル・教師データのファイル
+# ---------------------------------------------------------
+def model_path(settings: dict, channel: str | None = None) -> Path:
+    channel = channel or settings["CHANNEL_NAME"]
+    return Path(settings["PREFILTER_DIR"]) / f"{channel}.model.json"
+
+
+def examples_path(settings: dict, channel: str | None = None) -> Path:
+    channel = channel or settings["CHANNEL_NAME"]
+    return Path(settings["PREFILTER_DIR"]) / f"{channel}.examples.jsonl"
+
+
+def load_model(settings: dict) -> dict | None:
+    """保存済みのモデルを返す（ファイルが更新されたら読み直す）。なければ None。"""
+    path = model_path(settings)
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+    with _lock:
+        cached = _models.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+    with open(path, encoding="utf-8") as f:
+        model = json.load(f)
+    with _lock:
+        _models[path] = (mtime, model)
+    return model
+
+
+def save_model(model: dict, settings: dict) -> Path:
+    path = model_path(settings)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(model, f, ensure_ascii=False)
+    tmp_path.replace(path)
+    return path
+
+
+def record_examples(
+    article_url: str, simple_info: dict, verdicts: dict[str, dict], settings: dict
+) -> None:
+    """
+    Gemini の判定 {channel: {"is_target", "reason"}} を各チャンネルの教師データに追記する。
+    """
+    now = time()
+    base = {
+        "url": article_url,
+        "title": simple_info.get("title"),
+        "genre": simple_info.get("genre"),
+        "text": build_text(simple_info, settings["PREFILTER_COMMENT_CHARS"]),
+        "at": now,
+    }
+    with _lock:
+        for channel, verdict in verdicts.items():
+            path = examples_path(settings, channel)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            record = {
+                **base,
+                "is_target": bool(verdict.get("is_target", False)),
+                "reason": verdict.get("reason", ""),
+            }
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _read_examples_file(path: Path) -> list[dict]:
+    if not path.exists():
+        return []
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                examples.append(json.loads(line))
+            except json.JSONDecodeError:
+                # 書き込み途中で落ちた行
+                continue
+    return examples
+
+
+def _read_log_examples(log_path: Path) -> list[dict]:
+    """app.log の判定結果の行を教師データにする（古い順）。"""
+    if not log_path.exists():
+        return []
+    examples = []
+    with open(log_path, encoding="utf-8", errors="replace") as f:
+        for i, line in enumerate(f):
+            message = line.rstrip("\n").split(" | ")[-1]
+            for pattern, is_target in (
+                (REJECT_LOG_PATTERN, False),
+                (ACCEPT_LOG_PATTERN, True),
+            ):
+                match = pattern.search(message)
+                if match is None:
+                    continue
+                reason = match.group("reason").strip()
+                if reason.startswith(REASON_PREFIX) or reason in SKIP_REASONS:
+                    break
+                # 対象外の記事はタイトル全体がログに出るが、対象記事に長さを揃える
+                title = match.group("title")[:LOG_TITLE_CHARS]
+                examples.append(
+                    {
+                        "url": match.group("url"),
+                        "title": title,
+                        "text": build_title_text(title),
+                        "is_target": is_target,
+                        "at": i,
+                    }
+                )
+                break
+    return examples
+
+
+def _dedupe(examples: list[dict]) -> list[dict]:
+    """同じ URL が複数あれば最後の判定を使う（順番は最後の判定の位置）。"""
+    deduped = {}
+    for example in examples:
+        deduped.pop(example["url"], None)
+        deduped[example["url"]] = example
+    return list(deduped.values())
+
+
+def load_examples(settings: dict) -> tuple[list[dict], bool]:
+    """
+    教師データを古い順に返す。戻り値は (examples, title_only)。
+
+    examples.jsonl の判定が PREFILTER_MIN_SAMPLES 件以上あればそれだけを使う。
+    足りなければログから読んだ分を先に並べて足し、すべてタイトルのみの text にする
+    （同じ URL は examples.jsonl の判定を使う）。
+    """
+    recorded = _dedupe(_read_examples_file(examples_path(settings)))
+    if len(recorded) >= settings["PREFILTER_MIN_SAMPLES"]:
+        return recorded, False
+
+    from_log = _read_log_examples(Path(settings["LOG_DIR"]) / "app.log")
+    recorded = [
+        {**example, "text": build_title_text(example.get("title"))}
+        for example in recorded
+    ]
+    return _dedupe([*from_log, *recorded]), True
+
+
+# ---------------------------------------------------------
+# パイプラインから使う
+# ---------------------------------------------------------
+def prefilter_verdict(simple_info: dict, settings: dict) -> dict | None:
+    """
+    確信度が閾値を超えていれば {"is_target": bool, "reason": str} を返す。
+    モデルがない・学習件数が足りない・判断がつかない場合は None（Gemini に聞く）。
+    """
+    if not settings["PREFILTER_ENABLED"]:
+        return None
+    model = load_model(settings)
+    if model is None or model["samples"] < settings["PREFILTER_MIN_SAMPLES"]:
+        return None
+
+    p = predict_proba(model, example_text(simple_info, model))
+    if p <= settings["PREFILTER_REJECT_THRESHOLD"]:
+        return {"is_target": False, "reason": f"{REASON_PREFIX}で対象外 (p={p:.3f})"}
+    if p >= settings["PREFILTER_ACCEPT_THRESHOLD"]:
+        return {"is_target": True, "reason": f"{REASON_PREFIX}で対象 (p={p:.3f})"}
+    return None
+
+
+# ---------------------------------------------------------
+# 評価
+# ---------------------------------------------------------
+def evaluate(
+    train: list[dict], holdout: list[dict], settings: dict, title_only: bool = False
+) -> dict:
+    """
+    train で学習したモデルを holdout（Gemini の判定）で評価する。
+    train と holdout の text は同じ特徴量（title_only かどうか）で作ったものを渡す。
+
+    Returns:
+        dict: 自動で落とした / 通した記事の件数と適合率、Gemini に送る割合
+    """
+    model = train_model(train, settings["PREFILTER_COMMENT_CHARS"], title_only)
+    reject_threshold = settings["PREFILTER_REJECT_THRESHOLD"]
+    accept_threshold = settings["PREFILTER_ACCEPT_THRESHOLD"]
+
+    rejected = accepted = 0
+    rejected_correct = accepted_correct = 0
+    for example in holdout:
+        p = predict_proba(model, example["text"])
+        if p <= reject_threshold:
+            rejected += 1
+            rejected_correct += not example["is_target"]
+        elif p >= accept_threshold:
+            accepted += 1
+            accepted_correct += bool(example["is_target"])
+
+    total = len(holdout)
+    return {
+        "train": len(train),
+        "holdout": total,
+        "rejected": rejected,
+        "reject_precision": rejected_correct / rejected if rejected else None,
+        "accepted": accepted,
+        "accept_precision": accepted_correct / accepted if accepted else None,
+        "to_gemini": (total - rejected - accepted) / total if total else None,
+    }
+
+
+def split_examples(examples: list[dict]) -> tuple[list[dict], list[dict]]:
+    """古い順に並んだ教師データを、学習用と新しい HOLDOUT_RATIO の評価用に分ける。"""
+    n_holdout = int(len(examples) * HOLDOUT_RATIO)
+    if n_holdout == 0:
+        return examples, []
+    return examples[:-n_holdout], examples[-n_holdout:]
+
+
+def format_report(report: dict) -> str:
+    def _rate(value):
+        return "-" if value is None else f"{value * 100:.1f}%"
+
+    return (
+        f"学習 {report['train']}件 / 評価 {report['holdout']}件\n"
+        f"  自動で対象外: {report['rejected']}件 適合率 {_rate(report['reject_precision'])}\n"
+        f"  自動で対象  : {report['accepted']}件 適合率 {_rate(report['accept_precision'])}\n"
+        f"  Gemini に送る割合: {_rate(report['to_gemini'])}"
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    from config.settings import load_settings
+
+    arg_parser = argparse.ArgumentParser(description="ジャンル判定の前段分類器")
+    arg_parser.add_argument("command", choices=["train", "report"])
+    arg_parser.add_argument("channel")
+    args = arg_parser.parse_args(argv)
+
+    settings = load_settings(args.channel)
+    examples, title_only = load_examples(settings)
+    if not examples:
+        print(f"教師データがありません: {examples_path(settings)}")
+        return
+    if title_only:
+        print("記録した判定が少ないため、ログも使ってタイトルのみで学習します。")
+
+    train, holdout = split_examples(examples)
+    print(format_report(evaluate(train, holdout, settings, title_only)))
+
+    if args.command == "train":
+        model = train_model(examples, settings["PREFILTER_COMMENT_CHARS"], title_only)
+        path = save_model(model, settings)
+        print(f"{len(examples)}件で学習したモデルを保存しました: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -32,17 +32,104 @@ reason には「{settings["GENRE"]}かどうか」の根拠を説明してくだ
     return prompt
 
 
-def build_title_prompt(title, article):
-    return f"""
-以下は記事本文です。Youtubeのタイトルやサムネに使う短い文を生成してください。
+def judge_multi_target_prompt(
+    title: str,
+    comments: str,
+    genre: str,
+    channels: dict[str, str],
+) -> str:
+    """
+    judge_target_prompt の複数チャンネル版。
+    channels（{チャンネル名: ジャンル名}）のそれぞれについて、まとめて判定させる。
+    """
+    channel_lines = "\n".join(
+        f"・{channel}: {channel_genre}" for channel, channel_genre in channels.items()
+    )
 
-#ルール
-- タイトル: 本文を踏まえて20文字以内でキャッチーに
-- サムネ用テキスト1: 1行7文字以内、全体で2行14文字以内
-- サムネ用テキスト2: 7文字以内で「驚きの一言」
+    prompt = f"""
+以下は記事の情報です。下のチャンネルそれぞれについて、記事がそのジャンルに関する内容か判定してください。
+reasonを出力する際は日本語で返答してください。
+reason には「そのジャンルかどうか」の根拠を説明してください。
+否定の場合も「そのジャンルではない理由」を説明してください。
+is_target は
+・そのジャンルに関する記事の場合 true
+・それ以外の場合 false
+1つの記事が複数のチャンネルで true になってもかまいません。
+
+# チャンネル: ジャンル
+{channel_lines}
+
+# 判定条件
+このニュースは各ジャンルに関する内容ですか？（タイトル、ジャンル、スレッドのコメントから判断してください。）
+
+# 出力形式(JSONのみ)
+{{
+"<チャンネル名>": {{"is_target": boolean, "reason": string}},
+...
+}}
+
+# ジャンル: {genre}
+# タイトル: {title}
+# 入力 スレッドについたコメント
+---
+{comments}
+---"""
+
+    return prompt
 
-#タイトルの参考
-【ほっこり】中田翔『俺の卵焼きと、から揚げかえてくれや』
+
+def judge_batch_target_prompt(
+    articles: list[dict],
+    channels: dict[str, str],
+) -> str:
+    """
+    複数記事をまとめて判定させるプロンプト。
+    articles は {"url", "title", "genre", "comments"} のリスト、
+    channels は {チャンネル名: ジャンル名}。
+    """
+    channel_lines = "\n".join(
+        f"・{channel}: {channel_genre}" for channel, channel_genre in channels.items()
+    )
+    article_blocks = "\n\n".join(
+        f"""## 記事{i}
+url: {article["url"]}
+ジャンル: {article["genre"]}
+タイトル: {article["title"]}
+コメント:
+{article["comments"]}"""
+        for i, article in enumerate(articles, start=1)
+    )
+
+    prompt = f"""
+以下は複数の記事の情報です。すべての記事について、下のチャンネルそれぞれのジャンルに関する内容か判定してください。
+reasonを出力する際は日本語で、30文字以内で返答してください。
+reason には「そのジャンルかどうか」の根拠を説明してください。
+is_target は
+・そのジャンルに関する記事の場合 true
+・それ以外の場合 false
+1つの記事が複数のチャンネルで true になってもかまいません。
+記事 × チャンネルの組み合わせごとに1件ずつ、漏れなく出力してください。
+
+# チャンネル: ジャンル
+{channel_lines}
+
+# 出力形式(JSONのみ)
+{{
+"verdicts": [
+  {{"url": string, "channel": string, "is_target": boolean, "reason": string}},
+  ...
+]
+}}
+
+# 記事一覧
+{article_blocks}
+"""
+
+    return prompt
+
+
+# タイトル・サムネ用テキスト・コメント要約の参考例（分割版と一括版のプロンプトで共通）
+TITLE_EXAMPLES = """【ほっこり】中田翔『俺の卵焼きと、から揚げかえてくれや』
 
 【悲報】杉谷さん、なぜか中田翔の引退試合に来ないｗｗｗｗ
 
@@ -88,10 +175,9 @@ def build_title_prompt(title, article):
 
 【悲報】来年の優勝チーム、ある事実で完全にネタバレ食らう
 
-【悲報】阪神優勝時の道頓堀、警察だらけなのにヤバいことになる
+【悲報】阪神優勝時の道頓堀、警察だらけなのにヤバいことになる"""
 
-#サムネ用テキスト2参考
-もうサイヤングでええやん
+THUMBTEXT2_EXAMPLES = """もうサイヤングでええやん
 まじで言われてますやん
 まだまだ使われる模様
 10年連続でよろしく
@@ -102,7 +188,34 @@ def build_title_prompt(title, article):
 まじかよ
 えぐい
 レジェンド
-OPSwwwww
+OPSwwwww"""
+
+COMMENT_EXAMPLES = """まあ盛り上がるよ。勝てば
+今年の成績でこれを冷えるのは素直にすごいと思う。藤川も優しいよな。安倍がCSで逆転するみたいな発言したからそれに乗っかったんでしょう。
+ダントツ優勝した上でこれ言えるのかっこいいよな
+優勝チームが日本シリーズに行くべきだとずっと思ってはいるけどCSないと消化試合多すぎるしな。
+藤川コメントだな。 確かにその通りだしCSあればまあ 盛り上がるのは間違いない。 アドバンテージの問題が少しもやっとするのは間違いないけど
+ぶっちゃけ巨人に勝てる自信があるからこその発言にも見えるな
+CSでたとえ負けてもペナント勝った事実は称えられるべき
+優勝でも言ってたけど藤川は完全に「CSをペナントとは別と」位置づけてる
+CSはまた分かってことか、でもパリーグ周囲のチームとの戦いは本当に見たいんだよね交流戦の悔しさを晴らしたい"""
+
+
+def build_title_prompt_parts(title, article) -> tuple[str, str]:
+    """(記事によらない前半, 記事ごとの後半) に分けたタイトル用のプロンプト。"""
+    prefix = f"""
+以下は記事本文です。Youtubeのタイトルやサムネに使う短い文を生成してください。
+
+#ルール
+- タイトル: 本文を踏まえて20文字以内でキャッチーに
+- サムネ用テキスト1: 1行7文字以内、全体で2行14文字以内
+- サムネ用テキスト2: 7文字以内で「驚きの一言」
+
+#タイトルの参考
+{TITLE_EXAMPLES}
+
+#サムネ用テキスト2参考
+{THUMBTEXT2_EXAMPLES}
 
 
 
@@ -113,11 +226,17 @@ OPSwwwww
   "sumtext2": "..."
 }}
 
-# 入力
+"""
+    suffix = f"""# 入力
 タイトル: {title}
 本文:
 {article}
     """
+    return prefix, suffix
+
+
+def build_title_prompt(title, article):
+    return "".join(build_title_prompt_parts(title, article))
 
 
 def build_summarize_article_prompt(
@@ -145,8 +264,13 @@ def build_summarize_article_prompt(
     """
 
 
-def build_summarize_comments_prompt(comments: list[str], title: str, source: dict):
-    return f"""
+def build_summarize_comments_prompt_parts(
+    comments: list[str], title: str, source: dict
+) -> tuple[str, str]:
+    """(記事によらない前半, 記事ごとの後半) に分けたコメント要約用のプロンプト。"""
+    # コメントは1行に1件で渡す
+    comments_text = "\n".join(comments)
+    prefix = f"""
 以下は野球記事のコメントです。Youtube用の台本を作るのでそれぞれのコメントを参考に要約してください。
 例に挙げた口調や文章の長さを参考にしてください。
 
@@ -159,18 +283,132 @@ def build_summarize_comments_prompt(comments: list[str], title: str, source: dic
 -でしょ、だよな、などを使って下さい。ただしこの末尾一辺倒になりすぎないでください
 
 #例
-まあ盛り上がるよ。勝てば
-今年の成績でこれを冷えるのは素直にすごいと思う。藤川も優しいよな。安倍がCSで逆転するみたいな発言したからそれに乗っかったんでしょう。
-ダントツ優勝した上でこれ言えるのかっこいいよな
-優勝チームが日本シリーズに行くべきだとずっと思ってはいるけどCSないと消化試合多すぎるしな。
-藤川コメントだな。 確かにその通りだしCSあればまあ 盛り上がるのは間違いない。 アドバンテージの問題が少しもやっとするのは間違いないけど
-ぶっちゃけ巨人に勝てる自信があるからこその発言にも見えるな
-CSでたとえ負けてもペナント勝った事実は称えられるべき
-優勝でも言ってたけど藤川は完全に「CSをペナントとは別と」位置づけてる
-CSはまた分かってことか、でもパリーグ周囲のチームとの戦いは本当に見たいんだよね交流戦の悔しさを晴らしたい
+{COMMENT_EXAMPLES}
 
-# 入力
+"""
+    suffix = f"""# 入力
 タイトル: {title}
 コメント:
-{comments}
+{comments_text}
+    """
+    return prefix, suffix
+
+
+def build_summarize_comments_prompt(comments: list[str], title: str, source: dict):
+    return "".join(build_summarize_comments_prompt_parts(comments, title, source))
+
+
+def build_enrichment_prompt_parts(
+    title: str,
+    article,
+    comments: list[str] | None,
+    source: dict,
+    is_human_article: bool,
+) -> tuple[str, str]:
+    """
+    タイトル・サムネ用テキスト、本文とコメントの要約、話題の人物（または話題）を
+    1回で作らせるプロンプト（build_title_prompt / build_summarize_*_prompt /
+    detect_players をまとめたもの）を (記事によらない前半, 記事ごとの後半) で返す。
+
+    comments が None のとき（スレッド形式の記事）は要約を作らせず、
+    article_script / comment_script は空の配列で返させる。
+    """
+    if comments is None:
+        summarize_rules = """
+## 2. 要約
+- スレッド形式の記事のため要約は不要です。article_script と comment_script は空の配列にしてください"""
+        comments_block = ""
+    else:
+        summarize_rules = f"""
+## 2. 本文の要約（article_script）
+Youtube用の読み上げ台本にするため、本文を要約してください。
+- 記事本文をそのまま使う
+- 文字数は{source.get('summarize_max_title_len', 80)}字に要約してください
+- ニュース記事らしく少し硬めの文章にしてください
+- 1文を配列の1要素にしてください
+- 「"」はつけないでください
+- 読み上げに適さないので絶対にURLは含めないでください
+- かっこ内にある「日刊」や「報知」などの新聞名は入れないでください
+
+## 3. コメントの要約（comment_script）
+それぞれのコメントを参考に、Youtube用の台本になるよう要約してください。
+- 1つのコメントが{source.get('summarize_max_title_comment', 200)}文字を超えないようにそれぞれ要約し、1件を配列の1要素にしてください
+- 人が話すような自然な日本語にする
+- 半分は「ですます調」を使わない
+- 記号は禁止
+- 「"」はつけないでください
+-でしょ、だよな、などを使って下さい。ただしこの末尾一辺倒になりすぎないでください
+
+#コメントの例
+{COMMENT_EXAMPLES}"""
+        comments_block = "\nコメント:\n" + "\n".join(comments)
+
+    if is_human_article:
+        players_rules = """
+## 4. 話題の人物（players）
+話題となっている人物を2人まで上げて下さい。
+その人物の「フルネーム」ともし現役選手ならば「所属チーム名」を返してください。
+もし、フルネームが分からなければ苗字だけでも構いません、所属チームが分からなければNoneで返しても構いません。
+また登場する人物が1人の場合は2人目はNoneで返してください。
+台本の中に少ししか出てこない場合は2人目としてカウントしないでください。
+外人選手であってもアルファベットは使わないでください。"""
+    else:
+        players_rules = """
+## 4. 話題（players）
+話題となっている事柄、概念、国名などを2つまで上げ、その「名前」を name に入れてください。
+team は None にしてください。
+もし、名前が分からなければ「不明」で返してください。
+また登場する事柄・概念・人物・国名が1つの場合は2つ目は「不明」で返してください。
+台本の中に少ししか出てこない場合は2つ目としてカウントしないでください。
+漢字、ひらがな、カタカナで回答してください。"""
+
+    prefix = f"""
+以下は記事です。Youtube動画を作るため、次の1〜4をまとめてJSONで出力してください。
+
+## 1. タイトルとサムネ用テキスト（title / thumbtext / thumbtext2）
+- タイトル: 本文を踏まえて20文字以内でキャッチーに
+- サムネ用テキスト1: 1行7文字以内、全体で2行14文字以内
+- サムネ用テキスト2: 7文字以内で「驚きの一言」
+
+#タイトルの参考
+{TITLE_EXAMPLES}
+
+#サムネ用テキスト2参考
+{THUMBTEXT2_EXAMPLES}
+{summarize_rules}
+{players_rules}
+
+# 出力形式(JSONのみ)
+{{
+  "title": "...",
+  "thumbtext": "...",
+  "thumbtext2": "...",
+  "article_script": ["...", ...],
+  "comment_script": ["...", ...],
+  "players": [
+    {{ "name": "名前", "team": "所属チーム" }},
+    {{ "name": "名前", "team": "所属チーム" }}
+  ]
+}}
+
+"""
+    suffix = f"""# 入力
+タイトル: {title}
+本文:
+{article}{comments_block}
     """
+    return prefix, suffix
+
+
+def build_enrichment_prompt(
+    title: str,
+    article,
+    comments: list[str] | None,
+    source: dict,
+    is_human_article: bool,
+) -> str:
+    return "".join(
+        build_enrichment_prompt_parts(
+            title, article, comments, source, is_human_article
+        )
+    )
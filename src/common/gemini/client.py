@@ -1,41 +1,343 @@
 """
 Gemini API 呼び出しの共通クライアント。
+
+- 接続はプロセス全体で共有する Session（keep-alive）を使う
+- 送信前に governor で RPM / TPM / 同時実行数の枠を取る
+- submit_gemini() で呼び出しをスレッドプールに投げ、Future で結果を受け取れる
+  （asyncio からは asyncio.wrap_future(submit_gemini(...)) で await できる）
+- 429 / 5xx / 通信エラー / 空の応答は指数バックオフ（429 は Retry-After）で再試行し、
+  settings["GEMINI_DEADLINE"] 秒を超えるか再試行しても無駄な失敗なら GeminiCallError を投げる
+- 呼び出しごとのトークン数・所要時間・再試行回数を usage に記録する
+- prefix（記事によらないプロンプトの前半）は context_cache で cachedContents に登録して参照する
 """
 
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import monotonic, sleep
 from typing import Dict, Any
 import json
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+
+from src.common.gemini.response_cache import (
+    make_cache_key,
+    get_cached_response,
+    put_cached_response,
+)
+from src.common.gemini.governor import get_governor, estimate_tokens, WINDOW_SECONDS
+from src.common.gemini.context_cache import get_cached_content, forget_cached_content
+from src.common.gemini.usage import record_usage
+from src.common.utils.retry import compute_backoff, parse_retry_after
+
+# 再試行すれば通る可能性があるステータス
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# cachedContent を参照した呼び出しがこれで失敗したら、登録が切れたとみなして前半をそのまま送る
+STALE_CACHED_CONTENT_STATUS = {400, 403, 404}
+
+
+class GeminiCallError(Exception):
+    """
+    Gemini の呼び出しが最終的に失敗したことを表す。
+
+    kind:
+        "http"     再試行しても通らないステータス（400 / 403 など）
+        "blocked"  プロンプトや応答が安全性フィルタで止められた
+        "empty"    候補・本文が空の応答が続いた
+        "invalid"  JSON として解釈できない応答が続いた
+        "network"  通信エラーが続いた
+        "deadline" 再試行の途中で GEMINI_DEADLINE を超えた
+    """
+
+    def __init__(
+        self, kind: str, message: str, step: str = "-", status: int | None = None
+    ):
+        super().__init__(f"[{step}] {kind}: {message}")
+        self.kind = kind
+        self.step = step
+        self.status = status
+
+
+class _RetryableError(Exception):
+    def __init__(
+        self,
+        kind: str,
+        message: str,
+        status: int | None = None,
+        wait: float | None = None,
+    ):
+        super().__init__(message)
+        self.kind = kind
+        self.status = status
+        # サーバーが指定した待ち秒数（Retry-After）
+        self.wait = wait
+
+
+_session = None
+_executor = None
+_lock = threading.Lock()
+
+
+def get_gemini_session(settings: dict) -> requests.Session:
+    """Gemini API 用の共有 Session を返す（同時実行数ぶんのコネクションを保持する）。"""
+    global _session
+
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=settings["GEMINI_MAX_CONCURRENCY"],
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+
+def _get_executor(settings: dict) -> ThreadPoolExecutor:
+    global _executor
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings["GEMINI_MAX_CONCURRENCY"],
+                thread_name_prefix="gemini",
+            )
+    return _executor
+
+
+def _parse_response(data: dict, step: str) -> dict:
+    """
+    generateContent の応答から JSON を取り出す。
+    空の候補・JSON でない本文は _RetryableError、安全性フィルタは GeminiCallError。
+    """
+    block_reason = data.get("promptFeedback", {}).get("blockReason")
+    if block_reason:
+        raise GeminiCallError("blocked", f"prompt blocked ({block_reason})", step)
+
+    candidates = data.get("candidates") or []
+    if not candidates:
+        raise _RetryableError("empty", "no candidates")
+
+    candidate = candidates[0]
+    finish_reason = candidate.get("finishReason")
+    if finish_reason in ("SAFETY", "PROHIBITED_CONTENT", "BLOCKLIST"):
+        raise GeminiCallError("blocked", f"response blocked ({finish_reason})", step)
+
+    parts = candidate.get("content", {}).get("parts") or []
+    text = "".join(part.get("text", "") for part in parts)
+    if not text.strip():
+        raise _RetryableError("empty", f"empty text (finishReason={finish_reason})")
+
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        raise _RetryableError("invalid", f"{e} (finishReason={finish_reason})")
+
+
+def _post_once(
+    url: str, payload: dict, tokens: int, timeout: float, settings: dict, step: str
+) -> tuple[dict, dict]:
+    """
+    1回送信して (JSON, usageMetadata) を返す。
+    失敗は _RetryableError / GeminiCallError にする。
+    """
+    governor = get_governor(settings)
+    with governor.reserve(tokens) as reservation:
+        try:
+            res = get_gemini_session(settings).post(url, json=payload, timeout=timeout)
+        except requests.RequestException as e:
+            raise _RetryableError("network", str(e))
+
+        if res.status_code in RETRYABLE_STATUS:
+            wait = parse_retry_after(res.headers.get("Retry-After"))
+            if res.status_code == 429:
+                # クォータ超過。全チャンネルの送信をしばらく止める
+                # （Retry-After がなければクォータの窓が切り替わるまで。
+                #   この呼び出し自体の再試行の待ちはバックオフで決める）
+                governor.block(wait if wait is not None else WINDOW_SECONDS)
+            raise _RetryableError(
+                "http", f"status={res.status_code}", status=res.status_code, wait=wait
+            )
+        if res.status_code >= 400:
+            raise GeminiCallError(
+                "http",
+                f"status={res.status_code} {res.text[:200]}",
+                step,
+                res.status_code,
+            )
+
+        try:
+            data = res.json()
+        except ValueError as e:
+            # 途中で切れた本文やプロキシのエラーページなど
+            raise _RetryableError("invalid", f"non-JSON response body ({e})")
+        usage = data.get("usageMetadata", {})
+        if "totalTokenCount" in usage:
+            governor.settle(reservation, usage["totalTokenCount"])
+
+    return _parse_response(data, step), usage
+
+
+def _build_payload(
+    text: str, generation_config: dict, cached_content: str | None = None
+) -> dict:
+    payload = {
+        "contents": [{"role": "user", "parts": [{"text": text}]}],
+        "generationConfig": generation_config,
+    }
+    if cached_content is not None:
+        payload["cachedContent"] = cached_content
+    return payload
 
 
 def call_gemini(
-    prompt: str, settings: dict, logger, schema: dict = None, temperature: float = 0.2
+    prompt: str,
+    settings: dict,
+    logger,
+    schema: dict = None,
+    temperature: float = 0.2,
+    step: str = "-",
+    use_cache: bool = True,
+    max_output_tokens: int | None = None,
+    prefix: str = "",
 ) -> Dict[str, Any]:
     """
     Gemini にプロンプトを送信し、JSONとして解析した結果を返す。
 
+    同じモデル・プロンプト・スキーマ・temperature の応答は
+    response_cache に保存してあり、有効期限内なら API を呼ばずにそれを返す。
+
+    429 / 5xx / 通信エラー / 空の応答 / JSON でない応答は
+    settings["GEMINI_RETRIES"] 回まで再試行する（Retry-After があればその秒数、
+    なければ指数バックオフ + ジッター）。待つと settings["GEMINI_DEADLINE"] 秒を
+    超える場合はそこで諦める。
+
     Args:
         prompt (str): 送信するテキストプロンプト
-        api_key (str): Gemini APIキー
+        settings (dict): "GEMINI_MODEL", "GEMINI_API_KEY" などを参照する
+        schema (dict): responseSchema（JSON の形を指定する場合）
+        temperature (float)
+        step (str): 呼び出し元の処理名（judge / title など）。キャッシュのヒット率と使用量の集計に使う
+        use_cache (bool): False なら毎回 API を呼ぶ（毎回違う結果がほしい呼び出し用）
+        max_output_tokens (int): 出力トークン数の上限。省略時は settings["MAX_GEMINI_TOKENS"]
+            （TPM の見積もりにも使う）
+        prefix (str): 記事によらないプロンプトの前半（build_prompt の *_parts() の1つ目）。
+            prefix + prompt を送るのと同じ扱い（応答キャッシュのキーも同じ）で、
+            cachedContents に登録できればそれを参照して prompt だけを送る。
+            参照した登録が切れていれば、前半をそのまま付けて送り直す
 
     Returns:
-        Dict[str, Any]: JSONパース成功時は辞書。失敗時は空辞書。
+        Dict[str, Any]: JSONパース結果の辞書
+
+    Raises:
+        GeminiCallError: 再試行しても成功しなかった場合
     """
-    url = f'https://generativelanguage.googleapis.com/v1beta/models/{settings["GEMINI_MODEL"]}:generateContent?key={settings["GEMINI_API_KEY"]}'
-    payload = {
-        "contents": [{"parts": [{"text": prompt}]}],
-        "generationConfig": {
-            "temperature": temperature,
-            "maxOutputTokens": settings["MAX_GEMINI_TOKENS"],
-            "responseMimeType": "application/json",
-        },
+    started = monotonic()
+    cache_key = None
+    if use_cache:
+        cache_key = make_cache_key(
+            settings["GEMINI_MODEL"], prefix + prompt, schema, temperature
+        )
+        cached = get_cached_response(cache_key, settings, step=step)
+        if cached is not None:
+            record_usage(settings, step, "ok", monotonic() - started, cached=True)
+            return cached
+
+    max_output_tokens = max_output_tokens or settings["MAX_GEMINI_TOKENS"]
+    url = (
+        f'{settings["GEMINI_BASE_URL"]}/models/{settings["GEMINI_MODEL"]}'
+        f':generateContent?key={settings["GEMINI_API_KEY"]}'
+    )
+    generation_config = {
+        "temperature": temperature,
+        "maxOutputTokens": max_output_tokens,
+        "responseMimeType": "application/json",
     }
     if schema:
-        payload["generationConfig"]["responseSchema"] = schema
-    res = requests.post(url, json=payload, timeout=60)
-    res.raise_for_status()
-
-    data = res.json()
-    # Geminiの返答からJSONをパース
-    text = data["candidates"][0]["content"]["parts"][0]["text"]
-    print(text)
-    return json.loads(text)
+        generation_config["responseSchema"] = schema
+
+    cached_content = None
+    if prefix:
+        cached_content = get_cached_content(
+            prefix, settings, get_gemini_session(settings), logger
+        )
+    if cached_content is not None:
+        payload = _build_payload(prompt, generation_config, cached_content)
+    else:
+        payload = _build_payload(prefix + prompt, generation_config)
+
+    # キャッシュ分も TPM に数えられるので、前半を含めて見積もる
+    tokens = estimate_tokens(prefix + prompt) + max_output_tokens
+    retries = settings["GEMINI_RETRIES"]
+    deadline = monotonic() + settings["GEMINI_DEADLINE"]
+    attempt = 1
+    try:
+        for attempt in range(1, retries + 1):
+            remaining = deadline - monotonic()
+            timeout = max(1.0, min(settings["GEMINI_TIMEOUT"], remaining))
+            try:
+                try:
+                    result, usage = _post_once(
+                        url, payload, tokens, timeout, settings=settings, step=step
+                    )
+                except GeminiCallError as e:
+                    if (
+                        cached_content is None
+                        or e.status not in STALE_CACHED_CONTENT_STATUS
+                    ):
+                        raise
+                    # 登録が期限切れ・削除済み。前半をそのまま付けて送り直す
+                    logger.warning(
+                        f"[GEMINI CONTEXT CACHE] {cached_content} を使えなかったため"
+                        f"前半をそのまま送ります。step={step}, error={e}"
+                    )
+                    forget_cached_content(cached_content)
+                    cached_content = None
+                    payload = _build_payload(prefix + prompt, generation_config)
+                    result, usage = _post_once(
+                        url, payload, tokens, timeout, settings=settings, step=step
+                    )
+                break
+            except _RetryableError as e:
+                if attempt == retries:
+                    raise GeminiCallError(e.kind, str(e), step, e.status)
+
+                wait = e.wait if e.wait is not None else compute_backoff(attempt)
+                if monotonic() + wait >= deadline:
+                    raise GeminiCallError(
+                        "deadline",
+                        f"{e} (gave up after {attempt} attempts)",
+                        step,
+                        e.status,
+                    )
+                logger.warning(
+                    f"[GEMINI RETRY:{attempt}/{retries}] step={step}, kind={e.kind}, "
+                    f"error={e}, wait={wait:.1f}s"
+                )
+                sleep(wait)
+    except GeminiCallError as e:
+        record_usage(settings, step, e.kind, monotonic() - started, attempt - 1)
+        raise
+
+    latency = monotonic() - started
+    record_usage(settings, step, "ok", latency, attempt - 1, usage=usage)
+    logger.debug(
+        f"[GEMINI] step={step}, tokens={usage.get('promptTokenCount', 0)}"
+        f"+{usage.get('candidatesTokenCount', 0)}, time={latency:.1f}s, "
+        f"result={json.dumps(result, ensure_ascii=False)}"
+    )
+
+    if cache_key is not None:
+        put_cached_response(cache_key, result, settings)
+    return result
+
+
+def submit_gemini(prompt: str, settings: dict, logger, **kwargs) -> Future:
+    """
+    call_gemini をスレッドプールで実行し、結果の Future を返す。
+    引数は call_gemini と同じ。同時に送信される数は GEMINI_MAX_CONCURRENCY まで。
+    """
+    return _get_executor(settings).submit(
+        call_gemini, prompt, settings, logger, **kwargs
+    )
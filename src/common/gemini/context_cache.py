@@ -0,0 +1,124 @@
+# common/gemini/context_cache.py
+"""
+プロンプトの前半（記事によらない指示と参考例）を Gemini の cachedContents に登録して使い回す。
+
+build_prompt の *_parts() はプロンプトを (前半, 後半) に分けて返す。
+call_gemini(prefix=前半) で呼ぶと、前半を cachedContents に登録し
+（同じモデル・同じ前半なら登録済みのものを使う）、送信は
+    {"cachedContent": "cachedContents/...", "contents": [後半]}
+だけになる。キャッシュ分の入力トークンは割引され、毎回送る量も減る。
+
+次の場合は登録せず、前半と後半をつなげてそのまま送る（従来と同じ送信内容）。
+- settings["GEMINI_CONTEXT_CACHE"] が False
+- 前半が settings["GEMINI_CONTEXT_CACHE_MIN_TOKENS"] より短い
+  （モデルごとに決まった最小トークン数未満は登録できない）
+- 登録に失敗した（失敗した前半は FAILURE_RETRY_SECONDS 秒は登録し直さない）
+
+登録は settings["GEMINI_CONTEXT_CACHE_TTL"] 秒で切れる。切れる少し前に登録し直す。
+"""
+
+import hashlib
+import threading
+from collections import defaultdict
+from time import time
+
+import requests
+
+from src.common.gemini.governor import estimate_tokens
+
+# 有効期限のこの秒数前からは使わずに登録し直す
+EXPIRY_MARGIN_SECONDS = 60
+# 登録に失敗した前半を登録し直すまでの秒数
+FAILURE_RETRY_SECONDS = 3600
+
+_lock = threading.Lock()
+_key_locks = defaultdict(threading.Lock)
+# {(API の URL, モデル, 前半の SHA-256): {"name": ..., "expires_at": ...}}
+# （name が None なら登録に失敗した前半）
+_entries = {}
+
+
+def _prefix_key(settings: dict, prefix: str) -> tuple[str, str, str]:
+    return (
+        settings["GEMINI_BASE_URL"],
+        settings["GEMINI_MODEL"],
+        hashlib.sha256(prefix.encode("utf-8")).hexdigest(),
+    )
+
+
+def _create(prefix: str, settings: dict, session: requests.Session) -> str:
+    """cachedContents に登録して名前（cachedContents/...）を返す。"""
+    res = session.post(
+        f'{settings["GEMINI_BASE_URL"]}/cachedContents'
+        f'?key={settings["GEMINI_API_KEY"]}',
+        json={
+            "model": f'models/{settings["GEMINI_MODEL"]}',
+            "contents": [{"role": "user", "parts": [{"text": prefix}]}],
+            "ttl": f'{settings["GEMINI_CONTEXT_CACHE_TTL"]}s',
+        },
+        timeout=settings["GEMINI_TIMEOUT"],
+    )
+    if res.status_code >= 400:
+        raise requests.HTTPError(f"status={res.status_code} {res.text[:200]}")
+    return res.json()["name"]
+
+
+def get_cached_content(
+    prefix: str, settings: dict, session: requests.Session, logger
+) -> str | None:
+    """
+    prefix を登録した cachedContents の名前を返す。
+    登録しない・できない場合は None（呼び出し側は前半をそのまま送る）。
+    """
+    if not settings["GEMINI_CONTEXT_CACHE"]:
+        return None
+    if estimate_tokens(prefix) < settings["GEMINI_CONTEXT_CACHE_MIN_TOKENS"]:
+        return None
+
+    key = _prefix_key(settings, prefix)
+    with _lock:
+        key_lock = _key_locks[key]
+
+    # 同じ前半を同時に登録しないよう、前半ごとに1つずつ
+    with key_lock:
+        now = time()
+        entry = _entries.get(key)
+        if entry is not None and entry["expires_at"] > now:
+            return entry["name"]
+
+        try:
+            name = _create(prefix, settings, session)
+        except (requests.RequestException, KeyError, ValueError) as e:
+            logger.warning(
+                f"[GEMINI CONTEXT CACHE] 登録に失敗したため前半をそのまま送ります。error:{e}"
+            )
+            _entries[key] = {"name": None, "expires_at": now + FAILURE_RETRY_SECONDS}
+            return None
+
+        logger.info(
+            f"[GEMINI CONTEXT CACHE] 登録しました。name={name}, "
+            f"tokens~{estimate_tokens(prefix)}"
+        )
+        ttl = settings["GEMINI_CONTEXT_CACHE_TTL"]
+        _entries[key] = {
+            "name": name,
+            "expires_at": now + ttl - EXPIRY_MARGIN_SECONDS,
+        }
+        return name
+
+
+def forget_cached_content(name: str) -> None:
+    """
+    使えなくなった（期限切れ・削除済み）登録を忘れる。
+    次の呼び出しで登録し直す。
+    """
+    with _lock:
+        for key, entry in list(_entries.items()):
+            if entry["name"] == name:
+                del _entries[key]
+
+
+def clear_cached_contents() -> None:
+    """プロセス内の登録情報をすべて忘れる（テスト用）。"""
+    with _lock:
+        _entries.clear()
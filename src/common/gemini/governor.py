@@ -0,0 +1,126 @@
+# common/gemini/governor.py
+"""
+Gemini API の呼び出し量をプロセス全体で制御する。
+
+- 直近60秒のリクエスト数を settings["GEMINI_RPM"] 以下に保つ
+- 直近60秒のトークン数を settings["GEMINI_TPM"] 以下に保つ
+  （送信前はプロンプトの文字数と出力上限から見積もり、応答の usageMetadata で実数に直す）
+- 同時に送信中のリクエストを settings["GEMINI_MAX_CONCURRENCY"] 件までにする
+- 429 を受けたら block() で一定時間まるごと止める
+
+すべてのチャンネル・スレッドが同じ RateGovernor を共有するので、
+チャンネルの Gemini 呼び出しを並列にしても合計でクォータを超えない。
+"""
+
+import threading
+from collections import deque
+from contextlib import contextmanager
+from time import monotonic, sleep
+
+WINDOW_SECONDS = 60.0
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    トークン数の粗い見積もり。
+    日本語はおおむね1文字1トークン以下なので、文字数をそのまま上限として使う。
+    """
+    return len(text)
+
+
+class RateGovernor:
+    """直近 WINDOW_SECONDS 秒のリクエスト数・トークン数と同時実行数を制限する。"""
+
+    def __init__(self, rpm: int, tpm: int, max_concurrency: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        # [送信時刻, トークン数]（settle でトークン数を書き換えるため list）
+        self.window = deque()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+
+    def _trim(self, now: float) -> None:
+        while self.window and self.window[0][0] <= now - WINDOW_SECONDS:
+            self.window.popleft()
+
+    def try_acquire(self, tokens: int) -> tuple[list | None, float]:
+        """
+        枠があれば予約して (予約, 0) を返す。
+        なければ (None, 枠が空くまでの待ち秒数) を返す。
+
+        窓が空なら tokens が TPM を超えていても通す（大きすぎる1件で止まらないように）。
+        """
+        with self.lock:
+            now = monotonic()
+            self._trim(now)
+
+            if now < self.blocked_until:
+                return None, self.blocked_until - now
+
+            used = sum(entry[1] for entry in self.window)
+            if not self.window or (
+                len(self.window) < self.rpm and used + tokens <= self.tpm
+            ):
+                entry = [now, tokens]
+                self.window.append(entry)
+                return entry, 0.0
+
+            if len(self.window) >= self.rpm:
+                return None, self.window[0][0] + WINDOW_SECONDS - now
+
+            # 古いものから期限切れにして、tokens 分が空く時刻を求める
+            for sent_at, entry_tokens in self.window:
+                used -= entry_tokens
+                if used + tokens <= self.tpm:
+                    return None, sent_at + WINDOW_SECONDS - now
+            return None, self.window[-1][0] + WINDOW_SECONDS - now
+
+    def acquire(self, tokens: int) -> list:
+        """枠が空くまで待って予約する。"""
+        while True:
+            entry, wait = self.try_acquire(tokens)
+            if entry is not None:
+                return entry
+            sleep(max(wait, 0.01))
+
+    def settle(self, entry: list, tokens: int) -> None:
+        """予約した見積もりトークン数を、実際に使ったトークン数に直す。"""
+        with self.lock:
+            entry[1] = tokens
+
+    def block(self, seconds: float) -> None:
+        """seconds 秒間、送信をすべて止める（429 用）。"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, monotonic() + seconds)
+
+    @contextmanager
+    def reserve(self, tokens: int):
+        """
+        同時実行の枠と RPM/TPM の枠を取ってから with の中を実行する。
+        with の値は予約（settle に渡す）。
+        """
+        with self.slots:
+            yield self.acquire(tokens)
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor(settings: dict) -> RateGovernor:
+    """
+    プロセス全体で共有する RateGovernor を返す。
+    チャンネルごとに違う値が設定されていても、最初に作ったときの値を使う。
+    """
+    global _governor
+
+    with _governor_lock:
+        if _governor is None:
+            _governor = RateGovernor(
+                rpm=settings["GEMINI_RPM"],
+                tpm=settings["GEMINI_TPM"],
+                max_concurrency=settings["GEMINI_MAX_CONCURRENCY"],
+            )
+        return _governor
@@ -0,0 +1,99 @@
+# common/gemini/prompt_budget.py
+"""
+プロンプトに入れるコメントを文字数の予算内に絞る。
+
+まとめ・5ch 系のソースではコメント（simple_info["comments"]）がスレッド全体で、
+数百レスをそのまま判定・要約のプロンプトに入れていた。
+予算を超える場合は
+- 1レス目（スレ立て）
+- 返信（>>N）の多いレス
+- 長いレス
+- スレッド全体から等間隔に選んだレス
+を順番に1件ずつ取り、予算に収まる分だけ元の順序で残す。
+1件が予算を食いつぶさないよう、各レスは予算の 1/MAX_SHARE_DIVISOR
+（コメントがそれより少なければ 1/件数）までに切る。
+
+予算はステップごとに settings["PROMPT_BUDGETS"]（チャンネル YAML の prompt_budgets）で決める。
+日本語はおおむね1文字1トークン以下なので、文字数をトークン数の上限として扱う。
+"""
+
+import re
+from itertools import zip_longest
+
+# >>12 / ＞＞12 のような返信アンカー
+ANCHOR_PATTERN = re.compile(r"(?:>>|＞＞|≫)\s*(\d{1,4})")
+# 1件のコメントが使える予算の割合（予算の 1/5 まで）
+MAX_SHARE_DIVISOR = 5
+# 1件あたりの最低文字数（予算が小さくても短く切りすぎない）
+MIN_COMMENT_CHARS = 50
+
+
+def count_replies(comments: list[str]) -> list[int]:
+    """各コメントが他のコメントから >>N で参照された回数（N は1始まりのレス番号）。"""
+    replies = [0] * len(comments)
+    for i, comment in enumerate(comments):
+        for anchor in set(ANCHOR_PATTERN.findall(comment)):
+            target = int(anchor) - 1
+            if 0 <= target < len(comments) and target != i:
+                replies[target] += 1
+    return replies
+
+
+def _evenly_spaced(n: int) -> list[int]:
+    """
+    0 .. n-1 を粗い間隔から細かい間隔の順に並べる（0, n-1, n/2, n/4, 3n/4, ...）。
+    先頭から何件取っても、スレッド全体からまんべんなく選んだことになる。
+    """
+    order = [0, n - 1]
+    parts = 2
+    while len(order) < n and parts < 2 * n:
+        order.extend(round((n - 1) * k / parts) for k in range(1, parts, 2))
+        parts *= 2
+    return list(dict.fromkeys(order))
+
+
+def select_comments(comments, max_chars: int) -> list[str]:
+    """
+    comments（リストまたは文字列）から max_chars 文字に収まる代表的なコメントを選び、
+    元の順序で返す。収まるならそのまま返す。
+    """
+    if isinstance(comments, str):
+        return [comments[:max_chars]] if comments else []
+
+    comments = [c.strip() for c in comments or [] if c and c.strip()]
+    # 改行で連結する分を1文字として数える
+    if sum(len(c) + 1 for c in comments) <= max_chars:
+        return comments
+
+    n = len(comments)
+    cap = max(MIN_COMMENT_CHARS, max_chars // min(n, MAX_SHARE_DIVISOR) - 1)
+    clipped = [c[:cap] for c in comments]
+
+    replies = count_replies(comments)
+    by_replies = sorted(
+        (i for i in range(n) if replies[i] > 0), key=lambda i: -replies[i]
+    )
+    by_length = sorted(range(n), key=lambda i: -len(comments[i]))
+    evenly = _evenly_spaced(n)
+
+    order = [0]
+    for picks in zip_longest(by_replies, by_length, evenly):
+        order.extend(i for i in picks if i is not None)
+
+    selected = set()
+    used = 0
+    for i in order:
+        if i in selected:
+            continue
+        cost = len(clipped[i]) + 1
+        if used + cost > max_chars:
+            continue
+        selected.add(i)
+        used += cost
+
+    return [clipped[i] for i in sorted(selected)]
+
+
+def budget_comments(comments, settings: dict, step: str) -> str:
+    """step の予算でコメントを選び、1行1件の文字列にする。"""
+    return "\n".join(select_comments(comments, settings["PROMPT_BUDGETS"][step]))
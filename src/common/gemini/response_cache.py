@@ -0,0 +1,158 @@
+# common/gemini/response_cache.py
+"""
+Gemini の応答を SQLite に保存するキャッシュ。
+
+パイプラインが記事の途中で落ちて再実行したときに、同じ判定・タイトル・要約の
+プロンプトに再び課金されないようにする。
+
+- キーはモデル名・プロンプト・スキーマ・temperature をまとめた SHA-256
+- 有効期限（settings["GEMINI_CACHE_TTL"]）を過ぎたものは使わない
+- 合計サイズが settings["GEMINI_CACHE_MAX_BYTES"] を超えたら
+  最終アクセスが古いものから上限の8割まで削除する
+- ヒット率は step（judge / title など）ごとに集計する
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import defaultdict
+from pathlib import Path
+from time import time
+
+_lock = threading.Lock()
+_stats = defaultdict(lambda: {"hit": 0, "miss": 0})
+
+# 初期化済みの DB ファイル
+_initialized = set()
+
+
+def make_cache_key(
+    model: str, prompt: str, schema: dict | None, temperature: float
+) -> str:
+    payload = json.dumps(
+        {
+            "model": model,
+            "prompt": prompt,
+            "schema": schema,
+            "temperature": temperature,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _connect(settings: dict) -> sqlite3.Connection:
+    path = Path(settings["GEMINI_CACHE_PATH"])
+    # 接続より先に作らないと、新しい環境では unable to open database file になる
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+
+    with _lock:
+        if str(path) not in _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_accessed_at ON responses (accessed_at)"
+            )
+            conn.commit()
+            _initialized.add(str(path))
+
+    return conn
+
+
+def _count(step: str, name: str) -> None:
+    with _lock:
+        _stats[step][name] += 1
+
+
+def get_cached_response(key: str, settings: dict, step: str = "-") -> dict | None:
+    """有効期限内の応答があれば返す。なければ None。"""
+    now = time()
+    conn = _connect(settings)
+    try:
+        row = conn.execute(
+            "SELECT response FROM responses WHERE key = ? AND created_at >= ?",
+            (key, now - settings["GEMINI_CACHE_TTL"]),
+        ).fetchone()
+        if row is None:
+            _count(step, "miss")
+            return None
+
+        conn.execute(
+            "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    _count(step, "hit")
+    return json.loads(row[0])
+
+
+def put_cached_response(key: str, response: dict, settings: dict) -> None:
+    """応答を保存し、上限を超えていれば古いものから削除する。"""
+    now = time()
+    text = json.dumps(response, ensure_ascii=False)
+    conn = _connect(settings)
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+            (key, text, len(text.encode("utf-8")), now, now),
+        )
+        _evict(conn, settings, now)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _evict(conn: sqlite3.Connection, settings: dict, now: float) -> None:
+    """期限切れを消し、それでも上限を超えていれば最終アクセスが古い順に削除する。"""
+    conn.execute(
+        "DELETE FROM responses WHERE created_at < ?",
+        (now - settings["GEMINI_CACHE_TTL"],),
+    )
+
+    (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+    max_bytes = settings["GEMINI_CACHE_MAX_BYTES"]
+    if total <= max_bytes:
+        return
+
+    target = int(max_bytes * 0.8)
+    removed = []
+    for key, size in conn.execute(
+        "SELECT key, size FROM responses ORDER BY accessed_at"
+    ).fetchall():
+        if total <= target:
+            break
+        removed.append((key,))
+        total -= size
+    conn.executemany("DELETE FROM responses WHERE key = ?", removed)
+
+
+def get_gemini_cache_stats() -> dict[str, dict]:
+    """{step: {"hit": n, "miss": n}} を返す（プロセス起動から）。"""
+    with _lock:
+        return {step: dict(counts) for step, counts in _stats.items()}
+
+
+def format_gemini_cache_stats() -> str:
+    parts = []
+    for step, counts in sorted(get_gemini_cache_stats().items()):
+        lookups = counts["hit"] + counts["miss"]
+        hit_rate = counts["hit"] / lookups * 100 if lookups else 0.0
+        parts.append(
+            f"{step}: hit={counts['hit']} miss={counts['miss']} ({hit_rate:.1f}%)"
+        )
+    return ", ".join(parts) or "-"
@@ -0,0 +1,178 @@
+# common/gemini/usage.py
+"""
+Gemini 呼び出しごとのトークン数・所要時間・再試行回数の記録と集計。
+
+call_gemini が1回呼ばれるたびに
+    {"at", "channel", "step", "status", "cached", "prompt_tokens",
+     "cached_tokens", "response_tokens", "total_tokens", "latency", "retries"}
+を logs/gemini_usage/<日付>.jsonl に1行追記する（全チャンネル共通のファイル）。
+トークン数は応答の usageMetadata の値（キャッシュヒット・失敗は 0）。
+cached_tokens は prompt_tokens のうち cachedContents（context_cache）から読まれた分。
+latency は再試行の待ち時間を含めた呼び出し全体の秒数。
+
+集計
+- 実行ごと: run_pipeline の最後に usage_since(開始時刻, channel) をログに出す
+- 日ごと: python -m src.common.gemini.usage [YYYY-MM-DD] [--dir logs/gemini_usage]
+"""
+
+import argparse
+import json
+import threading
+from collections import deque
+from datetime import date
+from pathlib import Path
+from time import time
+
+# プロセス内に残す直近の記録数（実行ごとの集計用）
+MEMORY_RECORDS = 20000
+
+_lock = threading.Lock()
+_records = deque(maxlen=MEMORY_RECORDS)
+
+
+def record_usage(
+    settings: dict,
+    step: str,
+    status: str,
+    latency: float,
+    retries: int = 0,
+    usage: dict | None = None,
+    cached: bool = False,
+) -> dict:
+    """
+    1回の call_gemini の結果を記録する。
+
+    Args:
+        status: "ok" か GeminiCallError の kind
+        usage: 応答の usageMetadata
+    """
+    usage = usage or {}
+    record = {
+        "at": time(),
+        "channel": settings["CHANNEL_NAME"],
+        "step": step,
+        "status": status,
+        "cached": cached,
+        "prompt_tokens": usage.get("promptTokenCount", 0),
+        "cached_tokens": usage.get("cachedContentTokenCount", 0),
+        "response_tokens": usage.get("candidatesTokenCount", 0),
+        "total_tokens": usage.get("totalTokenCount", 0),
+        "latency": round(latency, 3),
+        "retries": retries,
+    }
+
+    path = Path(settings["GEMINI_USAGE_DIR"]) / f"{date.today().isoformat()}.jsonl"
+    with _lock:
+        _records.append(record)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return record
+
+
+def get_usage_records(since: float = 0.0, channel: str | None = None) -> list[dict]:
+    """プロセス内に残っている記録のうち since 以降（channel 指定時はそのチャンネル）のもの。"""
+    with _lock:
+        return [
+            record
+            for record in _records
+            if record["at"] >= since and (channel is None or record["channel"] == channel)
+        ]
+
+
+def load_usage_records(usage_dir: Path, day: str) -> list[dict]:
+    """logs/gemini_usage/<day>.jsonl を読む。"""
+    path = Path(usage_dir) / f"{day}.jsonl"
+    if not path.exists():
+        return []
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def rollup_usage(records: list[dict], keys=("channel", "step")) -> dict[tuple, dict]:
+    """
+    keys ごとに集計し {(channel, step): {...}} を返す。
+
+    calls: 呼び出し回数（キャッシュヒットを含む）
+    cache_hits / errors / retries: 件数
+    prompt_tokens / cached_tokens / response_tokens: 合計トークン数
+    latency: 合計秒数 / max_latency: 最大秒数
+    """
+    rollup = {}
+    for record in records:
+        key = tuple(record[k] for k in keys)
+        stats = rollup.setdefault(
+            key,
+            {
+                "calls": 0,
+                "cache_hits": 0,
+                "errors": 0,
+                "retries": 0,
+                "prompt_tokens": 0,
+                "cached_tokens": 0,
+                "response_tokens": 0,
+                "latency": 0.0,
+                "max_latency": 0.0,
+            },
+        )
+        stats["calls"] += 1
+        stats["cache_hits"] += bool(record["cached"])
+        stats["errors"] += record["status"] != "ok"
+        stats["retries"] += record["retries"]
+        stats["prompt_tokens"] += record["prompt_tokens"]
+        # cached_tokens を記録する前のファイルも読めるように
+        stats["cached_tokens"] += record.get("cached_tokens", 0)
+        stats["response_tokens"] += record["response_tokens"]
+        stats["latency"] += record["latency"]
+        stats["max_latency"] = max(stats["max_latency"], record["latency"])
+    return rollup
+
+
+def format_usage_rollup(rollup: dict[tuple, dict]) -> str:
+    """合計秒数の多い順に1行ずつ並べる。"""
+    if not rollup:
+        return "-"
+    lines = []
+    for key, stats in sorted(rollup.items(), key=lambda item: -item[1]["latency"]):
+        lines.append(
+            f"{'/'.join(key)}: calls={stats['calls']} "
+            f"(cache={stats['cache_hits']} error={stats['errors']} retry={stats['retries']}) "
+            f"tokens={stats['prompt_tokens']}+{stats['response_tokens']} "
+            f"(cached {stats['cached_tokens']}) "
+            f"time={stats['latency']:.1f}s (max {stats['max_latency']:.1f}s)"
+        )
+    return "\n".join(lines)
+
+
+def usage_since(since: float, channel: str | None = None) -> str:
+    """run_pipeline の最後にログに出す、実行ごとの集計。"""
+    records = get_usage_records(since, channel)
+    return format_usage_rollup(rollup_usage(records, keys=("step",)))
+
+
+def main(argv: list[str] | None = None) -> None:
+    arg_parser = argparse.ArgumentParser(description="Gemini の使用量の日ごとの集計")
+    arg_parser.add_argument("day", nargs="?", default=date.today().isoformat())
+    arg_parser.add_argument(
+        "--dir",
+        default=Path(__file__).resolve().parents[3] / "logs" / "gemini_usage",
+        type=Path,
+    )
+    arg_parser.add_argument(
+        "--by", default="channel,step", help="集計のキー（channel / step / status）"
+    )
+    args = arg_parser.parse_args(argv)
+
+    records = load_usage_records(args.dir, args.day)
+    print(f"{args.day}: {len(records)}件")
+    print(format_usage_rollup(rollup_usage(records, keys=tuple(args.by.split(",")))))
+
+
+if __name__ == "__main__":
+    main()
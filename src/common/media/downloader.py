@@ -1,6 +1,6 @@
 import os
 from typing import List
-from src.common.media.media_utils import save_image
+from src.common.media.media_utils import save_image, prefetch_images
 from src.common.utils.folder import clear_local_folder
 
 
@@ -14,9 +14,12 @@ def download_and_save_images(
 
     media_infos = []
 
+    # ダウンロードはまとめて並列に行い、保存だけ順に行う
+    contents = prefetch_images(urls, settings)
+
     for i, url in enumerate(urls, 1):
         local_base = os.path.join(save_dir, f"{prefix}_{i}")
-        local_path = save_image(url, local_base, settings)
+        local_path = save_image(url, local_base, settings, content=contents.get(url))
 
         if local_path:
             temp = {"local_path": local_path, "filename": f"{i}_{unique_id}.jpg"}
@@ -1,9 +1,10 @@
 from PIL import Image
 import os
 import base64
-import requests
 from urllib.parse import urlparse
 from src.common.utils.text_utils import extract_ext
+from src.common.scraping.fetcher import fetch_bytes
+from src.common.scraping.async_fetcher import gather_bytes
 
 
 def get_gif_duration(path: str) -> float:
@@ -30,11 +31,27 @@ def is_long_gif(local_path: str) -> bool:
             return False
 
 
-def save_image(data, dest_path, settings):
+def prefetch_images(items: list, settings: dict) -> dict:
+    """
+    save_image に渡す予定の items のうち URL のものを並列にダウンロードしておく。
+    戻り値の {url: bytes} を save_image の content に渡す。
+    """
+    urls = [
+        item
+        for item in items
+        if isinstance(item, str) and item.startswith(("http://", "https://"))
+    ]
+    return gather_bytes(urls, settings)
+
+
+def save_image(data, dest_path, settings, content: bytes | None = None):
     """
     data:
       - data:image/...;base64,... 形式
       - https://example.com/image.jpg 形式
+    content:
+      - URL の場合にダウンロード済みの本体（prefetch_images の結果）
+        None ならここで取得する
     """
 
     # 保存ディレクトリ
@@ -72,11 +89,13 @@ def save_image(data, dest_path, settings):
 
         local_path = os.path.join(save_dir, dest_path + ext)
 
-        r = requests.get(data, timeout=10)
-        r.raise_for_status()
+        if content is None:
+            content = fetch_bytes(data, settings)
+        if content is None:
+            raise RuntimeError(f"画像のダウンロードに失敗しました: {data}")
 
         with open(local_path, "wb") as f:
-            f.write(r.content)
+            f.write(content)
 
         return local_path
 
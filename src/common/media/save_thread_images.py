@@ -1,10 +1,11 @@
 import os
 from urllib.parse import urlparse
-import requests
+
+from src.common.scraping.fetcher import fetch_bytes
+from src.common.scraping.async_fetcher import gather_bytes
 
 
 def save_media_from_url(media_url: str, settings: dict) -> dict[str]:
-    # TODO 機能ごとに分割する
     """
     画像・GIF をローカルの data/{channel_name}/faces/ フォルダに保存する関数。
 
@@ -27,6 +28,28 @@ def save_media_from_url(media_url: str, settings: dict) -> dict[str]:
             ダウンロードに失敗した場合は空文字 "" を返します。
     """
 
+    content = fetch_bytes(media_url, settings)
+    return _write_media(media_url, content, settings)
+
+
+def save_media_from_urls(media_urls: list[str], settings: dict) -> list:
+    """
+    save_media_from_url の一括版。
+    ダウンロードは async_fetcher でまとめて並列に行い、受け取った順に保存する。
+
+    Returns:
+        list: media_urls と同じ順の save_media_from_url の戻り値のリスト
+    """
+    contents = gather_bytes(media_urls, settings)
+    return [
+        _write_media(media_url, contents.get(media_url), settings)
+        for media_url in media_urls
+    ]
+
+
+def _write_media(media_url: str, content: bytes | None, settings: dict):
+    """ダウンロード済みのバイナリを data/{channel_name}/images/ に保存する。"""
+
     # --- チャンネル名を settings から取得 ---
     channel_name = settings.get("CHANNEL_NAME")
     if not channel_name:
@@ -47,13 +70,11 @@ def save_media_from_url(media_url: str, settings: dict) -> dict[str]:
     file_name = f"{file_id}{ext}"
     save_path = os.path.join(save_dir, f"{file_id}{ext}")
 
-    # --- ダウンロードして保存 ---
-    response = requests.get(media_url)
-    if response.status_code == 200:
-        with open(save_path, "wb") as f:
-            f.write(response.content)
-        return {"filename": file_name, "local_path": save_path}
-
-    else:
-        print("ダウンロード失敗:", response.status_code)
+    # --- 保存 ---
+    if content is None:
+        print("ダウンロード失敗:", media_url)
         return ""
+
+    with open(save_path, "wb") as f:
+        f.write(content)
+    return {"filename": file_name, "local_path": save_path}
@@ -0,0 +1,132 @@
+# common/pipeline/article_index.py
+"""
+プロセス全体で共有する記事インデックス（正規化したURL → 記事情報）。
+
+baseball / soccer などは同じ Yahoo スポーツの一覧を巡回するため、
+同じ記事をチャンネルごとに取得・パースし、ジャンル判定も別々に Gemini に聞いていた。
+ここに
+- 記事のシンプル情報（タイトル・コメント・ジャンルなど）
+- チャンネルごとの判定結果（対象ジャンルの記事か・理由）
+を1度だけ保存し、他のチャンネルはそれを読む。
+
+ジャンル判定は、登録済みの全チャンネル分を1回の問い合わせでまとめて行う
+（judge_target_channels）。チャンネルの登録は main.py が起動時に行う。
+"""
+
+import threading
+from collections import OrderedDict
+from time import time
+
+from src.common.scraping.html_cache import normalize_cache_url
+
+# {正規化URL: {"simple_info": dict | None, "info_at": float, "verdicts": {channel: {...}}}}
+_entries = OrderedDict()
+# {channel: ジャンル名}
+_channels = {}
+_lock = threading.Lock()
+
+
+def canonical_url(url: str) -> str:
+    """インデックスのキー。キャッシュと同じ正規化に加え、末尾の / をそろえる。"""
+    normalized = normalize_cache_url(url)
+    if normalized.endswith("/") and normalized.count("/") > 3:
+        normalized = normalized.rstrip("/")
+    return normalized
+
+
+def register_channel(settings: dict) -> None:
+    """ジャンル判定の対象にするチャンネルを登録する。"""
+    with _lock:
+        _channels[settings["CHANNEL_NAME"]] = settings["GENRE"]
+
+
+def get_registered_channels() -> dict[str, str]:
+    """{channel: ジャンル名} を返す。"""
+    with _lock:
+        return dict(_channels)
+
+
+def _get_entry(url: str) -> dict:
+    """_lock を取った状態で呼ぶ。なければ作り、最近使ったものとして末尾に移す。"""
+    key = canonical_url(url)
+    entry = _entries.get(key)
+    if entry is None:
+        entry = {"simple_info": None, "info_at": 0.0, "verdicts": {}}
+        _entries[key] = entry
+    _entries.move_to_end(key)
+    return entry
+
+
+def _evict(max_entries: int) -> None:
+    while len(_entries) > max_entries:
+        _entries.popitem(last=False)
+
+
+def get_simple_info(url: str, settings: dict) -> dict | None:
+    """
+    他のチャンネルが ARTICLE_INDEX_INFO_TTL 秒以内に取得したシンプル情報を返す。
+    なければ None。コメント数は増えていくので、古いものは使わない。
+    """
+    with _lock:
+        entry = _entries.get(canonical_url(url))
+        if entry is None or entry["simple_info"] is None:
+            return None
+        if time() - entry["info_at"] > settings["ARTICLE_INDEX_INFO_TTL"]:
+            return None
+        return dict(entry["simple_info"])
+
+
+def put_simple_info(url: str, simple_info: dict, settings: dict) -> None:
+    with _lock:
+        entry = _get_entry(url)
+        entry["simple_info"] = dict(simple_info)
+        entry["info_at"] = time()
+        _evict(settings["ARTICLE_INDEX_MAX_ENTRIES"])
+
+
+def get_verdict(url: str, channel: str, settings: dict) -> dict | None:
+    """
+    チャンネルの判定結果 {"is_target": bool, "reason": str} を返す。
+    判定していない・ARTICLE_INDEX_VERDICT_TTL 秒を過ぎた場合は None。
+    """
+    with _lock:
+        entry = _entries.get(canonical_url(url))
+        if entry is None:
+            return None
+        verdict = entry["verdicts"].get(channel)
+        if verdict is None:
+            return None
+        if time() - verdict["judged_at"] > settings["ARTICLE_INDEX_VERDICT_TTL"]:
+            return None
+        return {"is_target": verdict["is_target"], "reason": verdict["reason"]}
+
+
+def put_verdicts(url: str, verdicts: dict[str, dict], settings: dict) -> None:
+    """{channel: {"is_target": bool, "reason": str}} をまとめて保存する。"""
+    now = time()
+    with _lock:
+        entry = _get_entry(url)
+        for channel, verdict in verdicts.items():
+            entry["verdicts"][channel] = {
+                "is_target": bool(verdict.get("is_target", False)),
+                "reason": verdict.get("reason", ""),
+                "judged_at": now,
+            }
+        _evict(settings["ARTICLE_INDEX_MAX_ENTRIES"])
+
+
+def build_verdict_schema(channels: list[str]) -> dict:
+    """judge_multi_target_prompt の出力スキーマ（チャンネル名ごとの判定）。"""
+    verdict = {
+        "type": "object",
+        "properties": {
+            "is_target": {"type": "boolean"},
+            "reason": {"type": "string"},
+        },
+        "required": ["is_target", "reason"],
+    }
+    return {
+        "type": "object",
+        "properties": {channel: verdict for channel in channels},
+        "required": list(channels),
+    }
@@ -4,19 +4,56 @@ import yaml
 from pathlib import Path
 import importlib
 from datetime import datetime
-from time import sleep
+from time import sleep, time
 import re
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
-from src.common.scraping.fetcher import fetch_html
+from src.common.scraping.fetcher import (
+    fetch_html,
+    fetch_document,
+    fetch_list_page,
+    mark_list_page_processed,
+)
+from src.common.scraping.async_fetcher import gather_html
+from src.common.scraping.html_cache import format_cache_stats
+from src.common.pipeline.article_index import (
+    get_simple_info,
+    put_simple_info,
+    get_verdict,
+    put_verdicts,
+)
+from src.common.classifier.prefilter import prefilter_verdict
+from src.common.pipeline.judge import judge_target_channels, judge_target_batch
+from src.common.pipeline.enrichment import (
+    enrich_article,
+    submit_title,
+    summarize_threads,
+    merge_separate_results,
+)
+from src.common.gemini.client import GeminiCallError
+from src.common.pipeline.task_graph import TaskGraph, TaskError, resource_lock
+from src.common.pipeline.watermark import (
+    load_watermark,
+    select_new_articles,
+    save_watermark,
+)
+from src.common.scraping.document import HtmlDocument
+from src.common.scraping.rate_limiter import (
+    configure_host_rate,
+    DEFAULT_RATE,
+    DEFAULT_BURST,
+)
 from src.common.scraping.html_parser import (
     parse_article_list,
     parse_article_simple_info,
-    parse_article_detail_info,
+    parse_article_detail_and_media,
     parse_comments,
+    get_stream_keep,
 )
 from src.common.utils.logger import get_logger
 from src.common.google_drive.drive_client import get_drive_service
+from src.common.google_drive.drive_uploader import upload_multiple_files_to_drive
 from src.common.google_drive.drive_utils import (
     verify_drive_images_exist,
     remove_duplicate_names_in_folder,
@@ -24,8 +61,8 @@ from src.common.google_drive.drive_utils import (
 from common.pipeline.thumbnails_pipeline import make_thumbnail
 from src.common.pipeline.image_pipeline import fetch_and_upload_main_images
 from src.common.pipeline.build_row_values import build_row_values
-from src.common.gemini.client import call_gemini
-from src.common.gemini.build_prompt import build_title_prompt
+from src.common.gemini.response_cache import format_gemini_cache_stats
+from src.common.gemini.usage import usage_since
 from src.common.sheets.repository import (
     append_table,
     get_sheet,
@@ -35,11 +72,6 @@ from src.common.sheets.repository import (
 )
 from src.common.sheets.maintenance import delete_over_max_rows
 from config.settings import load_settings
-from src.common.gemini.build_prompt import (
-    build_summarize_article_prompt,
-    build_summarize_comments_prompt,
-    judge_target_prompt,
-)
 from src.common.utils.list_utils import is_too_long
 
 
@@ -67,12 +99,188 @@ def load_config(channel_name: str) -> dict:
         return yaml.safe_load(f)
 
 
+def load_detail_document(
+    article_url: str, source: dict, settings: dict, detail_htmls: dict[str, str]
+) -> HtmlDocument:
+    """
+    記事の詳細ページを HtmlDocument で返す。
+    stream_parse の取得元は受信しながらパースし、それ以外は先読み分（なければ取得）を使う。
+    """
+    cache_ttl = source.get("cache_ttl", settings["HTTP_CACHE_TTL"])
+
+    if source.get("stream_parse", False):
+        return fetch_document(
+            article_url,
+            settings,
+            keep=get_stream_keep(source["parser_name"]),
+            max_bytes=source.get("max_html_bytes", settings["MAX_HTML_BYTES"]),
+            cache_ttl=cache_ttl,
+        )
+
+    detail_html = detail_htmls.get(article_url) or fetch_html(
+        article_url, settings, cache_ttl=cache_ttl
+    )
+    return HtmlDocument(detail_html)
+
+
+class SkipArticle(Exception):
+    """この記事を今回は処理しない（リサーチ済みにはしないので次回また処理する）。"""
+
+
+# Gemini の呼び出しに失敗したときのログに出す、タスクごとの処理名
+GEMINI_TASK_LABELS = {
+    "enrich": "記事情報の作成",
+    "title": "タイトルの作成",
+    "summaries": "本文とコメントの要約",
+    "thumbnail": "人物の検出",
+}
+
+
+def build_article_graph(
+    executor,
+    article_url: str,
+    title: str,
+    comments,
+    detail_doc: HtmlDocument | None,
+    unique_id: str,
+    source: dict,
+    settings: dict,
+    drive_service,
+    detail_htmls: dict[str, str],
+    logger,
+) -> TaskGraph:
+    """
+    ターゲット記事1件分の処理のタスクグラフを作る。
+
+        detail ──┬── upload_media
+                 ├── enrich ── thumbnail ── main_images（detail も参照）
+        comments ┘
+
+    detail       : 詳細ページから本文と画像を取り出す（画像はローカル保存まで）
+    comments     : コメント取得（スレッド形式でない場合。detail と並行）
+    upload_media : スレッド画像を Drive に保存（enrich 以降と並行）
+    enrich       : タイトル・サムネ用テキスト・要約・人物を作る
+    thumbnail    : 文字数の確認とサムネイルの生成
+    main_images  : サムネイル以外の画像の取得
+
+    FUSED_ENRICHMENT でない場合、タイトルはコメントを使わないので
+    enrich を分けてコメントの取得と並行に作る。
+
+        detail ──┬── title ─────┬── enrich（2つをまとめるだけ）
+                 └── summaries ─┘
+        comments ────┘
+
+    Drive クライアントはスレッドセーフでないので、Drive を使うタスクは
+    resources=("drive",) で1つずつ実行する（thumbnail は Drive への保存の間だけ）。
+    """
+    parser_name = source["parser_name"]
+
+    def run_detail():
+        doc = detail_doc
+        if doc is None:
+            doc = load_detail_document(article_url, source, settings, detail_htmls)
+        return parse_article_detail_and_media(article_url, doc, parser_name, settings)
+
+    def run_comments():
+        if source["is_thread"]:
+            return comments
+        logger.info(
+            f"=== スレッド形式でない記事のためコメントを取得  {title[:20]}... URL:{article_url} ==="
+        )
+        return parse_comments(article_url, parser_name, source, settings)
+
+    def run_upload_media(detail):
+        _, _, media_infos = detail
+        return upload_multiple_files_to_drive(drive_service, media_infos, settings)
+
+    def run_enrich(detail, comments):
+        # タイトル・サムネ用テキスト、スレッド形式でない場合は本文とコメントの要約、
+        # 人物を1回の問い合わせで作る（検証を通らなければ個別に作り直す）
+        threads, _, _ = detail
+        return enrich_article(title, threads, comments, source, settings, logger)
+
+    def run_title(detail):
+        threads, _, _ = detail
+        return submit_title(title, threads, source, settings, logger).result()
+
+    def run_summaries(detail, comments):
+        threads, _, _ = detail
+        return summarize_threads(title, threads, comments, source, settings, logger)
+
+    def run_merge(title, summaries):
+        return merge_separate_results(title, summaries)
+
+    def run_thumbnail(enrich):
+        threads = enrich["threads"]
+        # 各コメントが長すぎないか判定
+        max_thread_length = settings.get("MAX_THREAD_LENGTH", 1000)
+        if is_too_long(threads, max_thread_length, source, logger):
+            raise SkipArticle(
+                f"最大文字数を超えるコメントがありました、スキップします。: {title[:20]} ,URL:{article_url}"
+            )
+
+        is_thumbnail, thumbnail_pattern, player_info = make_thumbnail(
+            title,
+            threads,
+            unique_id,
+            settings,
+            drive_service,
+            players=enrich["players"],
+            drive_lock=resource_lock("drive"),
+        )
+        logger.info(
+            f"サムネイルの生成に成功しました。タイトル:{title[:20]} ,URL:{article_url} ,pattern:{thumbnail_pattern} ,player:{player_info['name']}"
+        )
+        if not is_thumbnail:
+            raise SkipArticle(
+                f"サムネイルの生成に失敗しました。タイトル:{title} ,URL:{article_url}"
+            )
+        return thumbnail_pattern, player_info
+
+    def run_main_images(detail, thumbnail):
+        _, pictures, _ = detail
+        _, player_info = thumbnail
+        num_media = len(list(dict.fromkeys(pictures)))
+        if (
+            player_info["name"] != None
+            and num_media <= settings["MIN_REQUIRED_PICTURES"]
+        ):
+            return fetch_and_upload_main_images(
+                player_info, unique_id, drive_service, settings
+            )
+        return None
+
+    graph = TaskGraph(executor)
+    graph.add("detail", run_detail)
+    graph.add("comments", run_comments)
+    graph.add(
+        "upload_media", run_upload_media, deps=("detail",), resources=("drive",)
+    )
+    if settings["FUSED_ENRICHMENT"]:
+        graph.add("enrich", run_enrich, deps=("detail", "comments"))
+    else:
+        graph.add("title", run_title, deps=("detail",))
+        graph.add("summaries", run_summaries, deps=("detail", "comments"))
+        graph.add("enrich", run_merge, deps=("title", "summaries"))
+    # 人物の検出（Gemini）やサムネイルの生成の間は Drive を使わないので、
+    # resources には入れず make_thumbnail の中で保存の間だけ drive のロックを取る
+    graph.add("thumbnail", run_thumbnail, deps=("enrich",))
+    graph.add(
+        "main_images",
+        run_main_images,
+        deps=("detail", "thumbnail"),
+        resources=("drive",),
+    )
+    return graph
+
+
 def run_pipeline(settings: dict):
     """
     settings（辞書形式）を受け取ってパイプラインを実行する。
     main.py 側で settings を切り替えることで多チャンネル対応する。
     """
     channel = settings["CHANNEL_NAME"]
+    run_started = time()
 
     settings = load_settings(channel)
 
@@ -102,313 +310,337 @@ def run_pipeline(settings: dict):
     # Driveの同名ファイルを削除（重複消去）
     remove_duplicate_names_in_folder(drive_service, settings["DRIVE_ID"], dry_run=False)
 
-    # ---------------------------------------------------------
-    # 1 すべての取得元を巡回
-    # ---------------------------------------------------------
-    for source in settings["SOURCE_URLS"]:
-        source_url = source["url"]
-        parser_name = source["parser_name"]
-        demand_to_check_target_channel = source.get(
-            "demand_to_check_target_channel", True
-        )
-
-        logger = get_logger(
-            channel,
-            channel=channel,
-            step="pipeline",
-            source=source_url,
-            article_url="-",
-        )
-
-        logger.info(f"Fetching list page: {source_url}")
-
-        html = fetch_html(source_url, settings)
-        article_urls = parse_article_list(html, parser_name)
-
-        logger.info(f" {len(article_urls)}個の 記事を取得しました。 from {source_url}")
-
-        researched_url = get_researched_urls(settings)
-
-        # リサーチ済みの物を省く
-        article_urls = [u for u in article_urls if u not in researched_url]
-        logger.info(f"{len(article_urls)}個の記事が新しいです。 {source_url}")
+    # 記事ごとのタスクグラフ（build_article_graph）を実行するスレッド
+    article_executor = ThreadPoolExecutor(
+        max_workers=settings["ARTICLE_TASK_WORKERS"], thread_name_prefix="article"
+    )
 
+    try:
         # ---------------------------------------------------------
-        # 2 各記事の詳細取得
+        # 1 すべての取得元を巡回
         # ---------------------------------------------------------
-        for article_url in article_urls:
+        for source in settings["SOURCE_URLS"]:
+            source_url = source["url"]
+            parser_name = source["parser_name"]
+            demand_to_check_target_channel = source.get(
+                "demand_to_check_target_channel", True
+            )
+            cache_ttl = source.get("cache_ttl", settings["HTTP_CACHE_TTL"])
+
+            # 取得元ごとのレート制限（ホスト単位・全チャンネル共有）
+            if source.get("rate_limit"):
+                configure_host_rate(
+                    source_url,
+                    rate=source["rate_limit"].get("per_second", DEFAULT_RATE),
+                    burst=source["rate_limit"].get("burst", DEFAULT_BURST),
+                )
 
             logger = get_logger(
                 channel,
                 channel=channel,
                 step="pipeline",
                 source=source_url,
-                article_url=article_url,
+                article_url="-",
             )
 
-            logger.info(f"{article_url} を精査します。")
+            logger.info(f"Fetching list page: {source_url}")
 
-            detail_html = fetch_html(article_url, settings)
-            simple_info = parse_article_simple_info(detail_html, parser_name, logger)
-            if not simple_info:
-                logger.info(
-                    f"本文が抽出できませんでした。そういうタイプのヤフーニュースか指定したクラスが変更された可能性があります。URL:{article_url} "
-                )
+            html = fetch_list_page(source_url, settings)
+            if html is None:
+                # 前回処理した時から一覧が変わっていないので、パースもシート参照も不要
+                logger.info(f"一覧ページに変更がないためスキップします。 {source_url}")
                 continue
 
-            title = simple_info["title"]
-            comments = simple_info["comments"]
-            genre = simple_info["genre"]
-            num_comments = int(simple_info["num_comments"])
-
-            """simple_info =dict{
-            "title": 記事タイトル,
-            "num_comments":コメント数
-            "comments":コメント
-            "genre":ジャンル}"""
-
-            # ---------------------------------------------------------
-            # 3-1 スレッド形式でない場合、コメント数を確認
-            # ---------------------------------------------------------
-            if num_comments <= 5 and not source["is_thread"]:
-                # コメント数ではじく場合はリサーチ済みに入れずにコメント数が増えるまで待つ
-                logger.info(
-                    f"スレッド形式でなくコメントが少ないためいったんスキップします。タイトル:{title},URL:{article_url} "
-                )
-                continue
-            # ---------------------------------------------------------
-            # 3-2 チャンネルのターゲットジャンル記事か判定(ex.野球かどうか？
-            # ---------------------------------------------------------
-            if any(i is None for i in (title, comments, genre)):
-                logger.warning(
-                    f"記事情報の取得に失敗しました。タイトル:{title},URL:{article_url}"
-                )
-                # 操作済みURLリストに追記
-                append_researched_urls([article_url], settings)
-                continue
-
-            if demand_to_check_target_channel:
-                is_target_prompt = judge_target_prompt(
-                    title=title,
-                    comments=comments,
-                    genre=genre,
-                    settings=settings,
-                )
-
-                temp_res = call_gemini(
-                    prompt=is_target_prompt,
-                    settings=settings,
-                    logger=logger,
-                    schema={
-                        "type": "object",
-                        "properties": {
-                            f"is_{settings['IS_TARGET_GENRE_WORD']}_article": {
-                                "type": "boolean"
-                            },
-                            "reason": {"type": "string"},
-                        },
-                        "required": [
-                            f"is_{settings['IS_TARGET_GENRE_WORD']}_article",
-                            "reason",
-                        ],
-                    },
-                )
+            article_urls = parse_article_list(
+                html, parser_name, fast=settings["FAST_TOP_PAGE_PARSE"]
+            )
 
-                is_target = temp_res.get(
-                    f"is_{settings['IS_TARGET_GENRE_WORD']}_article", False
-                )
-                reason = temp_res.get("reason", "")
+            logger.info(f" {len(article_urls)}個の 記事を取得しました。 from {source_url}")
 
+            # 前回までに処理した位置より新しいもの（と保留中のもの）だけに絞る
+            watermark = load_watermark(source_url, settings)
+            scanned_urls = select_new_articles(
+                article_urls, watermark, settings["WATERMARK_STOP_AFTER_KNOWN"]
+            )
+            logger.info(f"{len(scanned_urls)}個の記事が前回から未処理です。 {source_url}")
+
+            # リサーチ済みの物を省く（新しい記事がなければシートは見ない）
+            article_urls = scanned_urls
+            if article_urls:
+                researched_url = get_researched_urls(settings)
+                article_urls = [u for u in article_urls if u not in researched_url]
+            logger.info(f"{len(article_urls)}個の記事が新しいです。 {source_url}")
+
+            # リサーチ済みに入れた記事。入らなかったものは次回も再確認する
+            resolved_urls = set(scanned_urls) - set(article_urls)
+
+            # 巨大なスレッドが来る取得元は、先読みせず1件ずつ受信しながらパースする
+            stream_parse = source.get("stream_parse", False)
+            if stream_parse:
+                detail_htmls = {}
             else:
-                is_target = True
-                reason = "geminiを通さずにターゲットジャンルと判定"
-
-            if not is_target:
-                logger.info(
-                    f"ターゲットジャンル外の記事のためスキップします。タイトル:{title},URL:{article_url} 理由:{reason}"
+                # 新しい記事の詳細ページをまとめて並列に先読みしておく
+                # （他のチャンネルが取得済みでインデックスにある記事は除く）
+                detail_htmls = gather_html(
+                    [u for u in article_urls if get_simple_info(u, settings) is None],
+                    settings,
+                    cache_ttl=cache_ttl,
                 )
-                append_researched_urls([article_url], settings)
-                continue
 
             # ---------------------------------------------------------
-            # 4 要件を満たしたので情報を詳しく取得
+            # 2 各記事のシンプル情報を取得
             # ---------------------------------------------------------
-            try:
-                unique_id = article_url.strip("/").split("/")[-1]
-                if unique_id.split(".")[0] != "":
-                    unique_id = unique_id.split(".")[0]
-
-                logger.info(
-                    f"=== ターゲットジャンルのため詳しい記事内容を取得  {title[:20]}... URL:{article_url} ,理由:{reason} "
-                )
-                threads, pictures = parse_article_detail_info(
-                    article_url, detail_html, parser_name, settings, drive_service
+            candidates = []
+            for article_url in article_urls:
+
+                logger = get_logger(
+                    channel,
+                    channel=channel,
+                    step="pipeline",
+                    source=source_url,
+                    article_url=article_url,
                 )
 
-            except Exception as e:
-                logger.error(
-                    f"記事情報取得中にエラーが出ました。タイトル:{title[:20]},URL:{article_url} error:{e}"
-                    + traceback.format_exc()
-                )
-                append_researched_urls([article_url], settings)
-                continue
+                logger.info(f"{article_url} を精査します。")
+
+                # 他のチャンネルが取得済みならインデックスのシンプル情報を使う
+                # 詳細ページは詳しい情報が必要になったときに取得する
+                detail_doc = None
+                simple_info = get_simple_info(article_url, settings)
+                if simple_info is None:
+                    detail_doc = load_detail_document(
+                        article_url, source, settings, detail_htmls
+                    )
+                    simple_info = parse_article_simple_info(detail_doc, parser_name, logger)
+                    if simple_info:
+                        put_simple_info(article_url, simple_info, settings)
+                if not simple_info:
+                    logger.info(
+                        f"本文が抽出できませんでした。そういうタイプのヤフーニュースか指定したクラスが変更された可能性があります。URL:{article_url} "
+                    )
+                    continue
+
+                title = simple_info["title"]
+                comments = simple_info["comments"]
+                genre = simple_info["genre"]
+                num_comments = int(simple_info["num_comments"])
+
+                """simple_info =dict{
+                "title": 記事タイトル,
+                "num_comments":コメント数
+                "comments":コメント
+                "genre":ジャンル}"""
+
+                # ---------------------------------------------------------
+                # 2-1 スレッド形式でない場合、コメント数を確認
+                # ---------------------------------------------------------
+                if num_comments <= 5 and not source["is_thread"]:
+                    # コメント数ではじく場合はリサーチ済みに入れずにコメント数が増えるまで待つ
+                    logger.info(
+                        f"スレッド形式でなくコメントが少ないためいったんスキップします。タイトル:{title},URL:{article_url} "
+                    )
+                    continue
+
+                if any(i is None for i in (title, comments, genre)):
+                    logger.warning(
+                        f"記事情報の取得に失敗しました。タイトル:{title},URL:{article_url}"
+                    )
+                    # 操作済みURLリストに追記
+                    append_researched_urls([article_url], settings)
+                    resolved_urls.add(article_url)
+                    continue
+
+                candidates.append((article_url, simple_info, detail_doc))
 
             # ---------------------------------------------------------
-            # 5-1 指示書に必要な情報を作成
+            # 2-2 未判定の記事をローカル分類器で振り分け、残りをまとめてジャンル判定
             # ---------------------------------------------------------
-            gemini_title_result = call_gemini(
-                build_title_prompt(title, threads),
-                settings,
-                logger,
-                schema={
-                    "type": "object",
-                    "properties": {
-                        "title": {"type": "string"},
-                        "thumbtext": {"type": "string"},
-                        "thumbtext2": {"type": "string"},
-                    },
-                    "required": ["title", "thumbtext", "thumbtext2"],
-                },
-                temperature=0.5,
-            )
+            if demand_to_check_target_channel:
+                # 確信度が高い記事はこのチャンネルの判定として保存し、Gemini に聞かない
+                for article_url, simple_info, _ in candidates:
+                    if get_verdict(article_url, channel, settings) is not None:
+                        continue
+                    verdict = prefilter_verdict(simple_info, settings)
+                    if verdict is not None:
+                        put_verdicts(article_url, {channel: verdict}, settings)
+
+            if demand_to_check_target_channel and settings["BATCH_JUDGE"]:
+                unjudged = [
+                    (article_url, simple_info)
+                    for article_url, simple_info, _ in candidates
+                    if get_verdict(article_url, channel, settings) is None
+                ]
+                if len(unjudged) > 1:
+                    judge_target_batch(unjudged, settings, logger)
+
+            # 詳細の取得でパース済みのツリーを使い回すのはターゲット記事だけなので、
+            # ターゲット外と判定済みの記事のツリーはここで手放す
+            if demand_to_check_target_channel:
+                for index, (article_url, simple_info, _) in enumerate(candidates):
+                    verdict = get_verdict(article_url, channel, settings)
+                    if verdict is not None and not verdict["is_target"]:
+                        candidates[index] = (article_url, simple_info, None)
 
             # ---------------------------------------------------------
-            # 5-2 スレッド形式でない場合コメントを取得
+            # 3 各記事の詳細取得
             # ---------------------------------------------------------
-            if not source["is_thread"]:
-                logger.info(
-                    f"=== スレッド形式でない記事のためコメントを取得  {title[:20]}... URL:{article_url} ==="
+            for index, (article_url, simple_info, detail_doc) in enumerate(candidates):
+                # 処理し終えた記事のツリーを持ち続けないよう、一覧からは外しておく
+                candidates[index] = (article_url, simple_info, None)
+
+                logger = get_logger(
+                    channel,
+                    channel=channel,
+                    step="pipeline",
+                    source=source_url,
+                    article_url=article_url,
                 )
-                # コメント部分を取得
-                comments = parse_comments(article_url, parser_name, source, settings)
 
-            # ---------------------------------------------------------
-            # 5-3 スレッド形式でない場合、本文とコメントを要約
-            # ---------------------------------------------------------
-            if not source["is_thread"]:
+                title = simple_info["title"]
+                comments = simple_info["comments"]
+
+                # ---------------------------------------------------------
+                # 3-1 チャンネルのターゲットジャンル記事か判定(ex.野球かどうか？
+                # ---------------------------------------------------------
+                if demand_to_check_target_channel:
+                    # まとめて判定した結果（他のチャンネルの判定分を含む）を使う
+                    # 応答に含まれなかった記事だけ1件ずつ判定する
+                    verdict = get_verdict(article_url, channel, settings)
+                    if verdict is None:
+                        try:
+                            verdict = judge_target_channels(
+                                article_url, simple_info, settings, logger
+                            )
+                        except GeminiCallError as e:
+                            # この記事だけ飛ばす（処理済みにしないので次回また判定する）
+                            logger.error(
+                                f"ジャンル判定に失敗したためスキップします。タイトル:{title[:20]},URL:{article_url} error:{e}"
+                            )
+                            continue
+                    is_target = verdict["is_target"]
+                    reason = verdict["reason"]
+
+                else:
+                    is_target = True
+                    reason = "geminiを通さずにターゲットジャンルと判定"
+
+                if not is_target:
+                    logger.info(
+                        f"ターゲットジャンル外の記事のためスキップします。タイトル:{title},URL:{article_url} 理由:{reason}"
+                    )
+                    append_researched_urls([article_url], settings)
+                    resolved_urls.add(article_url)
+                    continue
+
+                # ---------------------------------------------------------
+                # 4〜7 記事ごとの処理を依存関係に沿って並行に実行
+                #      （詳細・コメント取得 → 記事情報の作成 → サムネイル → その他の画像、
+                #        スレッド画像の Drive 保存は記事情報の作成以降と並行）
+                # ---------------------------------------------------------
+                unique_id = article_url.strip("/").split("/")[-1]
+                if unique_id.split(".")[0] != "":
+                    unique_id = unique_id.split(".")[0]
+
                 logger.info(
-                    f"=== スレッド形式でない記事のため本文とコメントを要約  {title[:20]}... URL:{article_url} ==="
-                )
-                article_prompt = build_summarize_article_prompt(
-                    article=threads,
-                    title=title,
-                    source=source,
+                    f"=== ターゲットジャンルのため詳しい記事内容を取得  {title[:20]}... URL:{article_url} ,理由:{reason} "
                 )
-                # 本文を要約してthreadsに格納
-                threads = call_gemini(
-                    prompt=article_prompt,
-                    settings=settings,
-                    logger=logger,
-                    schema={
-                        "type": "object",
-                        "properties": {
-                            "script": {"type": "array", "items": {"type": "string"}}
-                        },
-                    },
-                    temperature=0.5,
+                graph = build_article_graph(
+                    article_executor,
+                    article_url,
+                    title,
+                    comments,
+                    detail_doc,
+                    unique_id,
+                    source,
+                    settings,
+                    drive_service,
+                    detail_htmls,
+                    logger,
                 )
-
-                comments_prompt = build_summarize_comments_prompt(
-                    comments=comments,
-                    source=source,
+                try:
+                    results = graph.run()
+                except TaskError as e:
+                    if isinstance(e.error, SkipArticle):
+                        logger.warning(str(e.error))
+                        continue
+                    if isinstance(e.error, GeminiCallError):
+                        # この記事だけ飛ばす（処理済みにしないので次回また作成する）
+                        logger.error(
+                            f"{GEMINI_TASK_LABELS.get(e.task, e.task)}に失敗したためスキップします。タイトル:{title[:20]},URL:{article_url} error:{e.error}"
+                        )
+                        continue
+                    if e.task not in ("detail", "upload_media"):
+                        raise e.error
+                    logger.error(
+                        f"記事情報取得中にエラーが出ました。タイトル:{title[:20]},URL:{article_url} error:{e.error}"
+                        + "".join(traceback.format_exception(e.error))
+                    )
+                    append_researched_urls([article_url], settings)
+                    resolved_urls.add(article_url)
+                    continue
+                finally:
+                    logger.info(f"記事ごとの処理時間: {graph.format_timings()}")
+
+                enriched = results["enrich"]
+                threads = enriched["threads"]
+                _, pictures, _ = results["detail"]
+                thumbnail_pattern, player_info = results["thumbnail"]
+
+                # ---------------------------------------------------------
+                # 8 指示書を作成
+                # ---------------------------------------------------------
+                values_out = build_row_values(
+                    new_title=enriched["title"],
+                    thumb_text=enriched["thumbtext"],
                     title=title,
-                )
-
-                # コメントを要約してcommentsに格納
-                comments = call_gemini(
-                    prompt=comments_prompt,
+                    article=threads,
+                    text2=enriched["thumbtext2"],
+                    pictures=pictures,
+                    unique_id=unique_id,
+                    thumbnail_pattern=thumbnail_pattern,
+                    source=source,
                     settings=settings,
-                    logger=logger,
-                    schema={
-                        "type": "object",
-                        "properties": {
-                            "script": {"type": "array", "items": {"type": "string"}}
-                        },
-                    },
-                    temperature=0.5,
                 )
-                # threadsにコメントを追加
-                threads = [*threads["script"], *comments["script"]]
-
-            # ---------------------------------------------------------
-            # 5-4 各コメントが長すぎないか判定
-            # ---------------------------------------------------------
-            max_thread_length = settings.get("MAX_THREAD_LENGTH", 1000)
 
-            if is_too_long(threads, max_thread_length, source, logger):
-                logger.warning(
-                    f"最大文字数を超えるコメントがありました、スキップします。: {title[:20]} ,URL:{article_url}"
-                )
-                continue
+                # 素材がそろってるか確認
+                missing_files = verify_drive_images_exist(values_out, settings)
+                if missing_files:
+                    logger.warning(
+                        f"Missing files for article '{title}': {missing_files}. Skipping article."
+                    )
+                    continue
+                # ---------------------------------------------------------
+                # 9 指示書を出力
+                # ---------------------------------------------------------
+                output_sheet = get_sheet(settings["SHEET_ARTICLE"], settings)
+                log_sheet = get_sheet(settings["SHEET_LOG"], settings)
+                while True:  # 衝突を避けるため
+                    now = datetime.now()
+                    if now.minute % 2 == 0 and now.second <= 49:  # 偶数 & 0〜49秒
+                        append_table(output_sheet, values_out)
+                        append_table(log_sheet, values_out)
+                        break
+                    sleep(5)
 
-            # ---------------------------------------------------------
-            # 6 サムネイルの生成
-            # ---------------------------------------------------------
-            is_thumbnail, thumbnail_pattern, player_info = make_thumbnail(
-                title, threads, unique_id, settings, drive_service
-            )
-            logger.info(
-                f"サムネイルの生成に成功しました。タイトル:{title[:20]} ,URL:{article_url} ,pattern:{thumbnail_pattern} ,player:{player_info['name']}"
-            )
-            if not is_thumbnail:
-                logger.warning(
-                    f"サムネイルの生成に失敗しました。タイトル:{title} ,URL:{article_url}"
-                )
-                continue
-
-            # ---------------------------------------------------------
-            # 7 サムネイル以外の画像を取得
-            # ---------------------------------------------------------
-            num_media = len(list(dict.fromkeys(pictures)))
-            if (
-                player_info["name"] != None
-                and num_media <= settings["MIN_REQUIRED_PICTURES"]
-            ):
-                # 2 画像取得
-                uploaded_picuture = fetch_and_upload_main_images(
-                    player_info, unique_id, drive_service, settings
+                logger.info(
+                    f"記事の指示書をシートに出力しました。タイトル:{title},URL:{article_url}"
                 )
-
-            # ---------------------------------------------------------
-            # 8 指示書を作成
-            # ---------------------------------------------------------
-            values_out = build_row_values(
-                new_title=gemini_title_result.get("title"),
-                thumb_text=gemini_title_result.get("thumbtext"),
-                title=title,
-                article=threads,
-                text2=gemini_title_result.get("thumbtext2"),
-                pictures=pictures,
-                unique_id=unique_id,
-                thumbnail_pattern=thumbnail_pattern,
-                source=source,
+                # 操作済みURLリストに追記
+                append_researched_urls([article_url], settings)
+                resolved_urls.add(article_url)
+
+            # この一覧ページの記事をすべて処理し終えたので、変更検知の基準を更新
+            mark_list_page_processed(source_url, settings)
+            save_watermark(
+                source_url,
+                seen_urls=[u for u in scanned_urls if u in resolved_urls],
+                pending_urls=[u for u in scanned_urls if u not in resolved_urls],
                 settings=settings,
             )
+    finally:
+        article_executor.shutdown()
 
-            # 素材がそろってるか確認
-            missing_files = verify_drive_images_exist(values_out, settings)
-            if missing_files:
-                logger.warning(
-                    f"Missing files for article '{title}': {missing_files}. Skipping article."
-                )
-                continue
-            # ---------------------------------------------------------
-            # 9 指示書を出力
-            # ---------------------------------------------------------
-            output_sheet = get_sheet(settings["SHEET_ARTICLE"], settings)
-            log_sheet = get_sheet(settings["SHEET_LOG"], settings)
-            while True:  # 衝突を避けるため
-                now = datetime.now()
-                if now.minute % 2 == 0 and now.second <= 49:  # 偶数 & 0〜49秒
-                    append_table(output_sheet, values_out)
-                    append_table(log_sheet, values_out)
-                    break
-                sleep(5)
-
-            logger.info(
-                f"記事の指示書をシートに出力しました。タイトル:{title},URL:{article_url}"
-            )
-            # 操作済みURLリストに追記
-            append_researched_urls([article_url], settings)
-
+    logger.info(f"HTMLキャッシュ: {format_cache_stats()}")
+    logger.info(f"Geminiキャッシュ: {format_gemini_cache_stats()}")
+    logger.info(f"Gemini使用量（この実行）:\n{usage_since(run_started, channel)}")
     logger.info("Pipeline completed.")
@@ -0,0 +1,309 @@
+# common/pipeline/enrichment.py
+"""
+ターゲット記事の指示書用の情報を Gemini で作る。
+
+- タイトル・サムネ用テキスト（title / thumbtext / thumbtext2）
+- 本文とコメントの要約（スレッド形式でない記事のみ）
+- サムネイル用の話題の人物（または話題）
+
+settings["FUSED_ENRICHMENT"] が True なら build_enrichment_prompt で1回にまとめて問い合わせ、
+応答が検証を通らなければ従来どおり個別のプロンプトで作り直す。
+プロンプトは記事によらない前半（prefix）と記事ごとの後半に分けて渡し、
+前半は call_gemini 側で cachedContents に登録して使い回す。
+人物だけが不正な場合は players を None にし、make_thumbnail 側で detect_players に任せる。
+Gemini の呼び出しが最終的に失敗した場合は GeminiCallError がそのまま上がる。
+"""
+
+from concurrent.futures import Future
+
+from src.common.gemini.client import call_gemini, submit_gemini, GeminiCallError
+from src.common.gemini.prompt_budget import budget_comments, select_comments
+from src.common.gemini.build_prompt import (
+    build_title_prompt_parts,
+    build_summarize_article_prompt,
+    build_summarize_comments_prompt_parts,
+    build_enrichment_prompt_parts,
+)
+
+TITLE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "thumbtext": {"type": "string"},
+        "thumbtext2": {"type": "string"},
+    },
+    "required": ["title", "thumbtext", "thumbtext2"],
+}
+
+SCRIPT_SCHEMA = {
+    "type": "object",
+    "properties": {"script": {"type": "array", "items": {"type": "string"}}},
+}
+
+ENRICHMENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        **TITLE_SCHEMA["properties"],
+        "article_script": {"type": "array", "items": {"type": "string"}},
+        "comment_script": {"type": "array", "items": {"type": "string"}},
+        "players": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "team": {"type": "string"},
+                },
+                "required": ["name", "team"],
+            },
+        },
+    },
+    "required": [
+        "title",
+        "thumbtext",
+        "thumbtext2",
+        "article_script",
+        "comment_script",
+        "players",
+    ],
+}
+
+# 人物（話題）が取れなかったことを表す name
+EMPTY_PLAYER_NAMES = {"", "None", "不明"}
+
+
+def _is_text(value) -> bool:
+    return isinstance(value, str) and value.strip() != ""
+
+
+def _is_script(value, max_length: int) -> bool:
+    return (
+        isinstance(value, list)
+        and len(value) > 0
+        and all(_is_text(line) and len(line) <= max_length for line in value)
+    )
+
+
+def validate_players(players, is_human_article: bool) -> list[dict] | None:
+    """
+    一括応答の players を detect_players / detect_topic と同じ形（2件）にそろえる。
+    1人目の名前が取れていなければ None。
+    """
+    if not isinstance(players, list) or not players:
+        return None
+    if not isinstance(players[0], dict) or not _is_text(players[0].get("name")):
+        return None
+    if players[0]["name"].strip() in EMPTY_PLAYER_NAMES:
+        return None
+
+    normalized = []
+    for player in players[:2]:
+        if not isinstance(player, dict):
+            player = {}
+        normalized.append(
+            {
+                "name": player.get("name"),
+                "team": player.get("team") if is_human_article else None,
+            }
+        )
+    while len(normalized) < 2:
+        normalized.append({"name": None, "team": None})
+    return normalized
+
+
+def validate_enrichment(
+    res: dict, needs_summary: bool, settings: dict
+) -> dict | None:
+    """
+    一括応答を検証し、enrich_article の戻り値の形にする。
+    タイトル・サムネ用テキスト・要約のどれかが不正なら None（個別の問い合わせに戻す）。
+    """
+    if not isinstance(res, dict):
+        return None
+    if not all(_is_text(res.get(key)) for key in ("title", "thumbtext", "thumbtext2")):
+        return None
+
+    max_length = settings.get("MAX_THREAD_LENGTH", 1000)
+    if needs_summary and not (
+        _is_script(res.get("article_script"), max_length)
+        and _is_script(res.get("comment_script"), max_length)
+    ):
+        return None
+
+    return {
+        "title": res["title"],
+        "thumbtext": res["thumbtext"],
+        "thumbtext2": res["thumbtext2"],
+        "threads": (
+            [*res["article_script"], *res["comment_script"]] if needs_summary else None
+        ),
+        "players": validate_players(res.get("players"), settings["IS_HUMAN_ARTICLE"]),
+    }
+
+
+def _article_for_prompt(threads, source: dict, settings: dict):
+    """
+    スレッド形式ならスレッド本文を PROMPT_BUDGETS["thread"] の予算で絞る。
+    記事本文（スレッド形式でない）はそのまま渡す。
+    """
+    if source["is_thread"]:
+        return budget_comments(threads, settings, "thread")
+    return threads
+
+
+def enrich_fused(
+    title: str, threads, comments, source: dict, settings: dict, logger
+) -> dict | None:
+    """1回の問い合わせで作る。失敗・検証エラーなら None。"""
+    needs_summary = not source["is_thread"]
+    prefix, prompt = build_enrichment_prompt_parts(
+        title=title,
+        article=_article_for_prompt(threads, source, settings),
+        comments=(
+            select_comments(comments, settings["PROMPT_BUDGETS"]["enrich"])
+            if needs_summary
+            else None
+        ),
+        source=source,
+        is_human_article=settings["IS_HUMAN_ARTICLE"],
+    )
+    try:
+        res = call_gemini(
+            prompt=prompt,
+            prefix=prefix,
+            settings=settings,
+            logger=logger,
+            step="enrich",
+            schema=ENRICHMENT_SCHEMA,
+            temperature=0.5,
+            max_output_tokens=settings["FUSED_ENRICHMENT_MAX_TOKENS"],
+        )
+    except GeminiCallError as e:
+        # 通信できない状態なら個別に問い合わせても失敗するので、そのまま呼び出し側に返す
+        if e.kind in ("network", "deadline"):
+            raise
+        logger.warning(f"一括での記事情報の作成に失敗しました。error:{e}")
+        return None
+
+    result = validate_enrichment(res, needs_summary, settings)
+    if result is None:
+        logger.warning("一括での記事情報の応答が検証を通りませんでした。")
+        return None
+
+    if result["threads"] is None:
+        result["threads"] = threads
+    if result["players"] is None:
+        logger.info("一括応答から人物が取れなかったため、サムネイル生成時に個別に検出します。")
+    return result
+
+
+def submit_title(title: str, threads, source: dict, settings: dict, logger) -> Future:
+    """タイトル・サムネ用テキストの問い合わせを投げる（コメントは使わない）。"""
+    title_prefix, title_prompt = build_title_prompt_parts(
+        title, _article_for_prompt(threads, source, settings)
+    )
+    return submit_gemini(
+        title_prompt,
+        settings,
+        logger,
+        prefix=title_prefix,
+        schema=TITLE_SCHEMA,
+        temperature=0.5,
+        step="title",
+    )
+
+
+def summarize_threads(
+    title: str, threads, comments, source: dict, settings: dict, logger
+):
+    """
+    指示書の threads を返す。スレッド形式ならそのまま、
+    そうでなければ本文の要約 + コメントの要約（2つは submit_gemini で並行に問い合わせる）。
+    """
+    if source["is_thread"]:
+        return threads
+
+    logger.info(
+        f"=== スレッド形式でない記事のため本文とコメントを要約  {title[:20]}... ==="
+    )
+    article_prompt = build_summarize_article_prompt(
+        article=threads,
+        title=title,
+        source=source,
+    )
+    # 本文を要約
+    article_future = submit_gemini(
+        prompt=article_prompt,
+        settings=settings,
+        logger=logger,
+        step="summarize_article",
+        schema=SCRIPT_SCHEMA,
+        temperature=0.5,
+    )
+
+    comments_prefix, comments_prompt = build_summarize_comments_prompt_parts(
+        comments=select_comments(
+            comments, settings["PROMPT_BUDGETS"]["summarize_comments"]
+        ),
+        source=source,
+        title=title,
+    )
+    # コメントを要約
+    comment_future = submit_gemini(
+        prompt=comments_prompt,
+        prefix=comments_prefix,
+        settings=settings,
+        logger=logger,
+        step="summarize_comments",
+        schema=SCRIPT_SCHEMA,
+        temperature=0.5,
+    )
+    # 本文の要約のあとにコメントの要約を続けて threads にする
+    return [
+        *article_future.result()["script"],
+        *comment_future.result()["script"],
+    ]
+
+
+def merge_separate_results(title_result: dict, threads) -> dict:
+    """submit_title と summarize_threads の結果を enrich_article の戻り値の形にする。"""
+    return {
+        "title": title_result.get("title"),
+        "thumbtext": title_result.get("thumbtext"),
+        "thumbtext2": title_result.get("thumbtext2"),
+        "threads": threads,
+        "players": None,
+    }
+
+
+def enrich_separately(
+    title: str, threads, comments, source: dict, settings: dict, logger
+) -> dict:
+    """
+    タイトル・本文要約・コメント要約を個別に問い合わせる（従来の処理）。
+    3つは互いに依存しないので、submit_gemini でまとめて投げて並行に待つ。
+    パイプラインではタイトルをコメントの取得と並行に作るため、
+    submit_title / summarize_threads を別々のタスクで呼ぶ。
+    """
+    title_future = submit_title(title, threads, source, settings, logger)
+    threads = summarize_threads(title, threads, comments, source, settings, logger)
+    return merge_separate_results(title_future.result(), threads)
+
+
+def enrich_article(
+    title: str, threads, comments, source: dict, settings: dict, logger
+) -> dict:
+    """
+    指示書用の情報を作り、
+    {"title", "thumbtext", "thumbtext2", "threads", "players"} を返す。
+
+    threads はスレッド形式ならそのまま、そうでなければ本文の要約 + コメントの要約。
+    players は make_thumbnail に渡す人物（None なら make_thumbnail が検出する）。
+    """
+    if settings["FUSED_ENRICHMENT"]:
+        result = enrich_fused(title, threads, comments, source, settings, logger)
+        if result is not None:
+            return result
+        logger.info("個別のプロンプトで記事情報を作り直します。")
+
+    return enrich_separately(title, threads, comments, source, settings, logger)
@@ -0,0 +1,249 @@
+# common/pipeline/judge.py
+"""
+記事がチャンネルのターゲットジャンルかの判定（Gemini）。
+
+- judge_target_channels: 1記事を判定する
+- judge_target_batch: 複数記事をトークン予算に収まる単位でまとめて1回で判定する
+
+どちらも記事インデックスに登録された全チャンネル分を判定し、
+結果は article_index に保存する（各チャンネルは get_verdict で読む）。
+判定は前段のローカル分類器（classifier/prefilter.py）の教師データとしても記録する。
+"""
+
+from src.common.gemini.client import call_gemini, submit_gemini
+from src.common.gemini.governor import estimate_tokens
+from src.common.gemini.prompt_budget import budget_comments, select_comments
+from src.common.gemini.build_prompt import (
+    judge_target_prompt,
+    judge_multi_target_prompt,
+    judge_batch_target_prompt,
+)
+from src.common.classifier.prefilter import record_examples
+from src.common.pipeline.article_index import (
+    get_registered_channels,
+    put_verdicts,
+    build_verdict_schema,
+)
+
+# 判定1件（url, channel, is_target, reason）の出力トークン数の見積もり
+OUTPUT_TOKENS_PER_VERDICT = 80
+# まとめて判定するときの出力トークン数の上限
+MAX_BATCH_OUTPUT_TOKENS = 8192
+
+
+def _target_channels(settings: dict) -> dict[str, str]:
+    """判定対象のチャンネル {channel: ジャンル名}（自チャンネルは必ず含む）。"""
+    channels = get_registered_channels()
+    channels[settings["CHANNEL_NAME"]] = settings["GENRE"]
+    return channels
+
+
+def judge_target_channels(
+    article_url: str, simple_info: dict, settings: dict, logger
+) -> dict:
+    """
+    記事がチャンネルのターゲットジャンルかを Gemini で判定し、
+    {"is_target": bool, "reason": str} を返す。
+
+    記事インデックスに登録された他のチャンネルがあれば、1回の問い合わせで
+    全チャンネル分を判定してインデックスに保存する（他のチャンネルはそれを読む）。
+    """
+    channel = settings["CHANNEL_NAME"]
+    channels = _target_channels(settings)
+
+    if len(channels) == 1:
+        is_target_prompt = judge_target_prompt(
+            title=simple_info["title"],
+            comments=budget_comments(simple_info["comments"], settings, "judge"),
+            genre=simple_info["genre"],
+            settings=settings,
+        )
+        temp_res = call_gemini(
+            prompt=is_target_prompt,
+            settings=settings,
+            logger=logger,
+            step="judge",
+            schema={
+                "type": "object",
+                "properties": {
+                    f"is_{settings['IS_TARGET_GENRE_WORD']}_article": {
+                        "type": "boolean"
+                    },
+                    "reason": {"type": "string"},
+                },
+                "required": [
+                    f"is_{settings['IS_TARGET_GENRE_WORD']}_article",
+                    "reason",
+                ],
+            },
+        )
+        verdicts = {
+            channel: {
+                "is_target": temp_res.get(
+                    f"is_{settings['IS_TARGET_GENRE_WORD']}_article", False
+                ),
+                "reason": temp_res.get("reason", ""),
+            }
+        }
+    else:
+        is_target_prompt = judge_multi_target_prompt(
+            title=simple_info["title"],
+            comments=budget_comments(simple_info["comments"], settings, "judge"),
+            genre=simple_info["genre"],
+            channels=channels,
+        )
+        temp_res = call_gemini(
+            prompt=is_target_prompt,
+            settings=settings,
+            logger=logger,
+            step="judge",
+            schema=build_verdict_schema(list(channels)),
+        )
+        verdicts = {
+            name: verdict
+            for name, verdict in temp_res.items()
+            if name in channels and isinstance(verdict, dict)
+        }
+
+    put_verdicts(article_url, verdicts, settings)
+    record_examples(article_url, simple_info, verdicts, settings)
+    return verdicts.get(channel, {"is_target": False, "reason": ""})
+
+
+def comments_for_judge(comments, max_chars: int) -> str:
+    """判定用に max_chars 文字に収まる代表的なコメントを選び、1つの文字列にする。"""
+    return "\n".join(select_comments(comments, max_chars))
+
+
+def plan_judge_batches(
+    articles: list[tuple[str, dict]], settings: dict, num_channels: int
+) -> list[list[tuple[str, dict]]]:
+    """
+    (url, simple_info) のリストを、1回の問い合わせに収まる単位に分ける。
+
+    入力は settings["JUDGE_BATCH_TOKEN_BUDGET"]、
+    出力は MAX_BATCH_OUTPUT_TOKENS（判定1件 OUTPUT_TOKENS_PER_VERDICT の見積もり）、
+    件数は settings["JUDGE_BATCH_MAX_ARTICLES"] を超えないように詰める。
+    """
+    token_budget = settings["JUDGE_BATCH_TOKEN_BUDGET"]
+    max_articles = settings["JUDGE_BATCH_MAX_ARTICLES"]
+    max_by_output = max(
+        1, MAX_BATCH_OUTPUT_TOKENS // (OUTPUT_TOKENS_PER_VERDICT * num_channels)
+    )
+
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for url, simple_info in articles:
+        tokens = estimate_tokens(
+            url
+            + str(simple_info["title"])
+            + str(simple_info["genre"])
+            + comments_for_judge(
+                simple_info["comments"], settings["JUDGE_BATCH_COMMENT_CHARS"]
+            )
+        )
+        if batch and (
+            batch_tokens + tokens > token_budget
+            or len(batch) >= min(max_articles, max_by_output)
+        ):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append((url, simple_info))
+        batch_tokens += tokens
+
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def build_batch_verdict_schema(urls: list[str], channels: list[str]) -> dict:
+    """judge_batch_target_prompt の出力スキーマ（url × channel ごとの判定の配列）。"""
+    return {
+        "type": "object",
+        "properties": {
+            "verdicts": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "url": {"type": "string", "enum": urls},
+                        "channel": {"type": "string", "enum": channels},
+                        "is_target": {"type": "boolean"},
+                        "reason": {"type": "string"},
+                    },
+                    "required": ["url", "channel", "is_target", "reason"],
+                },
+            }
+        },
+        "required": ["verdicts"],
+    }
+
+
+def judge_target_batch(
+    articles: list[tuple[str, dict]], settings: dict, logger
+) -> None:
+    """
+    複数記事 (url, simple_info) をまとめて判定し、結果を記事インデックスに保存する。
+
+    バッチは submit_gemini で並列に問い合わせる（同時実行数・RPM/TPM は governor が制御）。
+    問い合わせに失敗したバッチや、応答に含まれなかった記事は何も保存しない
+    （呼び出し側で get_verdict が None になり、judge_target_channels で1件ずつ判定する）。
+    """
+    channels = _target_channels(settings)
+    comment_chars = settings["JUDGE_BATCH_COMMENT_CHARS"]
+
+    futures = []
+    for batch in plan_judge_batches(articles, settings, len(channels)):
+        urls = [url for url, _ in batch]
+        prompt = judge_batch_target_prompt(
+            articles=[
+                {
+                    "url": url,
+                    "title": simple_info["title"],
+                    "genre": simple_info["genre"],
+                    "comments": comments_for_judge(
+                        simple_info["comments"], comment_chars
+                    ),
+                }
+                for url, simple_info in batch
+            ],
+            channels=channels,
+        )
+
+        future = submit_gemini(
+            prompt,
+            settings,
+            logger,
+            step="judge_batch",
+            schema=build_batch_verdict_schema(urls, list(channels)),
+            max_output_tokens=min(
+                MAX_BATCH_OUTPUT_TOKENS,
+                OUTPUT_TOKENS_PER_VERDICT * len(batch) * len(channels) + 256,
+            ),
+        )
+        futures.append((batch, urls, future))
+
+    for batch, urls, future in futures:
+        try:
+            res = future.result()
+        except Exception as e:
+            logger.warning(
+                f"まとめてのジャンル判定に失敗したため1件ずつ判定します。件数:{len(batch)} error:{e}"
+            )
+            continue
+
+        verdicts_by_url = {}
+        for verdict in res.get("verdicts", []):
+            if verdict.get("url") in urls and verdict.get("channel") in channels:
+                verdicts_by_url.setdefault(verdict["url"], {})[verdict["channel"]] = verdict
+
+        simple_infos = dict(batch)
+        for url, verdicts in verdicts_by_url.items():
+            put_verdicts(url, verdicts, settings)
+            record_examples(url, simple_infos[url], verdicts, settings)
+
+        logger.info(
+            f"{len(batch)}件の記事をまとめてジャンル判定しました（応答 {len(verdicts_by_url)}件）"
+        )
@@ -0,0 +1,134 @@
+# common/pipeline/task_graph.py
+"""
+記事ごとの処理を、依存関係つきのタスクとして並行に実行する小さな実行器。
+
+    graph = TaskGraph(executor)
+    graph.add("detail", fetch_detail)
+    graph.add("comments", fetch_comments)
+    graph.add("upload_media", upload, deps=("detail",), resources=("drive",))
+    graph.add("enrich", enrich, deps=("detail", "comments"))
+    results = graph.run()  # {"detail": ..., "comments": ..., ...}
+
+- 各タスクは依存先の結果を、依存先の名前のキーワード引数で受け取る
+- 依存先がすべて終わったタスクから executor で実行するので、
+  1記事の所要時間は全タスクの合計ではなく、いちばん長い依存の連鎖の長さになる
+- resources に同じ名前を持つタスクは同時に実行しない
+  （スレッドセーフでない Drive クライアントを使うタスクなど。グラフをまたいで共有）
+  タスクの一部だけでリソースを使う場合は resources に入れず、
+  その部分だけを with resource_lock("drive"): で囲む
+- 依存先は先に add しておく必要がある（なので循環はできない）
+- どれかのタスクが例外を投げたら、まだ始まっていないタスクは実行せず、
+  実行中のタスクが終わるのを待ってから TaskError を投げる
+"""
+
+import threading
+from collections import defaultdict
+from concurrent.futures import Executor, FIRST_COMPLETED, wait
+from time import monotonic
+
+_lock = threading.Lock()
+_resource_locks = defaultdict(threading.Lock)
+
+
+class TaskError(Exception):
+    """
+    タスクの失敗。task は失敗したタスク名、error（と __cause__）は元の例外。
+    """
+
+    def __init__(self, task: str, error: Exception):
+        super().__init__(f"[{task}] {type(error).__name__}: {error}")
+        self.task = task
+        self.error = error
+
+
+def resource_lock(resource: str) -> threading.Lock:
+    """resources=(resource,) のタスクと共有するロック。"""
+    with _lock:
+        return _resource_locks[resource]
+
+
+class TaskGraph:
+    """依存関係つきのタスクの集まり。run() で1回だけ実行する。"""
+
+    def __init__(self, executor: Executor):
+        self.executor = executor
+        self.tasks = {}
+        # タスクごとの実行秒数（リソースの待ち時間を含む）
+        self.timings = {}
+
+    def add(
+        self,
+        name: str,
+        func,
+        deps: tuple[str, ...] = (),
+        resources: tuple[str, ...] = (),
+    ) -> None:
+        if name in self.tasks:
+            raise ValueError(f"タスク名が重複しています: {name}")
+        unknown = [dep for dep in deps if dep not in self.tasks]
+        if unknown:
+            raise ValueError(f"{name} の依存先が未登録です: {unknown}")
+        self.tasks[name] = {
+            "func": func,
+            "deps": tuple(deps),
+            "resources": tuple(sorted(set(resources))),
+        }
+
+    def _run_task(self, name: str, kwargs: dict):
+        task = self.tasks[name]
+        started = monotonic()
+        locks = [resource_lock(resource) for resource in task["resources"]]
+        # デッドロックしないよう、リソースは名前順に取る
+        for lock in locks:
+            lock.acquire()
+        try:
+            return task["func"](**kwargs)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+            self.timings[name] = monotonic() - started
+
+    def run(self) -> dict:
+        """
+        全タスクを実行し {タスク名: 結果} を返す。
+
+        Raises:
+            TaskError: いずれかのタスクが例外を投げた場合（最初に失敗したもの）
+        """
+        results = {}
+        pending = dict(self.tasks)
+        running = {}
+        error = None
+
+        while pending or running:
+            if error is None:
+                for name, task in list(pending.items()):
+                    if all(dep in results for dep in task["deps"]):
+                        del pending[name]
+                        kwargs = {dep: results[dep] for dep in task["deps"]}
+                        future = self.executor.submit(self._run_task, name, kwargs)
+                        running[future] = name
+            else:
+                pending.clear()
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    if error is None:
+                        error = TaskError(name, e)
+                        error.__cause__ = e
+
+        if error is not None:
+            raise error
+        return results
+
+    def format_timings(self) -> str:
+        """ログ用。終わった順に「タスク名=秒数」を並べる。"""
+        return ", ".join(
+            f"{name}={seconds:.1f}s" for name, seconds in self.timings.items()
+        )
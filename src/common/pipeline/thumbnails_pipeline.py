@@ -1,4 +1,5 @@
 import random
+from contextlib import nullcontext
 
 from src.common.thumbnail.detect_player import detect_players, detect_topic
 from src.common.thumbnail.preprocess import normalize_players, split_players
@@ -16,7 +17,20 @@ from src.common.utils.logger import get_logger
 # ---------------------------------------------------------
 # 5 サムネイルの生成
 # ---------------------------------------------------------
-def make_thumbnail(title, script_text, unique_id, settings, drive_service):
+def make_thumbnail(
+    title,
+    script_text,
+    unique_id,
+    settings,
+    drive_service,
+    players=None,
+    drive_lock=None,
+):
+    """
+    players: 検出済みの人物（記事情報の一括作成で得たもの）。
+    None ならここで detect_players / detect_topic を呼んで検出する。
+    drive_lock: Drive への保存の間だけ取るロック（Drive クライアントを他と共有する場合）。
+    """
     logger = get_logger(
         settings["CHANNEL_NAME"],
         channel=settings["CHANNEL_NAME"],
@@ -24,7 +38,9 @@ def make_thumbnail(title, script_text, unique_id, settings, drive_service):
     )
     print(settings["IS_HUMAN_ARTICLE"])
     # 1. 人物検出
-    if settings["IS_HUMAN_ARTICLE"]:
+    if players is not None:
+        result = players
+    elif settings["IS_HUMAN_ARTICLE"]:
         result = detect_players(title, script_text, settings)
     else:
         # 人物検出をスキップする場合、空の結果を返す
@@ -70,7 +86,8 @@ def make_thumbnail(title, script_text, unique_id, settings, drive_service):
     if is_complete:
         # 収集したサムネをドライブに保存
         thumb_file_name = settings["THUMBNAIL_FILENAME_FMT"].format(uid=unique_id)
-        upload_file_to_drive(drive_service, local_path, thumb_file_name, settings)
+        with drive_lock or nullcontext():
+            upload_file_to_drive(drive_service, local_path, thumb_file_name, settings)
 
         return is_complete, pattern, first
 
@@ -0,0 +1,119 @@
+# common/pipeline/watermark.py
+"""
+取得元（一覧ページ）ごとのクロール済み位置（ウォーターマーク）。
+
+一覧ページは新しい記事が上に並ぶので、前回までに見たURLに当たったら
+そこから下は既知とみなして打ち切り、新しい先頭部分だけを処理する。
+
+data/watermarks/<channel>.json に取得元URLごとに次の形で保存する。
+    {
+        "<source_url>": {
+            "seen": [...],     # 処理済みのURL（一覧での並び順＝新しい順）
+            "pending": [...],  # コメント数待ちなどで保留にしたURL（次回も再確認する）
+            "updated_at": 1700000000.0
+        }
+    }
+"""
+
+import json
+import os
+from pathlib import Path
+from time import time
+
+
+def _watermark_path(settings: dict) -> Path:
+    return Path(settings["WATERMARK_DIR"]) / f"{settings['CHANNEL_NAME']}.json"
+
+
+def _load_all(settings: dict) -> dict:
+    path = _watermark_path(settings)
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        # 初回や壊れたファイルは「何も見ていない」扱い（全件処理になるだけ）
+        return {}
+
+
+def load_watermark(source_url: str, settings: dict) -> dict:
+    """取得元のウォーターマークを返す。未保存なら seen / pending とも空。"""
+    watermark = _load_all(settings).get(source_url, {})
+    return {
+        "seen": watermark.get("seen", []),
+        "pending": watermark.get("pending", []),
+    }
+
+
+def select_new_articles(
+    article_urls: list[str], watermark: dict, stop_after_known: int
+) -> list[str]:
+    """
+    一覧ページのURLリスト（新しい順）から、まだ処理していないものを返す。
+
+    先頭から見ていき、既知のURLが stop_after_known 件続いたところで打ち切る
+    （上位に1件だけ既知の記事が差し込まれても止まらないようにするため）。
+    保留中のURLは一覧に残っている限り、位置に関係なく再確認の対象に含める。
+
+    Args:
+        article_urls (list[str]): 一覧ページから抽出したURL（ページ内の並び順）
+        watermark (dict): load_watermark() の戻り値
+        stop_after_known (int): 既知URLがこの件数続いたら打ち切る
+
+    Returns:
+        list[str]: 処理対象のURL（ページ内の並び順）
+    """
+    seen = set(watermark["seen"])
+    pending = set(watermark["pending"])
+
+    new_urls = []
+    known_run = 0
+    for url in article_urls:
+        if url in pending:
+            new_urls.append(url)
+            continue
+        if url in seen:
+            known_run += 1
+            if known_run >= stop_after_known:
+                break
+            continue
+        known_run = 0
+        new_urls.append(url)
+
+    # 打ち切った位置より下にある保留中のURL
+    selected = set(new_urls)
+    new_urls += [u for u in article_urls if u in pending and u not in selected]
+    return new_urls
+
+
+def save_watermark(
+    source_url: str,
+    seen_urls: list[str],
+    pending_urls: list[str],
+    settings: dict,
+) -> None:
+    """
+    取得元の処理が終わった時点のウォーターマークを保存する。
+
+    seen_urls は今回処理を終えたURL（新しい順）。前回までの seen の前に足し、
+    settings["WATERMARK_SIZE"] 件を超えた古いものは捨てる。
+    pending_urls は前回分を置き換える（一覧から消えたものは再確認しない）。
+    """
+    all_watermarks = _load_all(settings)
+    old_seen = all_watermarks.get(source_url, {}).get("seen", [])
+
+    seen = list(dict.fromkeys([*seen_urls, *old_seen]))
+    pending_set = set(pending_urls)
+    seen = [u for u in seen if u not in pending_set][: settings["WATERMARK_SIZE"]]
+
+    all_watermarks[source_url] = {
+        "seen": seen,
+        "pending": list(dict.fromkeys(pending_urls)),
+        "updated_at": time(),
+    }
+
+    path = _watermark_path(settings)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(
+        json.dumps(all_watermarks, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    os.replace(tmp_path, path)
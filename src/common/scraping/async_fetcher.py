@@ -0,0 +1,174 @@
+# common/scraping/async_fetcher.py
+"""
+asyncio 版の取得エンジン。
+
+fetcher.fetch_html と同じ (url, settings) の形で呼べる単発 API と、
+複数URLをまとめて並列に取る一括 API を持つ。
+
+- 通信は fetcher と同じ共有 Session（keep-alive・アダプタ層のリトライ）を
+  専用スレッドプールで実行する（requests はブロッキングのため）
+- ホスト単位のレート制限は rate_limiter のバケットを共有し、
+  トークン待ちはイベントループ上で行う（待機中にスレッドを占有しない）
+- 同時実行数は全体で settings["ASYNC_FETCH_CONCURRENCY"]、
+  同一ホストあたり settings["PREFETCH_PER_HOST"] まで
+
+同期コードからは gather_html() / gather_bytes() を呼ぶ。
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlparse
+
+from src.common.utils.logger import get_logger
+from src.common.scraping.fetcher import get_session, throttle_host, THROTTLE_STATUS
+from src.common.scraping.html_cache import get_cached_html, put_cached_html
+from src.common.scraping.rate_limiter import acquire_async
+from src.common.utils.retry import compute_backoff
+
+# 通信を実行するスレッド数（共有 Session のプールと同程度）
+EXECUTOR_WORKERS = 32
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=EXECUTOR_WORKERS, thread_name_prefix="async_fetch"
+            )
+    return _executor
+
+
+async def _request_async(url: str, settings: dict, headers: dict | None = None):
+    """
+    fetcher._request の asyncio 版。成功した Response か None を返す。
+    """
+    logger = get_logger(
+        settings["CHANNEL_NAME"],
+        channel=settings["CHANNEL_NAME"],
+        step="fetch_html",
+    )
+
+    TIMEOUT = settings["TIMEOUT"]
+    RETRIES = settings["RETRIES"]
+    session = get_session()
+    loop = asyncio.get_running_loop()
+    for attempt in range(1, RETRIES + 1):
+        await acquire_async(url)
+        try:
+            res = await loop.run_in_executor(
+                _get_executor(),
+                partial(session.get, url, headers=headers, timeout=TIMEOUT),
+            )
+
+            if res.status_code in THROTTLE_STATUS:
+                retry_after = throttle_host(res, url, attempt)
+                logger.warning(
+                    f"[FETCH THROTTLED:{attempt}/{RETRIES}] url={url}, "
+                    f"status={res.status_code}, wait={retry_after:.1f}s"
+                )
+                if attempt == RETRIES:
+                    return None
+                continue
+
+            res.raise_for_status()
+            return res
+
+        except Exception as e:
+            logger.error(f"[FETCH ERROR:{attempt}/{RETRIES}] url={url}, error={e}")
+
+            if attempt == RETRIES:
+                return None
+
+            await asyncio.sleep(compute_backoff(attempt))
+
+    return None
+
+
+async def fetch_html_async(url: str, settings: dict, cache_ttl: int = 0) -> str:
+    """
+    fetch_html の asyncio 版。
+
+    Returns:
+        str: HTML文字列（失敗時は空文字）
+    """
+    if cache_ttl > 0:
+        cached = get_cached_html(url, cache_ttl, settings)
+        if cached is not None:
+            return cached
+
+    res = await _request_async(url, settings)
+    if res is None:
+        return ""
+
+    html = res.text
+    if cache_ttl > 0 and html:
+        put_cached_html(url, html, settings)
+    return html
+
+
+async def fetch_bytes_async(url: str, settings: dict) -> bytes | None:
+    """fetcher.fetch_bytes の asyncio 版。失敗時は None。"""
+    res = await _request_async(url, settings)
+    if res is None:
+        return None
+    return res.content
+
+
+async def _gather(fetch, urls: list[str], settings: dict) -> dict:
+    """
+    urls をまとめて取得し {url: 結果} を返す（同じURLは1回だけ取得）。
+    全体・ホストごとの同時実行数をセマフォで制限する。
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+
+    total = asyncio.Semaphore(settings.get("ASYNC_FETCH_CONCURRENCY", 16))
+    host_semaphores = {
+        host: asyncio.Semaphore(settings.get("PREFETCH_PER_HOST", 4))
+        for host in {urlparse(url).netloc for url in urls}
+    }
+
+    async def _fetch(url: str):
+        async with total, host_semaphores[urlparse(url).netloc]:
+            return await fetch(url)
+
+    results = await asyncio.gather(*(_fetch(url) for url in urls))
+    return dict(zip(urls, results))
+
+
+async def fetch_html_batch(
+    urls: list[str], settings: dict, cache_ttl: int = 0
+) -> dict[str, str]:
+    """複数URLの HTML を並列に取得し {url: html} で返す。失敗したURLは空文字。"""
+    return await _gather(
+        partial(fetch_html_async, settings=settings, cache_ttl=cache_ttl),
+        urls,
+        settings,
+    )
+
+
+async def fetch_bytes_batch(urls: list[str], settings: dict) -> dict[str, bytes | None]:
+    """複数URLのバイナリを並列に取得し {url: bytes} で返す。失敗したURLは None。"""
+    return await _gather(
+        partial(fetch_bytes_async, settings=settings),
+        urls,
+        settings,
+    )
+
+
+def gather_html(urls: list[str], settings: dict, cache_ttl: int = 0) -> dict[str, str]:
+    """同期コードから fetch_html_batch を実行する。"""
+    return asyncio.run(fetch_html_batch(urls, settings, cache_ttl=cache_ttl))
+
+
+def gather_bytes(urls: list[str], settings: dict) -> dict[str, bytes | None]:
+    """同期コードから fetch_bytes_batch を実行する。"""
+    return asyncio.run(fetch_bytes_batch(urls, settings))
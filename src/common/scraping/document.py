@@ -0,0 +1,93 @@
+# common/scraping/document.py
+
+from bs4 import BeautifulSoup
+import lxml.html
+from lxml.etree import ParserError
+
+
+class HtmlDocument:
+    """
+    1記事分の HTML と、そのパース結果をまとめて持ち回るための入れ物。
+
+    パースは初めて tree（lxml）/ soup（BeautifulSoup）を参照したときに1回だけ行い、
+    以降はシンプル情報の抽出・詳細情報の抽出で同じツリーを使い回す。
+    まとめサイト系パーサーはどちらも tree だけを使うので、soup は作られない。
+
+    Notes:
+        詳細情報の抽出（parse_thread_content）はツイート埋め込みなどを
+        ツリー（tree）から取り除くことがあるため、シンプル情報 → 詳細情報の順で使う。
+    """
+
+    def __init__(self, html: str):
+        self._html = html
+        self._soup = None
+        self._tree = None
+
+    @classmethod
+    def from_tree(cls, tree: "lxml.html.HtmlElement") -> "HtmlDocument":
+        """
+        パース済みのツリー（stream_parser で不要部分を捨てたもの）から作る。
+        html はそのツリーを文字列に戻したもので、参照されたときに初めて作る。
+        """
+        doc = cls(None)
+        doc._tree = tree
+        return doc
+
+    @property
+    def html(self) -> str:
+        if self._html is None:
+            self._html = lxml.html.tostring(self._tree, encoding="unicode")
+        return self._html
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.html, "lxml")
+        return self._soup
+
+    @property
+    def tree(self) -> "lxml.html.HtmlElement":
+        """lxml で直接パースしたルート要素（スレッド本文の高速抽出用）。"""
+        if self._tree is None:
+            self._tree = to_lxml(self.html)
+        return self._tree
+
+
+def to_soup(html: "str | HtmlDocument") -> BeautifulSoup:
+    """HTML文字列または HtmlDocument から BeautifulSoup を返す。"""
+    if isinstance(html, HtmlDocument):
+        return html.soup
+    return BeautifulSoup(html, "lxml")
+
+
+def to_lxml(html: "str | HtmlDocument") -> lxml.html.HtmlElement:
+    """
+    HTML文字列を lxml で直接パースしてルート要素を返す。
+
+    BeautifulSoup のツリーを作らずに済むため、一覧ページのリンク抽出のように
+    ごく一部の要素しか使わない処理の高速化に使う。
+    HtmlDocument を渡した場合は、そのドキュメントのツリーを返す。
+    """
+    if isinstance(html, HtmlDocument):
+        return html.tree
+
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # <?xml encoding=...?> 宣言付きの文字列は bytes にしないと読めない
+        return lxml.html.document_fromstring(html.encode("utf-8"))
+    except ParserError:
+        # 空文字など（BeautifulSoup と同じく「中身のない文書」として扱う）
+        return lxml.html.document_fromstring("<html></html>")
+
+
+def class_xpath(class_name: str) -> str:
+    """
+    BeautifulSoup の class_="..." と同じ判定をする XPath の条件式を返す。
+
+    - "a b" のように空白を含む場合: class 属性全体（空白を正規化）が一致
+    - 単一クラスの場合: class 属性に含まれるクラスのどれかが一致
+    """
+    if " " in class_name:
+        return f"normalize-space(@class)='{class_name}'"
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
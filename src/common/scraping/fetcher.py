@@ -1,10 +1,20 @@
 # common/scraping/fetcher.py
 
+import hashlib
+import threading
+from itertools import chain
+
 import requests
 from requests.adapters import HTTPAdapter, Retry
-from time import sleep
+from urllib3.util import make_headers
+from time import sleep, time
 
 from src.common.utils.logger import get_logger
+from src.common.scraping.html_cache import get_cached_html, put_cached_html
+from src.common.scraping.document import HtmlDocument
+from src.common.scraping.stream_parser import parse_html_stream, sniff_encoding
+from src.common.scraping.rate_limiter import acquire, block_host
+from src.common.utils.retry import compute_backoff, parse_retry_after
 
 # ユーザーエージェント（将来差し替え可能）
 HEADERS = {
@@ -12,48 +22,311 @@ HEADERS = {
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
         "AppleWebKit/537.36 (KHTML, like Gecko) "
         "Chrome/122.0 Safari/537.36"
-    )
+    ),
+    # urllib3 が展開できる圧縮形式（gzip, deflate + br/zstd があれば追加）を申告する
+    "Accept-Encoding": make_headers(accept_encoding=True)["accept-encoding"],
+    "Connection": "keep-alive",
 }
 
+# コネクションプール設定
+# POOL_CONNECTIONS: 保持するホスト別プールの数（yahoo, livedoor, 画像CDN など）
+# POOL_MAXSIZE: 1ホストあたりに保持する keep-alive 接続数
+POOL_CONNECTIONS = 20
+POOL_MAXSIZE = 10
+
+# アダプタ層のリトライ（接続断・一時的な5xxをソケットレベルで吸収する）
+# 429 / 503 はレート制限と連動させるため _request 側で扱う
+ADAPTER_RETRY = Retry(
+    total=2,
+    connect=2,
+    read=2,
+    status=2,
+    backoff_factor=0.5,
+    status_forcelist=(500, 502, 504),
+    allowed_methods=frozenset(["GET", "HEAD"]),
+    raise_on_status=False,
+)
+
+# 「混んでいるので待て」を意味するステータス
+THROTTLE_STATUS = (429, 503)
+
+_session = None
+_session_lock = threading.Lock()
+
+# 一覧ページの条件付きGET用の検証値 {(channel, url): {...}}
+# _pending_validators は取得済み・処理未完了、_list_page_validators は処理完了済み
+_list_page_validators = {}
+_pending_validators = {}
+_validators_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    プロセス全体で共有する requests.Session を返す。
+
+    初回呼び出し時にだけ生成し、以降は同じ Session を使い回すことで
+    ホストごとのコネクションプール（keep-alive）を再利用する。
+    全チャンネル・全パーサー・メディアダウンロードがこの Session を通る。
+
+    Returns:
+        requests.Session: 共有セッション
+    """
+    global _session
+
+    if _session is not None:
+        return _session
+
+    with _session_lock:
+        # ロック待ちの間に別スレッドが生成済みの場合はそれを返す
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+
+            adapter = HTTPAdapter(
+                pool_connections=POOL_CONNECTIONS,
+                pool_maxsize=POOL_MAXSIZE,
+                max_retries=ADAPTER_RETRY,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+            _session = session
+
+    return _session
+
+
+def throttle_host(res: requests.Response, url: str, attempt: int) -> float:
+    """
+    429 / 503 を返したホストを Retry-After（なければ指数バックオフ）の間止め、
+    その秒数を返す。
+    """
+    retry_after = parse_retry_after(res.headers.get("Retry-After"))
+    if retry_after is None:
+        retry_after = compute_backoff(attempt)
+    block_host(url, retry_after)
+    return retry_after
+
+
+def _request(
+    url: str, settings: dict, headers: dict | None = None, stream: bool = False
+):
+    """
+    共有セッションで GET し、成功した Response を返す (retry 付き)。
 
-def fetch_html(url: str, settings: dict) -> str:
+    リクエストの前にホスト単位のレート制限（rate_limiter）を通す。
+    429 / 503 の場合は Retry-After（なければ指数バックオフ）の間
+    そのホストへのリクエストを全スレッドで止めてから再試行する。
 
+    Returns:
+        requests.Response | None: 最終リトライまで失敗した場合は None
+    """
     logger = get_logger(
         settings["CHANNEL_NAME"],
         channel=settings["CHANNEL_NAME"],
         step="fetch_html",
     )
+
+    TIMEOUT = settings["TIMEOUT"]
+    RETRIES = settings["RETRIES"]
+    session = get_session()
+    for attempt in range(1, RETRIES + 1):
+        acquire(url)
+        try:
+            res = session.get(url, headers=headers, timeout=TIMEOUT, stream=stream)
+
+            if res.status_code in THROTTLE_STATUS:
+                retry_after = throttle_host(res, url, attempt)
+                logger.warning(
+                    f"[FETCH THROTTLED:{attempt}/{RETRIES}] url={url}, "
+                    f"status={res.status_code}, wait={retry_after:.1f}s"
+                )
+                # 待ち時間は次の acquire() で消化される
+                if attempt == RETRIES:
+                    return None
+                continue
+
+            res.raise_for_status()
+            return res
+
+        except Exception as e:
+            logger.error(f"[FETCH ERROR:{attempt}/{RETRIES}] url={url}, error={e}")
+
+            # 最終リトライも失敗したら終了
+            if attempt == RETRIES:
+                return None
+
+            # 少し待って再試行（指数バックオフ + ジッター）
+            sleep(compute_backoff(attempt))
+
+    return None
+
+
+def fetch_html(url: str, settings: dict, cache_ttl: int = 0) -> str:
     """
-    HTML を取得する (requests + retry)
+    HTML を取得する (共有セッション + retry)
 
     Parameters
     ----------
     url : str
         取得先URL
-    timeout : int
-        タイムアウト秒
+    settings : dict
+        "TIMEOUT", "RETRIES", "CHANNEL_NAME" を参照する
+    cache_ttl : int
+        0 より大きければディスクキャッシュ（html_cache）を使う。
+        この秒数以内に保存されたものがあればネットワークに出ない。
 
     Returns
     -------
     str
         HTML文字列（失敗時は空文字）
     """
-    TIMEOUT = settings["TIMEOUT"]
-    RETRIES = settings["RETRIES"]
-    for attempt in range(1, RETRIES + 1):
-        try:
-            res = requests.get(url, timeout=TIMEOUT)
-            res.raise_for_status()
-            return res.text
+    if cache_ttl > 0:
+        cached = get_cached_html(url, cache_ttl, settings)
+        if cached is not None:
+            return cached
 
-        except Exception as e:
-            logger.error(f"[FETCH ERROR:{attempt}/{RETRIES}] url={url}, error={e}")
+    res = _request(url, settings)
+    if res is None:
+        return ""
 
-            # 最終リトライも失敗したら終了
-            if attempt == RETRIES:
-                return ""
+    html = res.text
+    if cache_ttl > 0 and html:
+        put_cached_html(url, html, settings)
+    return html
+
+
+def fetch_document(
+    url: str,
+    settings: dict,
+    keep: list[tuple] | None = None,
+    max_bytes: int | None = None,
+    cache_ttl: int = 0,
+) -> HtmlDocument:
+    """
+    HTML を受信しながらパースし、HtmlDocument で返す（stream_parse 用）。
+
+    本文は max_bytes（省略時 settings["MAX_HTML_BYTES"]）で打ち切る。
+    keep（パーサーの STREAM_KEEP）を渡すと、それ以外の部分木は読みながら捨てる。
+    キャッシュにあればそれを使い、ストリーム取得した結果はキャッシュしない
+    （不要部分を捨てた HTML は他のパーサーから使えないため）。
+
+    Returns:
+        HtmlDocument: 失敗時は空文字の HtmlDocument
+    """
+    if cache_ttl > 0:
+        cached = get_cached_html(url, cache_ttl, settings)
+        if cached is not None:
+            return HtmlDocument(cached)
+
+    if max_bytes is None:
+        max_bytes = settings["MAX_HTML_BYTES"]
+
+    res = _request(url, settings, stream=True)
+    if res is None:
+        return HtmlDocument("")
+
+    logger = get_logger(
+        settings["CHANNEL_NAME"],
+        channel=settings["CHANNEL_NAME"],
+        step="fetch_html",
+    )
+
+    try:
+        chunks = res.iter_content(chunk_size=64 * 1024)
+        first_chunk = next(chunks, b"")
+        encoding = sniff_encoding(res.headers.get("Content-Type"), first_chunk)
+        tree, truncated = parse_html_stream(
+            chain([first_chunk], chunks), keep, max_bytes, encoding
+        )
+    except Exception as e:
+        logger.error(f"[FETCH ERROR:stream] url={url}, error={e}")
+        return HtmlDocument("")
+    finally:
+        res.close()
+
+    if truncated:
+        logger.warning(f"[FETCH TRUNCATED] url={url}, max_bytes={max_bytes}")
+
+    return HtmlDocument.from_tree(tree)
 
-            # 少し待って再試行（指数バックオフも可能）
-            sleep(1)
 
-    return ""
+def fetch_bytes(url: str, settings: dict) -> bytes | None:
+    """
+    画像・GIF などのバイナリを取得する（fetch_html と同じレート制限・retry）。
+
+    Returns:
+        bytes | None: 失敗時は None
+    """
+    res = _request(url, settings)
+    if res is None:
+        return None
+    return res.content
+
+
+def fetch_list_page(url: str, settings: dict) -> str | None:
+    """
+    取得元のトップページ（記事一覧）を条件付きGETで取得する。
+
+    前回処理を終えたときの ETag / Last-Modified を送り、
+    304 が返るか本文のハッシュが前回と同じなら「変更なし」として None を返す。
+    検証値はチャンネル × URL ごとに保持する（同じ一覧を複数チャンネルが巡回するため）。
+
+    取得した検証値は mark_list_page_processed() が呼ばれるまで確定しない。
+    途中で落ちた場合は次回も一覧を取り直すので、記事の取りこぼしは起きない。
+    また settings["LIST_PAGE_RECHECK_SEC"] 秒を超えて変更なしが続いた場合は
+    コメント数待ちの記事を拾い直すため、条件を付けずに取り直す。
+
+    Returns:
+        str | None:
+            変更があれば HTML文字列（取得失敗時は空文字）、変更がなければ None
+    """
+    key = (settings["CHANNEL_NAME"], url)
+    now = time()
+
+    with _validators_lock:
+        committed = _list_page_validators.get(key)
+
+    is_forced = (
+        committed is None
+        or now - committed["committed_at"] > settings.get("LIST_PAGE_RECHECK_SEC", 900)
+    )
+
+    headers = {}
+    if not is_forced:
+        if committed["etag"]:
+            headers["If-None-Match"] = committed["etag"]
+        if committed["last_modified"]:
+            headers["If-Modified-Since"] = committed["last_modified"]
+
+    res = _request(url, settings, headers=headers)
+    if res is None:
+        return ""
+
+    if res.status_code == 304:
+        return None
+
+    body_hash = hashlib.sha256(res.content).hexdigest()
+    if not is_forced and body_hash == committed["hash"]:
+        return None
+
+    with _validators_lock:
+        _pending_validators[key] = {
+            "etag": res.headers.get("ETag"),
+            "last_modified": res.headers.get("Last-Modified"),
+            "hash": body_hash,
+        }
+
+    return res.text
+
+
+def mark_list_page_processed(url: str, settings: dict) -> None:
+    """
+    fetch_list_page() で取得した一覧ページの処理が最後まで終わったことを記録する。
+    以降の fetch_list_page() はこのときの検証値で「変更なし」を判定する。
+    """
+    key = (settings["CHANNEL_NAME"], url)
+    with _validators_lock:
+        pending = _pending_validators.pop(key, None)
+        if pending is None:
+            return
+        _list_page_validators[key] = {**pending, "committed_at": time()}
@@ -0,0 +1,157 @@
+# common/scraping/html_cache.py
+"""
+チャンネル間で共有するディスク上の HTML キャッシュ。
+
+- キーは正規化したURLの SHA-256（data/http_cache/ab/abcdef....html.gz）
+- 本文は gzip 圧縮して保存
+- 有効期限（TTL）は呼び出し側が取得元ごとに指定する
+- 合計サイズが上限を超えたら最終アクセスが古いものから削除（LRU）
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from pathlib import Path
+from time import time
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+_lock = threading.Lock()
+_stats = {"hit": 0, "miss": 0, "store": 0, "evict": 0}
+
+# キャッシュディレクトリごとの合計サイズ（初回アクセス時に1度だけ走査して求める）
+_total_bytes = {}
+
+
+def normalize_cache_url(url: str) -> str:
+    """
+    キャッシュキー用にURLを正規化する。
+
+    スキーム・ホストの小文字化、既定ポートとフラグメントの除去、
+    クエリパラメータの並び替えを行う（クエリ自体は残す）。
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    if (scheme, netloc.rsplit(":", 1)[-1]) in (("http", "80"), ("https", "443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, netloc, parsed.path or "/", "", query, ""))
+
+
+def _cache_path(url: str, cache_dir: Path) -> Path:
+    digest = hashlib.sha256(normalize_cache_url(url).encode("utf-8")).hexdigest()
+    return Path(cache_dir) / digest[:2] / f"{digest}.html.gz"
+
+
+def _count(name: str) -> None:
+    with _lock:
+        _stats[name] += 1
+
+
+def get_cached_html(url: str, ttl: int, settings: dict) -> str | None:
+    """
+    TTL 秒以内に保存されたキャッシュがあれば HTML を返す。なければ None。
+    ヒットしたエントリは最終アクセス時刻（LRU 用）を更新する。
+    """
+    path = _cache_path(url, settings["HTTP_CACHE_DIR"])
+
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        _count("miss")
+        return None
+
+    # mtime = 保存時刻、atime = 最終アクセス時刻として使う
+    if time() - stat.st_mtime > ttl:
+        _count("miss")
+        return None
+
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            html = f.read()
+        os.utime(path, (time(), stat.st_mtime))
+    except (OSError, EOFError):
+        # 書き込み途中や壊れたファイルはミス扱い
+        _count("miss")
+        return None
+
+    _count("hit")
+    return html
+
+
+def put_cached_html(url: str, html: str, settings: dict) -> None:
+    """HTML を圧縮して保存し、上限を超えていれば古いものから削除する。"""
+    cache_dir = Path(settings["HTTP_CACHE_DIR"])
+    path = _cache_path(url, cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # 並列取得中に読まれても壊れないよう、一時ファイルに書いてから置き換える
+    tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+        f.write(html)
+
+    try:
+        old_size = path.stat().st_size
+    except FileNotFoundError:
+        old_size = 0
+    os.replace(tmp_path, path)
+    new_size = path.stat().st_size
+
+    _count("store")
+
+    with _lock:
+        key = str(cache_dir)
+        if key not in _total_bytes:
+            _total_bytes[key] = _scan_total_bytes(cache_dir)
+        else:
+            _total_bytes[key] += new_size - old_size
+
+        if _total_bytes[key] > settings["HTTP_CACHE_MAX_BYTES"]:
+            _evict(cache_dir, settings["HTTP_CACHE_MAX_BYTES"])
+
+
+def _scan_total_bytes(cache_dir: Path) -> int:
+    return sum(p.stat().st_size for p in cache_dir.glob("*/*.html.gz"))
+
+
+def _evict(cache_dir: Path, max_bytes: int) -> None:
+    """最終アクセスが古い順に、上限の8割まで削除する。_lock を取った状態で呼ぶ。"""
+    entries = []
+    for p in cache_dir.glob("*/*.html.gz"):
+        try:
+            stat = p.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_atime, stat.st_size, p))
+    entries.sort()
+
+    total = sum(size for _, size, _ in entries)
+    target = int(max_bytes * 0.8)
+    for _, size, p in entries:
+        if total <= target:
+            break
+        try:
+            p.unlink()
+        except FileNotFoundError:
+            pass
+        total -= size
+        _stats["evict"] += 1
+
+    _total_bytes[str(cache_dir)] = total
+
+
+def get_cache_stats() -> dict:
+    """プロセス起動からのヒット・ミス数などを返す。"""
+    with _lock:
+        return dict(_stats)
+
+
+def format_cache_stats() -> str:
+    stats = get_cache_stats()
+    lookups = stats["hit"] + stats["miss"]
+    hit_rate = stats["hit"] / lookups * 100 if lookups else 0.0
+    return (
+        f"hit={stats['hit']} miss={stats['miss']} ({hit_rate:.1f}%) "
+        f"store={stats['store']} evict={stats['evict']}"
+    )
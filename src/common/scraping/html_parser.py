@@ -1,14 +1,17 @@
-import importlib
 from typing import Any
 
 from src.common.utils.logger import get_logger
 from src.common.utils.text_utils import is_url
+from src.common.scraping.document import HtmlDocument
+from src.common.scraping.parsers.registry import get_parser
 
 
-def parse_article_list(html: str, parser_name: str) -> list[dict]:
+def parse_article_list(html: str, parser_name: str, fast: bool = False) -> list[dict]:
     """
     トップページから記事一覧を抽出する。
     サイト構造に依存するため、個別のパーサーを呼び出す。
+    fast=True かつパーサーに parse_articles_from_top_page_fast があれば、
+    BeautifulSoup を使わない高速版（結果は同じ）を使う。
 
     Returns
     -------
@@ -16,17 +19,30 @@ def parse_article_list(html: str, parser_name: str) -> list[dict]:
         [{"url": "...", "title": "..."}]
     """
 
-    module_path = f"src.common.scraping.parsers.sites.{parser_name}"
-    module = importlib.import_module(module_path)
-    article_urls = module.parse_articles_from_top_page(html)
+    module = get_parser(parser_name)
+    if fast and hasattr(module, "parse_articles_from_top_page_fast"):
+        article_urls = module.parse_articles_from_top_page_fast(html)
+    else:
+        article_urls = module.parse_articles_from_top_page(html)
 
     return article_urls
 
 
-def parse_article_simple_info(html: str, parser_name: str, logger) -> dict:
+def get_stream_keep(parser_name: str) -> list[tuple] | None:
+    """
+    stream_parse 時にツリーに残す要素の宣言（パーサーの STREAM_KEEP）を返す。
+    宣言のないパーサーは None（何も捨てず、サイズ上限だけ効かせる）。
+    """
+    return getattr(get_parser(parser_name), "STREAM_KEEP", None)
+
+
+def parse_article_simple_info(
+    html: str | HtmlDocument, parser_name: str, logger
+) -> dict:
     """
     記事詳細ページからタイトル、本文、コメント、ジャンルを抽出する。
     サイト構造に依存するため、個別のパーサーを呼び出す。
+    HtmlDocument を渡すと、parse_article_detail_info と同じパース結果を共有する。
 
     Returns
     -------
@@ -41,15 +57,18 @@ def parse_article_simple_info(html: str, parser_name: str, logger) -> dict:
         }
     """
 
-    module_path = f"src.common.scraping.parsers.sites.{parser_name}"
-    module = importlib.import_module(module_path)
+    module = get_parser(parser_name)
     article_info = module.extract_simple_info_from_html(html, logger)
 
     return article_info
 
 
 def parse_article_detail_info(
-    url: str, html: str, parser_name: str, settings: dict, drive_service
+    url: str,
+    html: str | HtmlDocument,
+    parser_name: str,
+    settings: dict,
+    drive_service,
 ) -> tuple[list[str], list[str]]:
     """
     指定URLの記事からスレッド本文と画像URLを抽出し、
@@ -65,8 +84,7 @@ def parse_article_detail_info(
             (threads, pictures)
     """
 
-    module_path = f"src.common.scraping.parsers.sites.{parser_name}"
-    module = importlib.import_module(module_path)
+    module = get_parser(parser_name)
     threads, pictures = module.extract_detail_info_from_html(
         url, html, settings, drive_service
     )
@@ -74,6 +92,24 @@ def parse_article_detail_info(
     return threads, pictures
 
 
+def parse_article_detail_and_media(
+    url: str,
+    html: str | HtmlDocument,
+    parser_name: str,
+    settings: dict,
+) -> tuple[list[str], list[str], list]:
+    """
+    parse_article_detail_info から Drive への保存を除いたもの。
+
+    Returns:
+        tuple[list[str], list[str], list]:
+            (threads, pictures, media_infos)
+            media_infos は呼び出し側で upload_multiple_files_to_drive に渡す
+    """
+    module = get_parser(parser_name)
+    return module.extract_detail_info_and_media(url, html, settings)
+
+
 def extract_media_url(raw_threads: list[str]) -> list[str]:
     "コメントとURLの混合のリストからURLだけを取り出す"
     media_urls = []
@@ -99,8 +135,7 @@ def parse_comments(
             (comments)
     """
 
-    module_path = f"src.common.scraping.parsers.sites.{parser_name}"
-    module = importlib.import_module(module_path)
+    module = get_parser(parser_name)
     comments = module.extract_comments(url, source, settings)
 
     return comments
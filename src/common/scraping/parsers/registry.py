@@ -0,0 +1,79 @@
+# common/scraping/parsers/registry.py
+"""
+サイト別パーサーモジュールの登録・検証。
+
+parser_name（ex. "yahoo_news"）から parsers/sites/<parser_name>.py を1度だけ import し、
+必要な関数が揃っているかを確認したうえでキャッシュする。
+"""
+
+import importlib
+import threading
+from types import ModuleType
+
+# すべてのパーサーが持つべき関数
+REQUIRED_FUNCTIONS = (
+    "parse_articles_from_top_page",
+    "extract_simple_info_from_html",
+    "extract_detail_info_from_html",
+    # パイプラインの detail タスクが使う（Drive への保存を除いた版）
+    "extract_detail_info_and_media",
+)
+
+# スレッド形式でない取得元（is_thread: false）のパーサーが追加で持つべき関数
+COMMENT_FUNCTIONS = ("extract_comments",)
+
+_parsers = {}
+_parsers_lock = threading.Lock()
+
+
+def get_parser(parser_name: str) -> ModuleType:
+    """
+    parser_name に対応するパーサーモジュールを返す。
+
+    初回だけ import と検証を行い、以降はキャッシュを返す。
+
+    Raises:
+        ValueError: モジュールが存在しない、または必要な関数が足りない場合
+    """
+    parser = _parsers.get(parser_name)
+    if parser is not None:
+        return parser
+
+    with _parsers_lock:
+        if parser_name not in _parsers:
+            module_path = f"src.common.scraping.parsers.sites.{parser_name}"
+            try:
+                module = importlib.import_module(module_path)
+            except ModuleNotFoundError as e:
+                raise ValueError(f"パーサーが見つかりません: {parser_name}") from e
+
+            missing = [f for f in REQUIRED_FUNCTIONS if not hasattr(module, f)]
+            if missing:
+                raise ValueError(
+                    f"パーサー {parser_name} に必要な関数がありません: {missing}"
+                )
+            _parsers[parser_name] = module
+
+    return _parsers[parser_name]
+
+
+def validate_parsers(settings: dict) -> None:
+    """
+    チャンネル設定の全取得元について、パーサーを読み込んで検証する。
+    起動時に呼び、設定ミスをループに入る前に検出する。
+
+    Raises:
+        ValueError: パーサーが存在しない、または必要な関数が足りない場合
+    """
+    for source in settings["SOURCE_URLS"]:
+        parser = get_parser(source["parser_name"])
+
+        if source.get("is_thread", True):
+            continue
+
+        missing = [f for f in COMMENT_FUNCTIONS if not hasattr(parser, f)]
+        if missing:
+            raise ValueError(
+                f"パーサー {source['parser_name']} はコメント取得関数がないため "
+                f"is_thread: false の取得元に使えません: {missing}"
+            )
@@ -8,11 +8,30 @@ from src.common.utils.list_utils import (
 )
 from src.common.utils.process_values import preprocess_raw_threads
 from src.common.scraping.html_parser import extract_media_url
+from src.common.scraping.document import (
+    HtmlDocument,
+    to_lxml,
+    class_xpath,
+)
+from src.common.scraping.parsers.thread_walker import (
+    iter_elements,
+    stripped_text,
+    element_text,
+    has_class,
+    element_media_url,
+)
 from common.pipeline.thread_builder import thread_builder
-from src.common.media.save_thread_images import save_media_from_url
+from src.common.media.save_thread_images import save_media_from_urls
 from src.common.google_drive.drive_uploader import upload_multiple_files_to_drive
 
 
+# スレッド本文から除外する画像URL（サムネイル・Twitter 埋め込み）
+EXCLUDED_URL_WORDS = ("-s", "twitter", "twimg")
+
+# stream_parse 時にツリーに残す要素（シンプル情報・スレッド本文で参照するもの）
+STREAM_KEEP = [("main", "main"), ("div", "t_b"), ("div", "entry-content cf")]
+
+
 def parse_articles_from_top_page(top_page_html: str) -> list[dict]:
     article_urls = []
     soup = BeautifulSoup(top_page_html, "lxml")
@@ -29,12 +48,30 @@ def parse_articles_from_top_page(top_page_html: str) -> list[dict]:
     return article_urls
 
 
-def extract_simple_info_from_html(html: str, logger) -> dict:
+def parse_articles_from_top_page_fast(top_page_html: str) -> list[dict]:
+    """
+    parse_articles_from_top_page と同じ結果を、BeautifulSoup を使わず
+    lxml の XPath だけで求める高速版。
+    """
+    article_urls = []
+    root = to_lxml(top_page_html)
+    main_elemnet = root.xpath("//main")[0]
+
+    for article_outer_element in main_elemnet.xpath(".//a"):
+        url = article_outer_element.attrib["href"]
+
+        if "page" not in url:
+            article_urls.append(url)
+
+    return article_urls
+
+
+def extract_simple_info_from_html(html: str | HtmlDocument, logger) -> dict:
     """
     HTML内からターゲットジャンルかを判断するための情報を抽出してdictで返す関数。
 
     Args:
-        html (str): 解析対象のHTML文字列。
+        html (str | HtmlDocument): 解析対象のHTML文字列（パース済みの HtmlDocument も可）。
 
     Returns:
     dict
@@ -48,22 +85,28 @@ def extract_simple_info_from_html(html: str, logger) -> dict:
 
         }
     """
-    soup = BeautifulSoup(html, "lxml")
+    root = to_lxml(html)
     article_info = []
     comments = []
 
     # [url,comments,title,Genre]のリストを作成
-    for article_outer_element in soup.find_all("main", class_="main"):
+    for article_outer_element in root.xpath(f"//main[{class_xpath('main')}]"):
 
         num_comments = 0
 
-        title = article_outer_element.find("h1", class_="entry-title").get_text()
+        title = element_text(
+            article_outer_element.xpath(f".//h1[{class_xpath('entry-title')}]")[0]
+        )
 
-        genre = article_outer_element.find("div", class_="breadcrumb-item").get_text()
+        genre = element_text(
+            article_outer_element.xpath(
+                f".//div[{class_xpath('breadcrumb-item')}]"
+            )[0]
+        )
 
         # コメントのリストを作成
-        for comment_b_element in soup.find_all("div", class_="t_b"):
-            comment = comment_b_element.get_text()
+        for comment_b_element in root.xpath(f"//div[{class_xpath('t_b')}]"):
+            comment = element_text(comment_b_element)
             comments.append(comment)
 
     article_info = {
@@ -76,7 +119,7 @@ def extract_simple_info_from_html(html: str, logger) -> dict:
     return article_info
 
 
-def parse_thread_content(url: str, html: str) -> list[str]:
+def parse_thread_content(url: str, html: str | HtmlDocument) -> list[str]:
     """
     HTML からスレッド本文のテキストおよび有効な画像URLを抽出する関数。
 
@@ -94,8 +137,8 @@ def parse_thread_content(url: str, html: str) -> list[str]:
     Args:
         url (str):
             HTML 内の相対URLを絶対URLに変換するための基準となるページURL。
-        html (str):
-            スレッドページの HTML ソース文字列。
+        html (str | HtmlDocument):
+            スレッドページの HTML ソース文字列（パース済みの HtmlDocument も可）。
 
     Returns:
         list[str]:
@@ -103,53 +146,36 @@ def parse_thread_content(url: str, html: str) -> list[str]:
             対象要素が存在しない場合は空リストを返す。
     """
     # -------------------------------------------
-    # BeautifulSoupで記事本文の要素を探索
+    # lxml のツリーを1パスで走査して記事本文の要素を探索
     # -------------------------------------------
-    soup = BeautifulSoup(html, "lxml")
-    container = soup.find("div", class_="entry-content cf")
+    root = to_lxml(html)
+    containers = root.xpath(f"//div[{class_xpath('entry-content cf')}]")
 
     combined = []  # テキストとURLを順番通りに格納
 
-    # TOP画像を取得
-
-    if container:
-        a = container.find_all(True, recursive=True)
-        for tag in container.find_all(True, recursive=True):
-
-            # --- 1. span / b タグのテキスト抽出 ---
-            try:
-                tag.get("class")
-            except:
-                continue
+    if containers:
+        for tag, _ in iter_elements(containers[0]):
 
-            if "t_b" in (tag.get("class") or []):
-                for child in tag.find_all(class_="twitter-tweet"):
-                    child.decompose()
+            # --- 1. t_b のテキスト抽出 ---
+            if has_class(tag, "t_b"):
+                # 埋め込みツイートは本文から取り除く（以降の走査対象からも外れる）
+                for child in tag.xpath(f".//*[{class_xpath('twitter-tweet')}]"):
+                    child.drop_tree()
 
-                text = tag.get_text(strip=True)
+                text = stripped_text(tag)
                 if text:
                     combined.append(text)
 
             # --- 2. 画像やリンクタグのURL抽出 ---
-            if tag.has_attr("src") or tag.has_attr("href"):
-                u = tag.get("src") or tag.get("href")
-                if u:
-                    u = urljoin(url, u)  # 相対URLを絶対URLへ変換
-
-                    # jpg/gif で終わり、不要なURLは除外
-                    if (
-                        re.search(r"\.(jpg|gif)(?:\?.*)?$", u, re.IGNORECASE)
-                        and "-s" not in u
-                        and "twitter" not in u
-                        and "twimg" not in u
-                    ):
-                        combined.append(u)
+            u = element_media_url(tag, url, EXCLUDED_URL_WORDS)
+            if u:
+                combined.append(u)
 
     return combined
 
 
 def extract_detail_info_from_html(
-    url: str, html: str, settings: dict, drive_service
+    url: str, html: str | HtmlDocument, settings: dict, drive_service
 ) -> tuple[list[str], list[str]]:
     """
     指定URLの記事からスレッド本文と画像URLを抽出し、
@@ -158,13 +184,38 @@ def extract_detail_info_from_html(
 
     Args:
         url (str): 記事URL
-        html (str): 記事html
+        html (str | HtmlDocument): 記事html
         settings(dict)
 
     Returns:
         tuple[list[str], list[str]]:
             (threads, pictures)
     """
+    threads, pictures, media_infos = extract_detail_info_and_media(url, html, settings)
+
+    # Driveへの保存
+    uploaded_results = upload_multiple_files_to_drive(
+        drive_service, media_infos, settings
+    )
+    # TODO
+    # uploaded_resultsをもとに失敗したときの処理を書く
+
+    return threads, pictures
+
+
+def extract_detail_info_and_media(
+    url: str, html: str | HtmlDocument, settings: dict
+) -> tuple[list[str], list[str], list]:
+    """
+    extract_detail_info_from_html から Drive への保存を除いたもの。
+    画像はローカルに保存するだけで、Drive への保存は呼び出し側で行う
+    （パイプラインでは要約などと並行して保存する）。
+
+    Returns:
+        tuple[list[str], list[str], list]:
+            (threads, pictures, media_infos)
+            media_infos は upload_multiple_files_to_drive に渡す保存済みファイルの情報
+    """
 
     # -------------------------------------------
     # 初期化
@@ -187,25 +238,15 @@ def extract_detail_info_from_html(
     # スレッドにある全画像の保存
     # -------------------------------------------
     media_urls = extract_media_url(raw_threads)
-    media_infos = []
-    for media_url in media_urls:
-        # ローカルへの保存
-        media_info = save_media_from_url(media_url, settings)
-        media_infos.append(media_info)
-
-    # Driveへの保存
-    uploaded_results = upload_multiple_files_to_drive(
-        drive_service, media_infos, settings
-    )
-    # TODO
-    # uploaded_resultsをもとに失敗したときの処理を書く
+    # ローカルへの保存（ダウンロードはまとめて並列に行う）
+    media_infos = save_media_from_urls(media_urls, settings)
 
     # -------------------------------------------
     # GIFの長さ情報を使う場合（空文字挿入処理）GIFがない媒体でも処理可能→その場合何も起こらない
     # -------------------------------------------
 
     # GIFの長さを確認してリストにまとめる
-    only_long_gif_urls = extract_only_long_gif_urls(media_url)
+    only_long_gif_urls = extract_only_long_gif_urls(media_urls, media_infos)
 
     # GIF情報をもとに処理
     raw_threads = process_raw_threads_from_long_gif_info(
@@ -216,4 +257,4 @@ def extract_detail_info_from_html(
     # テキストと画像を順に処理
     # -------------------------------------------
     threads, pictures = thread_builder(raw_threads)
-    return threads, pictures
+    return threads, pictures, media_infos
@@ -1,5 +1,7 @@
 from bs4 import BeautifulSoup
+import asyncio
 import re
+from collections import deque
 from urllib.parse import urljoin
 from os import path
 
@@ -9,12 +11,27 @@ from src.common.utils.list_utils import (
 )
 from src.common.utils.process_values import preprocess_raw_threads
 from src.common.scraping.html_parser import extract_media_url
+from src.common.scraping.document import (
+    HtmlDocument,
+    to_soup,
+    to_lxml,
+    class_xpath,
+)
 from common.pipeline.thread_builder import thread_builder
-from src.common.media.save_thread_images import save_media_from_url
+from src.common.media.save_thread_images import save_media_from_urls
 from src.common.google_drive.drive_uploader import upload_multiple_files_to_drive
-from src.common.scraping.fetcher import fetch_html
+from src.common.scraping.async_fetcher import fetch_html_async
+from src.common.scraping.parsers.thread_walker import stripped_text
 from src.common.utils.text_utils import normalize_url
 
+# コメント本文の <p> のクラス
+COMMENT_CLASS = "sc-169yn8p-10 hYFULX"
+
+# コメント取得の既定値（取得元ごとに source_urls の設定で上書きできる）
+COMMENT_MAX_PAGES = 3
+COMMENT_MAX_COUNT = 100
+COMMENT_MAX_CHARS = 6000
+
 
 def parse_articles_from_top_page(top_page_html: str) -> list[dict]:
     soup = BeautifulSoup(top_page_html, "lxml")
@@ -31,12 +48,31 @@ def parse_articles_from_top_page(top_page_html: str) -> list[dict]:
     return article_urls
 
 
-def extract_simple_info_from_html(html: str, logger) -> dict:
+def parse_articles_from_top_page_fast(top_page_html: str) -> list[dict]:
+    """
+    parse_articles_from_top_page と同じ結果を、BeautifulSoup を使わず
+    lxml の XPath だけで求める高速版。
+    """
+    root = to_lxml(top_page_html)
+
+    article_urls = []
+    for a in root.xpath("//a[@href]"):
+        href = a.get("href")
+        if "/articles/" in href and "pickup" not in href:
+            if href.startswith("http"):
+                article_urls.append(href)
+            else:
+                # 相対パスなら絶対URLに変換
+                article_urls.append("https://news.yahoo.co.jp" + href)
+    return article_urls
+
+
+def extract_simple_info_from_html(html: str | HtmlDocument, logger) -> dict:
     """
     HTML内からターゲットジャンルかを判断するための情報を抽出してdictで返す関数。
 
     Args:
-        html (str): 解析対象のHTML文字列。
+        html (str | HtmlDocument): 解析対象のHTML文字列（パース済みの HtmlDocument も可）。
 
     Returns:
     dict
@@ -50,7 +86,7 @@ def extract_simple_info_from_html(html: str, logger) -> dict:
 
         }
     """
-    soup = BeautifulSoup(html, "lxml")
+    soup = to_soup(html)
     article_info = []
     article_list = []
 
@@ -98,7 +134,7 @@ def extract_simple_info_from_html(html: str, logger) -> dict:
     return article_info
 
 
-def parse_thread_content(url: str, html: str) -> list[str]:
+def parse_thread_content(url: str, html: str | HtmlDocument) -> list[str]:
     """
     HTML からスレッド本文のテキストおよび有効な画像URLを抽出する関数。
 
@@ -108,8 +144,8 @@ def parse_thread_content(url: str, html: str) -> list[str]:
     Args:
         url (str):
             HTML 内の相対URLを絶対URLに変換するための基準となるページURL。
-        html (str):
-            スレッドページの HTML ソース文字列。
+        html (str | HtmlDocument):
+            スレッドページの HTML ソース文字列（パース済みの HtmlDocument も可）。
 
     Returns:
         list[str]:
@@ -119,7 +155,7 @@ def parse_thread_content(url: str, html: str) -> list[str]:
     # -------------------------------------------
     # BeautifulSoupで記事本文の要素を探索
     # -------------------------------------------
-    soup = BeautifulSoup(html, "lxml")
+    soup = to_soup(html)
 
     combined = []  # テキストとURLを順番通りに格納
 
@@ -135,7 +171,7 @@ def parse_thread_content(url: str, html: str) -> list[str]:
 
 
 def extract_detail_info_from_html(
-    url: str, html: str, settings: dict, drive_service
+    url: str, html: str | HtmlDocument, settings: dict, drive_service
 ) -> tuple[list[str], list[str]]:
     """
     指定URLの記事からスレッド本文と画像URLを抽出し、
@@ -144,13 +180,38 @@ def extract_detail_info_from_html(
 
     Args:
         url (str): 記事URL
-        html (str): 記事html
+        html (str | HtmlDocument): 記事html
         settings(dict)
 
     Returns:
         tuple[list[str], list[str]]:
             (threads, pictures)
     """
+    threads, pictures, media_infos = extract_detail_info_and_media(url, html, settings)
+
+    # Driveへの保存
+    uploaded_results = upload_multiple_files_to_drive(
+        drive_service, media_infos, settings
+    )
+    # TODO
+    # uploaded_resultsをもとに失敗したときの処理を書く
+
+    return threads, pictures
+
+
+def extract_detail_info_and_media(
+    url: str, html: str | HtmlDocument, settings: dict
+) -> tuple[list[str], list[str], list]:
+    """
+    extract_detail_info_from_html から Drive への保存を除いたもの。
+    画像はローカルに保存するだけで、Drive への保存は呼び出し側で行う
+    （パイプラインでは要約などと並行して保存する）。
+
+    Returns:
+        tuple[list[str], list[str], list]:
+            (threads, pictures, media_infos)
+            media_infos は upload_multiple_files_to_drive に渡す保存済みファイルの情報
+    """
 
     # -------------------------------------------
     # 初期化
@@ -173,25 +234,15 @@ def extract_detail_info_from_html(
     # スレッドにある全画像の保存
     # -------------------------------------------
     media_urls = extract_media_url(raw_threads)
-    media_infos = []
-    for media_url in media_urls:
-        # ローカルへの保存
-        media_info = save_media_from_url(media_url, settings)
-        media_infos.append(media_info)
-
-    # Driveへの保存
-    uploaded_results = upload_multiple_files_to_drive(
-        drive_service, media_infos, settings
-    )
-    # TODO
-    # uploaded_resultsをもとに失敗したときの処理を書く
+    # ローカルへの保存（ダウンロードはまとめて並列に行う）
+    media_infos = save_media_from_urls(media_urls, settings)
 
     # -------------------------------------------
     # GIFの長さ情報を使う場合（空文字挿入処理）GIFがない媒体でも処理可能→その場合何も起こらない
     # -------------------------------------------
 
     # GIFの長さを確認してリストにまとめる
-    only_long_gif_urls = extract_only_long_gif_urls(media_url)
+    only_long_gif_urls = extract_only_long_gif_urls(media_urls, media_infos)
 
     # GIF情報をもとに処理
     raw_threads = process_raw_threads_from_long_gif_info(
@@ -202,34 +253,111 @@ def extract_detail_info_from_html(
     # テキストと画像を順に処理
     # -------------------------------------------
     threads, pictures = thread_builder(raw_threads)
-    return threads, pictures
+    return threads, pictures, media_infos
+
+
+def parse_comment_page(html: str) -> list[str]:
+    """コメントページ1枚分の HTML からコメント本文を抜き出す。"""
+    if not html:
+        return []
+    tree = to_lxml(html)
+    return [
+        text
+        for p in tree.xpath(f"//p[{class_xpath(COMMENT_CLASS)}]")
+        if (text := stripped_text(p))
+    ]
 
 
 def extract_comments(
     url: str,
     source: dict,
     settings: dict,
-) -> str:
+) -> list[str]:
     """
-    指定URLの記事からコメント部分を抽出し、文字列で返す。
+    指定URLの記事のコメントページを複数枚並列に取得し、コメントのリストで返す。
+
+    取得するページ数は source["comment_max_pages"]。
+    ページ順に読み進め、コメント数（source["comment_max_count"]）か
+    合計文字数（source["comment_max_chars"]）の上限に達した時点で打ち切る。
+    先読みは PREFETCH_PER_HOST 枚までで、残りのページは取得しない。
 
     Args:
         url (str): 記事URL
+        source (dict): 取得元の設定
+        settings (dict)
 
     Returns:
-        str:
-            コメント部分のテキスト
+        list[str]:
+            コメント本文のリスト（ページ順）
     """
-
-    # url = path.join(url, source.get("comment_add_url_word",""))
-
-    detail_html = fetch_html(
-        url + f"/{source.get('comment_add_url_word','')}", settings
+    comment_url = url + f"/{source.get('comment_add_url_word','')}"
+    max_pages = max(1, source.get("comment_max_pages", COMMENT_MAX_PAGES))
+    max_count = source.get("comment_max_count", COMMENT_MAX_COUNT)
+    max_chars = source.get("comment_max_chars", COMMENT_MAX_CHARS)
+    cache_ttl = source.get("cache_ttl", settings["HTTP_CACHE_TTL"])
+
+    # 1ページ目はクエリなし、2ページ目以降は ?page=N
+    page_urls = [comment_url] + [
+        f"{comment_url}?page={page}" for page in range(2, max_pages + 1)
+    ]
+
+    return asyncio.run(
+        _collect_comments(page_urls, settings, cache_ttl, max_count, max_chars)
     )
-    comment_soup = BeautifulSoup(detail_html, "lxml")
-    extracted_comments_html = comment_soup.findAll("p", class_="sc-169yn8p-10 hYFULX")
-    comments = [tag.get_text(strip=True) for tag in extracted_comments_html]
-    # カンマ区切りの1つの文字列にまとめる
-    comments_text = ",".join(comments)
 
-    return comments_text
+
+async def _collect_comments(
+    page_urls: list[str],
+    settings: dict,
+    cache_ttl: int,
+    max_count: int,
+    max_chars: int,
+) -> list[str]:
+    """
+    コメントページを並列に取得しつつ、ページ順に上限までコメントを集める。
+
+    取得中のページは読み進める位置から先 PREFETCH_PER_HOST 枚までに限り、
+    1枚読むごとに次のページを1枚取得し始める。
+    上限に達した・空のページ（最終ページ越えか取得失敗）が来た時点で、
+    まだ始まっていない取得は取り消す。
+    すでに送信済みのリクエストは取り消せず最後まで実行されるが、
+    それは読み進めた位置から先の数枚だけで済む。
+    """
+    window = max(1, settings.get("PREFETCH_PER_HOST", 4))
+    pending = deque()
+    next_index = 0
+
+    def schedule() -> None:
+        nonlocal next_index
+        while next_index < len(page_urls) and len(pending) < window:
+            pending.append(
+                asyncio.create_task(
+                    fetch_html_async(
+                        page_urls[next_index], settings, cache_ttl=cache_ttl
+                    )
+                )
+            )
+            next_index += 1
+
+    comments = []
+    total_chars = 0
+    try:
+        schedule()
+        while pending:
+            page_comments = parse_comment_page(await pending.popleft())
+            # 空ページ = 最終ページを越えた（または取得に失敗した）
+            if not page_comments:
+                break
+            for comment in page_comments:
+                if len(comments) >= max_count or total_chars >= max_chars:
+                    break
+                comments.append(comment)
+                total_chars += len(comment)
+            if len(comments) >= max_count or total_chars >= max_chars:
+                break
+            schedule()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    return comments
@@ -9,6 +9,7 @@ from src.common.utils.list_utils import (
 )
 from src.common.utils.process_values import preprocess_raw_threads
 from src.common.scraping.html_parser import extract_media_url
+from src.common.scraping.document import HtmlDocument, to_lxml, class_xpath
 from common.pipeline.thread_builder import thread_builder
 from src.common.media.save_thread_images import save_media_from_url
 from src.common.google_drive.drive_uploader import upload_multiple_files_to_drive
@@ -18,6 +19,7 @@ from src.common.scraping.parsers.sites.yahoo_news import (
     extract_simple_info_from_html as yahoo_extract_simple_info,
     parse_thread_content as yahoo_parse_thread_content,
     extract_detail_info_from_html as yahoo_extract_detail_info,
+    extract_detail_info_and_media as yahoo_extract_detail_info_and_media,
     extract_comments as yahoo_extract_comments,
 )
 
@@ -38,7 +40,27 @@ def parse_articles_from_top_page(top_page_html: str) -> list[dict]:
     return article_urls
 
 
-def extract_simple_info_from_html(html: str, logger) -> dict:
+def parse_articles_from_top_page_fast(top_page_html: str) -> list[dict]:
+    """
+    parse_articles_from_top_page と同じ結果を、BeautifulSoup を使わず
+    lxml の XPath だけで求める高速版。
+    """
+    root = to_lxml(top_page_html)
+
+    article_urls = []
+    news_feed = root.xpath(f"//*[{class_xpath('newsFeed_list')}]")[0]
+    for a in news_feed.xpath(".//a[@href]"):
+        href = a.get("href")
+        if "/articles/" in href and "pickup" not in href:
+            if href.startswith("http"):
+                article_urls.append(href)
+            else:
+                # 相対パスなら絶対URLに変換
+                article_urls.append("https://news.yahoo.co.jp" + href)
+    return article_urls
+
+
+def extract_simple_info_from_html(html: str | HtmlDocument, logger) -> dict:
     """
     この関数は単にyahooニュースのextract_simple_info_from_htmlを呼んでいる
     parse_articles_from_top_pageの動きが違うためyahoo_news_with_queryとyahoo_newsを
@@ -51,7 +73,7 @@ def extract_simple_info_from_html(html: str, logger) -> dict:
     return article_info
 
 
-def parse_thread_content(url: str, html: str) -> list[str]:
+def parse_thread_content(url: str, html: str | HtmlDocument) -> list[str]:
     """
     この関数は単にyahooニュースのextract_simple_info_from_htmlを呼んでいる
     parse_articles_from_top_pageの動きが違うためyahoo_news_with_queryとyahoo_newsを
@@ -64,7 +86,7 @@ def parse_thread_content(url: str, html: str) -> list[str]:
 
 
 def extract_detail_info_from_html(
-    url: str, html: str, settings: dict, drive_service
+    url: str, html: str | HtmlDocument, settings: dict, drive_service
 ) -> tuple[list[str], list[str]]:
     """
     この関数は単にyahooニュースのextract_simple_info_from_htmlを呼んでいる
@@ -77,7 +99,17 @@ def extract_detail_info_from_html(
     return threads, pictures
 
 
-def extract_comments(url: str, source: dict, settings: dict) -> str:
+def extract_detail_info_and_media(
+    url: str, html: str | HtmlDocument, settings: dict
+) -> tuple[list[str], list[str], list]:
+    """
+    この関数は単にyahooニュースのextract_detail_info_and_mediaを呼んでいる
+    理由は extract_detail_info_from_html と同じ。
+    """
+    return yahoo_extract_detail_info_and_media(url, html, settings)
+
+
+def extract_comments(url: str, source: dict, settings: dict) -> list[str]:
     """
     この関数は単にyahooニュースのextract_simple_info_from_htmlを呼んでいる
     parse_articles_from_top_pageの動きが違うためyahoo_news_with_queryとyahoo_newsを
@@ -85,6 +117,6 @@ def extract_comments(url: str, source: dict, settings: dict) -> str:
     単に呼び出すにとどめている。
     もしここにyahoo_newsファイルと同じ関数を書くと保守が二倍になるのでやらない。
     """
-    comments_text = yahoo_extract_comments(url, source, settings)
+    comments = yahoo_extract_comments(url, source, settings)
 
-    return comments_text
+    return comments
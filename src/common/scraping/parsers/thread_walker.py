@@ -0,0 +1,122 @@
+# common/scraping/parsers/thread_walker.py
+"""
+まとめサイト系パーサー（5ch / nanjmatome / smasoku / basketballbbs）の
+parse_thread_content・extract_simple_info_from_html で使う、lxml ツリーの走査ユーティリティ。
+
+BeautifulSoup 版は container.find_all(True) の全要素について
+find_parent("dt") で祖先をたどっていたため O(要素数 × 深さ) になっていた。
+ここでは走査しながら「dt の中にいるか」を持ち回るので O(要素数) で済む。
+"""
+
+import re
+from urllib.parse import urljoin
+
+import lxml.html
+
+# 本文として扱わない要素（BeautifulSoup の get_text と同じ扱い）
+_NON_TEXT_TAGS = frozenset(["script", "style"])
+
+# 空白だけの文字列もそのまま残す要素と、BeautifulSoup が空白とみなす文字
+_PRESERVE_WHITESPACE_TAGS = frozenset(["pre", "textarea"])
+_ASCII_SPACES = " \n\t\f\r"
+
+# jpg/gif で終わるURL（クエリ付きも可）
+MEDIA_URL_PATTERN = re.compile(r"\.(jpg|gif)(?:\?.*)?$", re.IGNORECASE)
+
+
+def iter_elements(container: lxml.html.HtmlElement):
+    """
+    container の子孫要素を文書順（container 自身は含まない）に返すジェネレーター。
+
+    各要素について (element, in_dt) を返す。in_dt は祖先に <dt> があるかどうか。
+    コメントや処理命令は飛ばす。走査中に未訪問の子孫を drop_tree() で
+    取り除いた場合、その要素は返さない（BeautifulSoup の decompose と同じ）。
+    """
+    in_dt = any(True for _ in container.iterancestors("dt"))
+    stack = [(iter(container), in_dt)]
+
+    while stack:
+        children, in_dt = stack[-1]
+        element = next(children, None)
+        if element is None:
+            stack.pop()
+            continue
+
+        # コメント・処理命令は tag が文字列でない
+        if not isinstance(element.tag, str):
+            continue
+
+        yield element, in_dt
+        stack.append((iter(element), in_dt or element.tag == "dt"))
+
+
+def stripped_text(element: lxml.html.HtmlElement) -> str:
+    """
+    BeautifulSoup の tag.get_text(strip=True) と同じ文字列を返す。
+    （各テキストの前後空白を除き、空でないものを区切りなしで連結）
+    """
+    parts = []
+    _collect_text(element, parts, strip=True)
+    return "".join(parts)
+
+
+def element_text(element: lxml.html.HtmlElement) -> str:
+    """
+    BeautifulSoup の tag.get_text() と同じ文字列を返す。
+    （text_content と違い、script / style の中身は含めず、
+    空白だけの文字列は BeautifulSoup と同じく1文字にまとめる）
+    """
+    parts = []
+    _collect_text(element, parts, strip=False)
+    return "".join(parts)
+
+
+def _collect_text(element, parts: list[str], strip: bool, preserve=False) -> None:
+    preserve = preserve or element.tag in _PRESERVE_WHITESPACE_TAGS
+    if element.tag not in _NON_TEXT_TAGS and element.text:
+        text = _normalize(element.text, strip, preserve)
+        if text:
+            parts.append(text)
+
+    for child in element:
+        if isinstance(child.tag, str):
+            _collect_text(child, parts, strip, preserve)
+        # 子要素（コメント含む）の直後のテキストは element の本文
+        if child.tail:
+            tail = _normalize(child.tail, strip, preserve)
+            if tail:
+                parts.append(tail)
+
+
+def _normalize(text: str, strip: bool, preserve: bool) -> str:
+    if strip:
+        return text.strip()
+    # BeautifulSoup は pre / textarea の外の空白だけの文字列を "\n" か " " にする
+    if preserve or text.strip(_ASCII_SPACES):
+        return text
+    return "\n" if "\n" in text else " "
+
+
+def has_class(element: lxml.html.HtmlElement, class_name: str) -> bool:
+    """class 属性に class_name が含まれるか（BeautifulSoup の class_ と同じ判定）。"""
+    return class_name in (element.get("class") or "").split()
+
+
+def element_media_url(
+    element: lxml.html.HtmlElement, base_url: str, excluded_words: tuple[str, ...]
+) -> str | None:
+    """
+    要素の src（なければ href）を絶対URLにして返す。
+
+    jpg/gif 以外、または excluded_words のいずれかを含むURLは None。
+    """
+    u = element.get("src") or element.get("href")
+    if not u:
+        return None
+
+    u = urljoin(base_url, u)  # 相対URLを絶対URLへ変換
+    if not MEDIA_URL_PATTERN.search(u):
+        return None
+    if any(word in u for word in excluded_words):
+        return None
+    return u
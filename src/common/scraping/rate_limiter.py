@@ -0,0 +1,127 @@
+# common/scraping/rate_limiter.py
+"""
+ホスト単位のレート制限（トークンバケット）。
+
+プロセス内のすべてのスレッド・チャンネルで同じバケットを共有するため、
+並列取得を有効にしても1ホストへのリクエスト間隔は設定値を超えない。
+429 / 503 を受けたホストは block_host() で一定時間まるごと止める。
+"""
+
+import asyncio
+import threading
+from time import monotonic, sleep
+from urllib.parse import urlparse
+
+# source_urls に rate_limit の指定がないホストに使う既定値
+DEFAULT_RATE = 2.0  # 1秒あたりのリクエスト数
+DEFAULT_BURST = 4  # 連続で許可する最大リクエスト数
+
+
+def _validate_rate(rate: float, burst: int) -> None:
+    # rate が 0 以下だと待ち秒数が 0 除算・無限大になり、burst が 1 未満だとトークンが取れない
+    if not rate > 0:
+        raise ValueError(f"rate は正の数を指定してください: {rate}")
+    if burst < 1:
+        raise ValueError(f"burst は1以上を指定してください: {burst}")
+
+
+class TokenBucket:
+    """rate 個/秒 で補充され、最大 burst 個まで貯まるトークンバケット。"""
+
+    def __init__(self, rate: float, burst: int):
+        _validate_rate(rate, burst)
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self) -> float:
+        """
+        トークンを1つ取れれば取って 0 を返す。
+        取れなければ、取れるようになるまでの待ち秒数を返す（トークンは減らさない）。
+        """
+        with self.lock:
+            now = monotonic()
+            self._refill(now)
+
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self) -> None:
+        """トークンを1つ取れるまで待つ。"""
+        while (wait := self.try_acquire()) > 0:
+            sleep(wait)
+
+    def block(self, seconds: float) -> None:
+        """seconds 秒間、このホストへのリクエストをすべて止める。"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, monotonic() + seconds)
+            self.tokens = 0.0
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def _host(url: str) -> str:
+    return urlparse(url).netloc.lower() or url.lower()
+
+
+def _get_bucket(url: str) -> TokenBucket:
+    host = _host(url)
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(DEFAULT_RATE, DEFAULT_BURST)
+            _buckets[host] = bucket
+        return bucket
+
+
+def configure_host_rate(url: str, rate: float, burst: int = 1) -> None:
+    """
+    url のホストのレートを設定する。
+
+    同じホストを複数チャンネルが別々の値で設定した場合は、
+    より厳しい（小さい）値を採用する。
+
+    Raises:
+        ValueError: rate が0以下、または burst が1未満の場合
+    """
+    _validate_rate(rate, burst)
+    bucket = _get_bucket(url)
+    with bucket.lock:
+        if (rate, burst) == (bucket.rate, bucket.burst):
+            return
+        if bucket.rate == DEFAULT_RATE and bucket.burst == DEFAULT_BURST:
+            bucket.rate, bucket.burst = rate, burst
+        else:
+            bucket.rate = min(bucket.rate, rate)
+            bucket.burst = min(bucket.burst, burst)
+        bucket.tokens = min(bucket.tokens, bucket.burst)
+
+
+def acquire(url: str) -> None:
+    """url のホストに1リクエスト送ってよくなるまで待つ。"""
+    _get_bucket(url).acquire()
+
+
+async def acquire_async(url: str) -> None:
+    """acquire() の asyncio 版。待つ間もスレッドを占有しない。"""
+    bucket = _get_bucket(url)
+    while (wait := bucket.try_acquire()) > 0:
+        await asyncio.sleep(wait)
+
+
+def block_host(url: str, seconds: float) -> None:
+    """url のホストへのリクエストを seconds 秒間止める（429 / 503 用）。"""
+    _get_bucket(url).block(seconds)
@@ -0,0 +1,140 @@
+# common/scraping/stream_parser.py
+"""
+HTML を受信しながら少しずつパースし、必要な部分だけをツリーに残す。
+
+数MBあるまとめスレッドでも、デコード済みの文字列全体と
+その数倍の大きさのツリーを同時に持たずに済む。
+
+残す部分はパーサーごとに STREAM_KEEP で宣言する。
+    STREAM_KEEP = [("div", "article-outer hentry"), ("div", "t_b")]
+(タグ名, クラス名) の組で、クラス名の判定は BeautifulSoup の class_="..." と同じ
+（空白を含むなら class 属性全体が一致、単一なら含まれていれば一致）。
+クラス名が None ならタグ名だけで判定する。
+
+宣言した要素の中身と、その祖先（html, body など）は残り、
+それ以外の部分木は閉じタグを読んだ時点で捨てる。
+"""
+
+import re
+from typing import Iterable
+
+import lxml.html
+from lxml import etree
+
+# <meta charset="..."> / <meta http-equiv=... content="...; charset=...">
+META_CHARSET_PATTERN = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.I)
+
+
+def sniff_encoding(content_type: str | None, head: bytes) -> str:
+    """
+    Content-Type ヘッダーと本文の先頭から文字コードを決める。
+    どちらにもなければ utf-8。
+    """
+    if content_type:
+        match = re.search(r"charset=([\w-]+)", content_type, re.I)
+        if match:
+            return match.group(1)
+    match = META_CHARSET_PATTERN.search(head[:4096])
+    if match:
+        return match.group(1).decode("ascii")
+    return "utf-8"
+
+
+def _matches(tag: str, class_attr: str | None, keep: list[tuple]) -> bool:
+    for keep_tag, keep_class in keep:
+        if tag != keep_tag:
+            continue
+        if keep_class is None:
+            return True
+        classes = (class_attr or "").split()
+        if " " in keep_class:
+            if " ".join(classes) == keep_class:
+                return True
+        elif keep_class in classes:
+            return True
+    return False
+
+
+def parse_html_stream(
+    chunks: Iterable[bytes],
+    keep: list[tuple] | None,
+    max_bytes: int,
+    encoding: str = "utf-8",
+) -> tuple[lxml.html.HtmlElement, bool]:
+    """
+    バイト列のチャンクを順にパースし、ルート要素を返す。
+
+    Args:
+        chunks: レスポンス本文のチャンク（iter_content など）
+        keep: 残す要素の宣言（STREAM_KEEP）。None なら何も捨てない
+        max_bytes: 読み込む最大バイト数。超えた時点で以降は読まない
+        encoding: 本文の文字コード
+
+    Returns:
+        tuple[HtmlElement, bool]: (ルート要素, max_bytes で打ち切ったか)
+    """
+    parser = etree.HTMLPullParser(
+        events=("start", "end") if keep else (), encoding=encoding
+    )
+    parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+
+    # 開いている要素ごとに「残す要素を中に含むか」を積む
+    contains_keep = []
+    # 残す要素の内側にいる深さ（0 なら外側）
+    keep_depth = 0
+
+    def _prune() -> None:
+        nonlocal keep_depth
+        for event, el in parser.read_events():
+            if event == "start":
+                is_keep = _matches(el.tag, el.get("class"), keep)
+                contains_keep.append(is_keep)
+                if is_keep:
+                    keep_depth += 1
+                continue
+
+            has_keep = contains_keep.pop()
+            is_keep = _matches(el.tag, el.get("class"), keep)
+            if is_keep:
+                keep_depth -= 1
+            if has_keep:
+                # 祖先に「中に残す要素がある」ことを伝える
+                if contains_keep:
+                    contains_keep[-1] = True
+            elif keep_depth == 0:
+                _remove(el)
+
+    received = 0
+    truncated = False
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if received + len(chunk) > max_bytes:
+            chunk = chunk[: max_bytes - received]
+            truncated = True
+        received += len(chunk)
+        parser.feed(chunk)
+        if keep:
+            _prune()
+        if truncated:
+            break
+
+    try:
+        root = parser.close()
+    except etree.XMLSyntaxError:
+        root = None
+    if keep:
+        _prune()
+
+    if root is None:
+        # 空の本文など（to_lxml と同じく中身のない文書として扱う）
+        root = lxml.html.document_fromstring("<html></html>")
+    return root, truncated
+
+
+def _remove(el) -> None:
+    parent = el.getparent()
+    if parent is None:
+        return
+    el.clear()
+    parent.remove(el)
@@ -2,7 +2,7 @@ import os
 import random
 
 from src.common.scraping.run_selenium import set_up_selenium, serch_picture_by_selenium
-from src.common.media.media_utils import save_image
+from src.common.media.media_utils import save_image, prefetch_images
 from common.thumbnail.analayze_image import (
     compute_face_area_ratios,
     is_within_aspect_ratio,
@@ -31,9 +31,11 @@ def build_single_thumbnail(player, settings, logger=None):
     output_path = None
     best_ratio = -1.0
 
+    contents = prefetch_images(items_list, settings)
+
     for i, item in enumerate(items_list, start=1):
         tmp_base = f"__tmp_{player_name}_{i}"
-        local_path = save_image(item, tmp_base, settings)
+        local_path = save_image(item, tmp_base, settings, content=contents.get(item))
 
         sum_ratio, max_ratio = compute_face_area_ratios(local_path, settings)
         metric = max_ratio if settings["FACE_RATIO_METRIC"] == "max" else sum_ratio
@@ -100,9 +102,11 @@ def build_wide_thumbnail(player, settings, logger=None):
 
     file_path_list = []
 
+    contents = prefetch_images(items_list, settings)
+
     for i, item in enumerate(items_list, start=1):
         tmp_base = f"__tmp_{player_name}_{i}"
-        local_path = save_image(item, tmp_base, settings)
+        local_path = save_image(item, tmp_base, settings, content=contents.get(item))
         file_path_list.append(local_path)
 
     for file_path in file_path_list:
@@ -74,6 +74,7 @@ def detect_players(title: str, script_text: str, settings: dict) -> list[dict] |
         prompt,
         settings,
         logger=logger,
+        step="detect_players",
         schema={
             "type": "object",
             "properties": {
@@ -171,6 +172,7 @@ def detect_topic(title: str, script_text: str, settings: dict) -> list[dict] | N
         prompt,
         settings,
         logger=logger,
+        step="detect_topic",
         schema={
             "type": "object",
             "properties": {
@@ -1,10 +1,12 @@
 from src.common.media.media_utils import is_long_gif
 
 
-def extract_only_long_gif_urls(media_urls: list[str]) -> list[str, bool]:
+def extract_only_long_gif_urls(media_urls: list[str], media_infos: list) -> list[str]:
+    # GIFの長さは保存済みのローカルファイルで調べる（media_infos は media_urls と同じ順）
+    # 保存に失敗したもの（""）は対象外
     only_long_gif_urls = []
-    for e, media_url in enumerate(media_urls):
-        if is_long_gif(media_url):
+    for media_url, media_info in zip(media_urls, media_infos):
+        if media_info and is_long_gif(media_info["local_path"]):
             only_long_gif_urls.append(media_url)
     return only_long_gif_urls
 
@@ -0,0 +1,45 @@
+# common/utils/retry.py
+"""
+リトライ間隔の計算（指数バックオフ + ジッター / Retry-After の解釈）。
+HTTP 取得と Gemini 呼び出しの両方から使う。
+"""
+
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+def compute_backoff(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """
+    attempt 回目（1始まり）の失敗後に待つ秒数を返す。
+
+    base * 2^(attempt-1) を上限 cap で頭打ちにし、その半分を固定、
+    残り半分をランダムにする（equal jitter）。
+    複数スレッドが同時に失敗しても再試行のタイミングがばらける。
+    """
+    delay = min(cap, base * (2 ** (attempt - 1)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Retry-After ヘッダの値を待ち秒数に変換する。
+
+    "120" のような秒数と、HTTP-date 形式の両方に対応する。
+    解釈できない場合は None を返す。
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
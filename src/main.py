@@ -10,6 +10,8 @@ from config.settings import load_settings
 from src.common.utils.logger import setup_logger
 from src.common.pipeline.article_pipeline import run_pipeline
 from src.common.google_drive.drive_client import get_drive_service
+from src.common.scraping.parsers.registry import validate_parsers
+from src.common.pipeline.article_index import register_channel
 
 
 def main():
@@ -42,6 +44,14 @@ def main():
             sleep(10)
             pass
 
+    # パーサーの読み込み・検証もループ前に1度だけ行う（設定ミスはここで落とす）
+    # 有効なチャンネルは記事インデックスに登録し、ジャンル判定をまとめて行う
+    for channel in channel_list:
+        settings = load_settings(channel)
+        validate_parsers(settings)
+        if settings["IS_ENABLED"]:
+            register_channel(settings)
+
     # ここでチャンネルを指定！
     while True:
         for channel in channel_list:
@@ -0,0 +1,146 @@
+"""
+Gemini クライアント（call_gemini / submit_gemini）のベンチマーク。
+
+tests/gemini_standin.py の代替サーバーを起動し、そこに向けて submit_gemini で
+calls 件を同時に投げる。ネットワークにも実際の API にも出ない。
+
+計測値:
+    wall_s     : 全件が終わるまでの秒数
+    per_min    : 1分あたりの完了件数
+    p50_s/p95_s: 1件あたりの所要時間（再試行の待ちを含む）
+    retries    : 再試行の合計回数
+    errors     : 最終的に失敗した件数
+    max_active : 代替サーバーが同時に受けたリクエスト数の最大
+
+使い方:
+    python tests/benchmark_gemini_client.py
+    python tests/benchmark_gemini_client.py --calls 200 --concurrency 8 --latency 1.0
+    python tests/benchmark_gemini_client.py --fault-rate 429=0.05 --fault-rate 500=0.05
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+from time import monotonic, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.gemini.client import submit_gemini, GeminiCallError
+from src.common.gemini.usage import get_usage_records
+from tests.gemini_standin import GeminiStandIn
+
+CHANNEL_NAME = "benchmark"
+SCHEMA = {
+    "type": "object",
+    "properties": {"title": {"type": "string"}, "is_target": {"type": "boolean"}},
+    "required": ["title", "is_target"],
+}
+
+bench_logger = logging.getLogger("NewsPipe.benchmark")
+bench_logger.addHandler(logging.NullHandler())
+bench_logger.propagate = False
+
+
+def build_settings(base_url: str, concurrency: int, usage_dir: Path) -> dict:
+    return {
+        "CHANNEL_NAME": CHANNEL_NAME,
+        "GEMINI_MODEL": "standin-model",
+        "GEMINI_API_KEY": "standin",
+        "GEMINI_BASE_URL": base_url,
+        "MAX_GEMINI_TOKENS": 256,
+        "GEMINI_RPM": 10**6,
+        "GEMINI_TPM": 10**9,
+        "GEMINI_MAX_CONCURRENCY": concurrency,
+        "GEMINI_TIMEOUT": 30,
+        "GEMINI_DEADLINE": 180,
+        "GEMINI_RETRIES": 4,
+        "GEMINI_USAGE_DIR": usage_dir,
+    }
+
+
+def run(
+    calls: int,
+    concurrency: int,
+    latency: float,
+    jitter: float = 0.0,
+    fault_rates: dict[str, float] | None = None,
+    seed: int = 0,
+) -> dict:
+    """
+    calls 件を submit_gemini で投げて計測する。
+
+    governor と executor はプロセスで1つなので、concurrency を変えて比べる場合は
+    プロセスを分けて実行する。
+    """
+    standin = GeminiStandIn(
+        latency=latency, jitter=jitter, fault_rates=fault_rates, seed=seed
+    )
+    with standin, tempfile.TemporaryDirectory() as usage_dir:
+        settings = build_settings(standin.base_url, concurrency, Path(usage_dir))
+        since = time()
+        started = monotonic()
+        futures = [
+            submit_gemini(
+                f"記事{i}",
+                settings,
+                bench_logger,
+                schema=SCHEMA,
+                step="bench",
+                use_cache=False,
+            )
+            for i in range(calls)
+        ]
+        errors = 0
+        for future in futures:
+            try:
+                future.result()
+            except GeminiCallError:
+                errors += 1
+        wall = monotonic() - started
+
+    records = get_usage_records(since, CHANNEL_NAME)
+    latencies = sorted(record["latency"] for record in records)
+    return {
+        "calls": calls,
+        "wall_s": round(wall, 2),
+        "per_min": round(calls / wall * 60, 1),
+        "p50_s": round(statistics.median(latencies), 2),
+        "p95_s": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "retries": sum(record["retries"] for record in records),
+        "errors": errors,
+        "max_active": standin.max_active,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Gemini クライアントのベンチマーク")
+    arg_parser.add_argument("--calls", type=int, default=50)
+    arg_parser.add_argument("--concurrency", type=int, default=4)
+    arg_parser.add_argument("--latency", type=float, default=0.5)
+    arg_parser.add_argument("--jitter", type=float, default=0.2)
+    arg_parser.add_argument(
+        "--fault-rate", action="append", default=[], help="障害=確率（例: 429=0.1）"
+    )
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args(argv)
+
+    fault_rates = {}
+    for item in args.fault_rate:
+        fault, rate = item.split("=")
+        fault_rates[fault] = float(rate)
+
+    result = run(
+        args.calls, args.concurrency, args.latency, args.jitter, fault_rates, args.seed
+    )
+    for key, value in result.items():
+        print(f"{key:>10}: {value}")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
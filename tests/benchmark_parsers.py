@@ -0,0 +1,240 @@
+"""
+パーサーのベンチマーク。
+
+src/common/scraping/parsers/sites/ にある全パーサーについて、
+tests/fixtures/html/<parser_name>/ の HTML を使って各入口関数を計測する。
+ネットワークには一切出ない（Drive 保存や画像取得を伴う
+extract_detail_info_from_html は対象外。その中で呼ばれる関数を個別に計測する）。
+
+計測値:
+    time_ms : 1回あたりの実行時間の中央値（ミリ秒）
+    peak_kb : tracemalloc で測った1回あたりのピークメモリ（KB）
+
+tests/fixtures/bench_baseline.json に保存した基準値と比べ、
+いずれかが許容倍率を超えて悪化していたら終了コード 1 で終わる。
+基準値は計測したマシンに依存するので、環境を変えたら --update-baseline で取り直す。
+
+使い方:
+    python tests/benchmark_parsers.py                    # 計測して基準値と比較
+    python tests/benchmark_parsers.py --update-baseline  # 基準値を保存し直す
+    python tests/benchmark_parsers.py --parser 5ch --repeat 50 --tolerance 2.0
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.scraping.parsers.registry import get_parser
+from src.common.scraping.html_parser import extract_media_url
+from src.common.utils.process_values import preprocess_raw_threads
+from common.pipeline.thread_builder import thread_builder
+
+SITES_DIR = ROOT / "src" / "common" / "scraping" / "parsers" / "sites"
+FIXTURE_DIR = ROOT / "tests" / "fixtures" / "html"
+BASELINE_PATH = ROOT / "tests" / "fixtures" / "bench_baseline.json"
+BASE_URL = "https://example.com/archives/1.html"
+
+# 基準値に対する許容倍率
+DEFAULT_TOLERANCE = 2.0
+# これ未満の差はタイマーの揺れとして無視する
+MIN_TIME_DELTA_MS = 0.5
+MIN_PEAK_DELTA_KB = 16.0
+
+# extract_simple_info_from_html に渡すロガー（ファイルには書かない）
+bench_logger = logging.getLogger("NewsPipe.benchmark")
+bench_logger.addHandler(logging.NullHandler())
+bench_logger.propagate = False
+
+
+def discover_parser_names() -> list[str]:
+    """sites/ 配下のパーサー名を返す。"""
+    return sorted(p.stem for p in SITES_DIR.glob("*.py") if not p.stem.startswith("_"))
+
+
+def read_fixture(parser_name: str, file_name: str) -> str | None:
+    path = FIXTURE_DIR / parser_name / file_name
+    if not path.exists():
+        return None
+    return path.read_text(encoding="utf-8")
+
+
+def build_cases(parser_name: str) -> list[tuple[str, callable]]:
+    """
+    パーサー1つ分の計測対象を (入口名, 引数なしで呼べる関数) のリストで返す。
+    必須の fixture（top_page.html / detail.html）がなければ FileNotFoundError。
+    """
+    top_page = read_fixture(parser_name, "top_page.html")
+    detail = read_fixture(parser_name, "detail.html")
+    if top_page is None or detail is None:
+        raise FileNotFoundError(
+            f"{FIXTURE_DIR / parser_name} に top_page.html / detail.html がありません"
+        )
+
+    parser = get_parser(parser_name)
+
+    # 後段の関数には、実際の処理順どおり前段の出力を入力として渡す
+    raw_threads = parser.parse_thread_content(BASE_URL, detail)
+    preprocessed = preprocess_raw_threads(raw_threads)
+
+    cases = [
+        (
+            "parse_articles_from_top_page",
+            lambda: parser.parse_articles_from_top_page(top_page),
+        ),
+        (
+            "extract_simple_info_from_html",
+            lambda: parser.extract_simple_info_from_html(detail, bench_logger),
+        ),
+        (
+            "parse_thread_content",
+            lambda: parser.parse_thread_content(BASE_URL, detail),
+        ),
+        ("preprocess_raw_threads", lambda: preprocess_raw_threads(raw_threads)),
+        ("extract_media_url", lambda: extract_media_url(preprocessed)),
+        ("thread_builder", lambda: thread_builder(preprocessed)),
+    ]
+
+    if hasattr(parser, "parse_articles_from_top_page_fast"):
+        cases.insert(
+            1,
+            (
+                "parse_articles_from_top_page_fast",
+                lambda: parser.parse_articles_from_top_page_fast(top_page),
+            ),
+        )
+
+    comment_page = read_fixture(parser_name, "comments_page1.html")
+    if comment_page is not None and hasattr(parser, "parse_comment_page"):
+        cases.append(
+            ("parse_comment_page", lambda: parser.parse_comment_page(comment_page))
+        )
+
+    return cases
+
+
+def measure_time(func, repeat: int) -> float:
+    """1回あたりの実行時間の中央値（ミリ秒）を返す。"""
+    func()  # 初回だけ発生するコスト（import・キャッシュ作成）を除く
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        samples.append((perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def measure_peak_memory(func) -> float:
+    """1回呼んだときのピークメモリ（KB）を返す。"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def run(parser_names: list[str], repeat: int) -> dict[str, dict]:
+    """{"<parser>/<入口名>": {"time_ms": ..., "peak_kb": ...}} を返す。"""
+    results = {}
+    for parser_name in parser_names:
+        for entry, func in build_cases(parser_name):
+            results[f"{parser_name}/{entry}"] = {
+                "time_ms": round(measure_time(func, repeat), 4),
+                "peak_kb": round(measure_peak_memory(func), 1),
+            }
+    return results
+
+
+def find_regressions(
+    results: dict[str, dict], baseline: dict[str, dict], tolerance: float
+) -> list[str]:
+    """基準値から許容倍率を超えて悪化した項目の説明を返す。"""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+
+        time_limit = max(
+            base["time_ms"] * tolerance, base["time_ms"] + MIN_TIME_DELTA_MS
+        )
+        if result["time_ms"] > time_limit:
+            regressions.append(
+                f"{key}: time {base['time_ms']:.3f}ms -> {result['time_ms']:.3f}ms"
+            )
+
+        peak_limit = max(
+            base["peak_kb"] * tolerance, base["peak_kb"] + MIN_PEAK_DELTA_KB
+        )
+        if result["peak_kb"] > peak_limit:
+            regressions.append(
+                f"{key}: peak {base['peak_kb']:.1f}KB -> {result['peak_kb']:.1f}KB"
+            )
+    return regressions
+
+
+def print_report(results: dict[str, dict], baseline: dict[str, dict]) -> None:
+    print(f"{'case':<56}{'time [ms]':>11}{'base':>9}{'peak [KB]':>11}{'base':>9}")
+    for key, result in results.items():
+        base = baseline.get(key, {})
+        base_time = f"{base['time_ms']:.3f}" if base else "-"
+        base_peak = f"{base['peak_kb']:.1f}" if base else "-"
+        print(
+            f"{key:<56}{result['time_ms']:>11.3f}{base_time:>9}"
+            f"{result['peak_kb']:>11.1f}{base_peak:>9}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="パーサーのベンチマーク")
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    arg_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    arg_parser.add_argument(
+        "--parser", action="append", help="対象パーサー（複数指定可、省略時は全部）"
+    )
+    arg_parser.add_argument("--update-baseline", action="store_true")
+    args = arg_parser.parse_args(argv)
+
+    parser_names = args.parser or discover_parser_names()
+    results = run(parser_names, args.repeat)
+
+    baseline = {}
+    if BASELINE_PATH.exists():
+        baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+
+    print_report(results, baseline)
+
+    if args.update_baseline:
+        # 一部のパーサーだけ計測した場合も、他の基準値は残す
+        baseline.update(results)
+        BASELINE_PATH.write_text(
+            json.dumps(baseline, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+            encoding="utf-8",
+        )
+        print(f"\n基準値を保存しました: {BASELINE_PATH}")
+        return 0
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n基準値から {args.tolerance}倍を超えて悪化:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+
+    print("\n基準値内です")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+"""
+Gemini API（generateContent）のローカル代替サーバー。
+
+ネットワークや API キーなしで call_gemini を動かすためのもの。
+settings["GEMINI_BASE_URL"]（credentials/.common_env の GEMINI_BASE_URL）を
+このサーバーの URL に向けると、パイプラインの Gemini 呼び出しがすべてここに来る。
+
+- responseSchema に合う JSON をルールで作って返す
+    文字列: "<プロパティ名>のテキスト"（enum があれば先頭）
+    真偽値: プロンプトに true_keywords のどれかを含めば true
+    配列  : 要素のスキーマに enum の文字列があれば、その全組み合わせ（url × channel など）
+           なければ2件
+- 記録した応答の再生: playback（キャッシュキー → 応答）にあればそれを返す
+  キーは response_cache.make_cache_key と同じなので、
+  data/gemini_cache.sqlite3 をそのまま読み込める（load_playback_from_cache）
+- cachedContents: POST /v1beta/cachedContents で前半を登録し、generateContent の
+  cachedContent で参照できる（登録した前半 + contents として扱う）
+    min_cache_tokens 文字より短い前半の登録は 400 を返す（実際の API の最小トークン数の代わり）
+    登録がない・期限切れの cachedContent は 404 を返す
+- 遅延: latency 秒（+ 0〜jitter 秒）
+- 障害の注入
+    faults     : 先頭のリクエストから順に使う障害のリスト
+    fault_rates: {障害: 確率}（faults を使い切った後、seed 付きの乱数で決める）
+  障害は "429" / "500" / "503" / "malformed"（候補の本文が JSON でない）/
+  "empty"（候補なし）/ "non_json"（200 で応答全体が JSON でない。プロキシのエラーページなど）
+
+単体で起動する場合
+    python tests/gemini_standin.py --port 8765 --latency 0.5 --fault-rate 429=0.1
+"""
+
+import argparse
+import itertools
+import json
+import random
+import re
+import sqlite3
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from time import sleep, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.gemini.response_cache import make_cache_key
+
+PATH_PATTERN = re.compile(r"^/v1beta/models/(?P<model>[^/:]+):generateContent")
+CACHED_CONTENTS_PATTERN = re.compile(r"^/v1beta/cachedContents(?:\?|$)")
+# enum の組み合わせで配列を作るときの上限
+MAX_ARRAY_ITEMS = 200
+
+
+# ---------------------------------------------------------
+# スキーマから応答を作る
+# ---------------------------------------------------------
+def fake_from_schema(
+    schema: dict | None, prompt: str, true_keywords, name: str = "value"
+):
+    """responseSchema に合う値をルールで作る。"""
+    if not schema:
+        return {"text": f"{name}のテキスト"}
+
+    schema_type = schema.get("type", "object").lower()
+    if schema_type == "object":
+        return {
+            key: fake_from_schema(sub, prompt, true_keywords, key)
+            for key, sub in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        return _fake_array(schema.get("items", {}), prompt, true_keywords, name)
+    if schema_type == "boolean":
+        return any(keyword in prompt for keyword in true_keywords)
+    if schema_type in ("integer", "number"):
+        return 0
+    if schema.get("enum"):
+        return schema["enum"][0]
+    return f"{name}のテキスト"
+
+
+def _fake_array(items: dict, prompt: str, true_keywords, name: str) -> list:
+    properties = items.get("properties", {})
+    enum_keys = [
+        key
+        for key, sub in properties.items()
+        if sub.get("type") == "string" and sub.get("enum")
+    ]
+    if not enum_keys:
+        return [fake_from_schema(items, prompt, true_keywords, name) for _ in range(2)]
+
+    # enum の全組み合わせ（判定のまとめ問い合わせの url × channel など）
+    values = []
+    combinations = itertools.product(*(properties[key]["enum"] for key in enum_keys))
+    for combination in itertools.islice(combinations, MAX_ARRAY_ITEMS):
+        value = fake_from_schema(items, prompt, true_keywords, name)
+        value.update(zip(enum_keys, combination))
+        values.append(value)
+    return values
+
+
+def _contents_text(payload: dict) -> str:
+    return "".join(
+        part.get("text", "")
+        for content in payload.get("contents", [])
+        for part in content.get("parts", [])
+    )
+
+
+def load_playback_from_cache(path: Path) -> dict[str, dict]:
+    """response_cache の SQLite から {キャッシュキー: 応答} を読む。"""
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT key, response FROM responses").fetchall()
+    finally:
+        conn.close()
+    return {key: json.loads(response) for key, response in rows}
+
+
+# ---------------------------------------------------------
+# サーバー
+# ---------------------------------------------------------
+class GeminiStandIn:
+    """
+    with GeminiStandIn(latency=0.1) as standin:
+        settings["GEMINI_BASE_URL"] = standin.base_url
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        faults: list[str] | None = None,
+        fault_rates: dict[str, float] | None = None,
+        playback: dict[str, dict] | None = None,
+        true_keywords: tuple[str, ...] = (),
+        seed: int = 0,
+        min_cache_tokens: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.faults = list(faults or [])
+        self.fault_rates = dict(fault_rates or {})
+        self.playback = dict(playback or {})
+        self.true_keywords = tuple(true_keywords)
+        self.random = random.Random(seed)
+        self.min_cache_tokens = min_cache_tokens
+        # {name: {"model", "text", "expires_at"}}
+        self.cached_contents = {}
+
+        self.lock = threading.Lock()
+        self.requests = []
+        self.payloads = []
+        self.active = 0
+        self.max_active = 0
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1beta"
+
+    def start(self) -> "GeminiStandIn":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # -----------------------------------------------------
+    def _next_fault(self) -> str | None:
+        with self.lock:
+            if self.faults:
+                return self.faults.pop(0)
+            for fault, rate in self.fault_rates.items():
+                if self.random.random() < rate:
+                    return fault
+        return None
+
+    def _delay(self) -> float:
+        with self.lock:
+            return self.latency + self.random.uniform(0, self.jitter)
+
+    def create_cached_content(self, payload: dict) -> tuple[int, dict, dict]:
+        """cachedContents の登録。(ステータス, 本文, ヘッダー) を返す。"""
+        text = _contents_text(payload)
+        if len(text) < self.min_cache_tokens:
+            error = {"error": {"code": 400, "status": "INVALID_ARGUMENT"}}
+            return 400, error, {}
+
+        ttl = float(payload.get("ttl", "3600s").rstrip("s"))
+        with self.lock:
+            name = f"cachedContents/standin-{len(self.cached_contents) + 1}"
+            self.cached_contents[name] = {
+                "model": payload.get("model", "").removeprefix("models/"),
+                "text": text,
+                "expires_at": time() + ttl,
+            }
+        usage = {"totalTokenCount": len(text)}
+        return 200, {"name": name, "usageMetadata": usage}, {}
+
+    def expire_cached_contents(self) -> None:
+        """登録済みの cachedContents をすべて期限切れにする。"""
+        with self.lock:
+            self.cached_contents.clear()
+
+    def generate(self, model: str, payload: dict) -> tuple[int, dict | str, dict]:
+        """(ステータス, 本文, ヘッダー) を返す。"""
+        fault = self._next_fault()
+        if fault in ("429", "500", "503"):
+            headers = {"Retry-After": "1"} if fault == "429" else {}
+            error = {"error": {"code": int(fault), "status": "INJECTED"}}
+            return int(fault), error, headers
+        if fault == "non_json":
+            return 200, "<html><body>502 Bad Gateway</body></html>", {}
+
+        cached_text = ""
+        if payload.get("cachedContent"):
+            with self.lock:
+                entry = self.cached_contents.get(payload["cachedContent"])
+            if (
+                entry is None
+                or entry["expires_at"] < time()
+                or entry["model"] != model
+            ):
+                return 404, {"error": {"code": 404, "status": "NOT_FOUND"}}, {}
+            cached_text = entry["text"]
+
+        prompt = cached_text + _contents_text(payload)
+        config = payload.get("generationConfig", {})
+        schema = config.get("responseSchema")
+
+        if fault == "empty":
+            return 200, {"candidates": []}, {}
+
+        key = make_cache_key(model, prompt, schema, config.get("temperature", 0.2))
+        if key in self.playback:
+            result = self.playback[key]
+        else:
+            result = fake_from_schema(schema, prompt, self.true_keywords)
+        text = json.dumps(result, ensure_ascii=False)
+        if fault == "malformed":
+            text = text[: len(text) // 2]
+
+        return (
+            200,
+            {
+                "candidates": [
+                    {
+                        "content": {"parts": [{"text": text}], "role": "model"},
+                        "finishReason": "STOP",
+                    }
+                ],
+                "usageMetadata": {
+                    "promptTokenCount": len(prompt),
+                    "cachedContentTokenCount": len(cached_text),
+                    "candidatesTokenCount": len(text),
+                    "totalTokenCount": len(prompt) + len(text),
+                },
+            },
+            {},
+        )
+
+    def _handler_class(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                match = PATH_PATTERN.match(self.path)
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                if CACHED_CONTENTS_PATTERN.match(self.path):
+                    self._send(*standin.create_cached_content(json.loads(body)))
+                    return
+                if match is None:
+                    self._send(404, {"error": {"code": 404}}, {})
+                    return
+
+                payload = json.loads(body)
+                with standin.lock:
+                    standin.active += 1
+                    standin.max_active = max(standin.max_active, standin.active)
+                    standin.requests.append(self.path)
+                    standin.payloads.append(payload)
+                try:
+                    sleep(standin._delay())
+                    status, response, headers = standin.generate(
+                        match.group("model"), payload
+                    )
+                    self._send(status, response, headers)
+                finally:
+                    with standin.lock:
+                        standin.active -= 1
+
+            def _send(self, status: int, response, headers: dict):
+                if isinstance(response, str):
+                    data = response.encode("utf-8")
+                    content_type = "text/html; charset=utf-8"
+                else:
+                    data = json.dumps(response, ensure_ascii=False).encode("utf-8")
+                    content_type = "application/json; charset=utf-8"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Gemini API のローカル代替サーバー")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--latency", type=float, default=0.0)
+    arg_parser.add_argument("--jitter", type=float, default=0.0)
+    arg_parser.add_argument(
+        "--fault-rate",
+        action="append",
+        default=[],
+        help="障害=確率（例: 429=0.1）。複数指定可",
+    )
+    arg_parser.add_argument(
+        "--playback", type=Path, help="再生に使う response_cache の SQLite"
+    )
+    arg_parser.add_argument(
+        "--true-keyword", action="append", default=[], help="真偽値を true にする語"
+    )
+    arg_parser.add_argument(
+        "--min-cache-tokens",
+        type=int,
+        default=0,
+        help="これより短い前半の cachedContents 登録は 400 にする",
+    )
+    args = arg_parser.parse_args()
+
+    fault_rates = {}
+    for item in args.fault_rate:
+        fault, rate = item.split("=")
+        fault_rates[fault] = float(rate)
+
+    standin = GeminiStandIn(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        fault_rates=fault_rates,
+        playback=load_playback_from_cache(args.playback) if args.playback else None,
+        true_keywords=tuple(args.true_keyword),
+        min_cache_tokens=args.min_cache_tokens,
+    )
+    print(f"GEMINI_BASE_URL={standin.base_url}")
+    try:
+        standin.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
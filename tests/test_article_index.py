@@ -0,0 +1,84 @@
+"""
+チャンネル間で共有する記事インデックス（article_index.py）の確認。
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.pipeline import article_index
+from src.common.pipeline.article_index import (
+    build_verdict_schema,
+    canonical_url,
+    get_simple_info,
+    get_verdict,
+    put_simple_info,
+    put_verdicts,
+)
+
+SETTINGS = {
+    "ARTICLE_INDEX_INFO_TTL": 600,
+    "ARTICLE_INDEX_VERDICT_TTL": 3600,
+    "ARTICLE_INDEX_MAX_ENTRIES": 3,
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_index():
+    article_index._entries.clear()
+    yield
+    article_index._entries.clear()
+
+
+def test_canonical_url_ignores_host_case_fragment_and_trailing_slash():
+    assert canonical_url("https://News.Yahoo.co.jp/articles/abc/#top") == (
+        "https://news.yahoo.co.jp/articles/abc"
+    )
+    assert canonical_url("https://example.com/") == "https://example.com/"
+
+
+def test_simple_info_is_shared_and_expires():
+    info = {"title": "t", "num_comments": 10, "comments": [], "genre": "g"}
+    put_simple_info("https://example.com/a/", info, SETTINGS)
+
+    assert get_simple_info("https://example.com/a", SETTINGS) == info
+    expired = {**SETTINGS, "ARTICLE_INDEX_INFO_TTL": -1}
+    assert get_simple_info("https://example.com/a", expired) is None
+
+
+def test_verdicts_are_stored_per_channel():
+    put_verdicts(
+        "https://example.com/a",
+        {
+            "baseball": {"is_target": True, "reason": "野球"},
+            "soccer": {"is_target": False, "reason": "野球の記事"},
+        },
+        SETTINGS,
+    )
+
+    assert get_verdict("https://example.com/a", "baseball", SETTINGS) == {
+        "is_target": True,
+        "reason": "野球",
+    }
+    assert get_verdict("https://example.com/a", "soccer", SETTINGS)["is_target"] is False
+    assert get_verdict("https://example.com/a", "tenis", SETTINGS) is None
+
+
+def test_oldest_entries_are_evicted():
+    for i in range(5):
+        put_simple_info(f"https://example.com/{i}", {"title": str(i)}, SETTINGS)
+
+    assert get_simple_info("https://example.com/0", SETTINGS) is None
+    assert get_simple_info("https://example.com/4", SETTINGS) == {"title": "4"}
+
+
+def test_verdict_schema_requires_every_channel():
+    schema = build_verdict_schema(["baseball", "soccer"])
+
+    assert schema["required"] == ["baseball", "soccer"]
+    assert schema["properties"]["soccer"]["required"] == ["is_target", "reason"]
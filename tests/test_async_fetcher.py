@@ -0,0 +1,114 @@
+"""
+async_fetcher の確認。
+
+ローカルに立てた HTTP サーバーに対して取得するのでネットワーク不要。
+"""
+
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from time import sleep
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.scraping.async_fetcher import gather_bytes, gather_html
+from src.common.scraping.rate_limiter import configure_host_rate
+
+
+class Handler(BaseHTTPRequestHandler):
+    active = 0
+    max_active = 0
+    throttled = set()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with Handler.lock:
+            Handler.active += 1
+            Handler.max_active = max(Handler.max_active, Handler.active)
+        try:
+            sleep(0.05)
+            if self.path.startswith("/throttle") and self.path not in Handler.throttled:
+                # 1回目だけ 429 を返す
+                Handler.throttled.add(self.path)
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                self.end_headers()
+                return
+            if self.path.startswith("/missing"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = f"<html><body>{self.path}</body></html>".encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with Handler.lock:
+                Handler.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    # テスト中にレート制限で待たされないようにする
+    configure_host_rate(base_url, rate=1000, burst=1000)
+    yield base_url
+    httpd.shutdown()
+
+
+@pytest.fixture
+def settings(tmp_path):
+    Handler.max_active = 0
+    return {
+        "CHANNEL_NAME": "test",
+        "TIMEOUT": 5,
+        "RETRIES": 2,
+        "PREFETCH_PER_HOST": 3,
+        "ASYNC_FETCH_CONCURRENCY": 16,
+        "HTTP_CACHE_DIR": tmp_path,
+        "HTTP_CACHE_MAX_BYTES": 1024 * 1024,
+    }
+
+
+def test_gather_html_returns_every_url_and_respects_per_host_limit(server, settings):
+    urls = [f"{server}/page/{i}" for i in range(10)]
+
+    htmls = gather_html(urls, settings)
+
+    assert list(htmls) == urls
+    for url in urls:
+        assert url.removeprefix(server) in htmls[url]
+    assert 1 < Handler.max_active <= settings["PREFETCH_PER_HOST"]
+
+
+def test_failed_url_becomes_empty_and_throttled_url_is_retried(server, settings):
+    missing = f"{server}/missing"
+    throttled = f"{server}/throttle/1"
+
+    htmls = gather_html([missing, throttled], settings)
+
+    assert htmls[missing] == ""
+    assert "/throttle/1" in htmls[throttled]
+
+
+def test_gather_bytes_returns_none_on_failure(server, settings):
+    ok = f"{server}/image.jpg"
+    missing = f"{server}/missing.jpg"
+
+    contents = gather_bytes([ok, missing], settings)
+
+    assert contents[ok].startswith(b"<html>")
+    assert contents[missing] is None
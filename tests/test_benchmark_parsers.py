@@ -0,0 +1,52 @@
+"""
+tests/benchmark_parsers.py の動作確認。
+
+全パーサーに fixture が揃っていて、計測対象がすべて実行できることを見る
+（時間の比較はマシン依存なのでここではしない）。
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from tests.benchmark_parsers import (
+    build_cases,
+    discover_parser_names,
+    find_regressions,
+)
+
+
+@pytest.mark.parametrize("parser_name", discover_parser_names())
+def test_every_parser_has_benchmark_cases(parser_name):
+    cases = build_cases(parser_name)
+    entries = [entry for entry, _ in cases]
+
+    assert "parse_articles_from_top_page" in entries
+    assert "parse_thread_content" in entries
+    assert "thread_builder" in entries
+    for _, func in cases:
+        func()
+
+
+def test_find_regressions_uses_tolerance_and_noise_floor():
+    baseline = {
+        "a/x": {"time_ms": 10.0, "peak_kb": 100.0},
+        "a/y": {"time_ms": 0.01, "peak_kb": 1.0},
+    }
+    results = {
+        "a/x": {"time_ms": 25.0, "peak_kb": 150.0},
+        # 倍率では超えているが差が小さいので揺れとして扱う
+        "a/y": {"time_ms": 0.1, "peak_kb": 4.0},
+        # 基準値のない項目は比較しない
+        "a/z": {"time_ms": 999.0, "peak_kb": 999.0},
+    }
+
+    regressions = find_regressions(results, baseline, tolerance=2.0)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("a/x: time")
@@ -0,0 +1,198 @@
+"""
+記事情報の一括作成（enrichment.py）の確認。call_gemini / submit_gemini は差し替える。
+"""
+
+import sys
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.gemini.client import GeminiCallError
+from src.common.pipeline import enrichment
+from src.common.pipeline.enrichment import (
+    enrich_article,
+    merge_separate_results,
+    submit_title,
+    summarize_threads,
+    validate_enrichment,
+)
+
+
+class NullLogger:
+    def info(self, *args, **kwargs):
+        pass
+
+    warning = info
+
+
+SETTINGS = {
+    "CHANNEL_NAME": "baseball",
+    "FUSED_ENRICHMENT": True,
+    "FUSED_ENRICHMENT_MAX_TOKENS": 4096,
+    "IS_HUMAN_ARTICLE": True,
+    "MAX_THREAD_LENGTH": 100,
+    "PROMPT_BUDGETS": {
+        "summarize_comments": 1000,
+        "enrich": 1000,
+        "thread": 1000,
+    },
+}
+YAHOO_SOURCE = {"is_thread": False}
+THREAD_SOURCE = {"is_thread": True}
+
+FUSED_RESPONSE = {
+    "title": "新タイトル",
+    "thumbtext": "サムネ",
+    "thumbtext2": "まじかよ",
+    "article_script": ["本文の要約。"],
+    "comment_script": ["コメント1", "コメント2"],
+    "players": [{"name": "大谷翔平", "team": "ドジャース"}],
+}
+
+SEPARATE_RESPONSES = {
+    "title": {"title": "個別タイトル", "thumbtext": "個別", "thumbtext2": "えぐい"},
+    "summarize_article": {"script": ["個別の本文要約。"]},
+    "summarize_comments": {"script": ["個別コメント"]},
+}
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """step ごとの応答を返す call_gemini に差し替え、呼ばれた step を記録する。"""
+    calls = []
+    responses = {"enrich": FUSED_RESPONSE, **SEPARATE_RESPONSES}
+
+    def fake_call_gemini(prompt, settings, logger, step="-", **kwargs):
+        calls.append(step)
+        res = responses[step]
+        if isinstance(res, Exception):
+            raise res
+        return res
+
+    def fake_submit_gemini(prompt, settings, logger, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fake_call_gemini(prompt, settings, logger, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    monkeypatch.setattr(enrichment, "call_gemini", fake_call_gemini)
+    monkeypatch.setattr(enrichment, "submit_gemini", fake_submit_gemini)
+    return calls, responses
+
+
+def test_fused_single_call(gemini):
+    calls, _ = gemini
+    result = enrich_article(
+        "元タイトル", "本文", ["c1", "c2"], YAHOO_SOURCE, SETTINGS, NullLogger()
+    )
+
+    assert calls == ["enrich"]
+    assert result["title"] == "新タイトル"
+    assert result["threads"] == ["本文の要約。", "コメント1", "コメント2"]
+    # 2人目がなければ detect_players と同じく None で埋める
+    assert result["players"] == [
+        {"name": "大谷翔平", "team": "ドジャース"},
+        {"name": None, "team": None},
+    ]
+
+
+def test_thread_source_keeps_threads(gemini):
+    calls, responses = gemini
+    responses["enrich"] = {**FUSED_RESPONSE, "article_script": [], "comment_script": []}
+    threads = ["レス1", "レス2"]
+
+    result = enrich_article("元タイトル", threads, None, THREAD_SOURCE, SETTINGS, NullLogger())
+
+    assert calls == ["enrich"]
+    assert result["threads"] == threads
+
+
+@pytest.mark.parametrize(
+    "broken",
+    [
+        {"title": ""},
+        {"comment_script": []},
+        {"article_script": ["長" * 200]},
+    ],
+)
+def test_invalid_fused_falls_back(gemini, broken):
+    calls, responses = gemini
+    responses["enrich"] = {**FUSED_RESPONSE, **broken}
+
+    result = enrich_article(
+        "元タイトル", "本文", ["c1"], YAHOO_SOURCE, SETTINGS, NullLogger()
+    )
+
+    assert calls == ["enrich", "title", "summarize_article", "summarize_comments"]
+    assert result["title"] == "個別タイトル"
+    assert result["threads"] == ["個別の本文要約。", "個別コメント"]
+    assert result["players"] is None
+
+
+def test_fused_error_falls_back(gemini):
+    calls, responses = gemini
+    responses["enrich"] = GeminiCallError("invalid", "truncated json", "enrich")
+
+    result = enrich_article(
+        "元タイトル", "本文", ["c1"], YAHOO_SOURCE, SETTINGS, NullLogger()
+    )
+
+    assert calls[0] == "enrich"
+    assert result["title"] == "個別タイトル"
+
+
+def test_network_error_is_not_retried_separately(gemini):
+    calls, responses = gemini
+    responses["enrich"] = GeminiCallError("deadline", "timed out", "enrich")
+
+    with pytest.raises(GeminiCallError):
+        enrich_article("元タイトル", "本文", ["c1"], YAHOO_SOURCE, SETTINGS, NullLogger())
+
+    assert calls == ["enrich"]
+
+
+def test_missing_players_are_left_to_thumbnail():
+    res = {**FUSED_RESPONSE, "players": [{"name": "不明", "team": "None"}]}
+
+    result = validate_enrichment(res, needs_summary=True, settings=SETTINGS)
+
+    assert result is not None
+    assert result["players"] is None
+
+
+def test_disabled_uses_separate_prompts(gemini):
+    calls, _ = gemini
+    settings = {**SETTINGS, "FUSED_ENRICHMENT": False}
+
+    enrich_article("元タイトル", "本文", ["c1"], YAHOO_SOURCE, settings, NullLogger())
+
+    assert calls == ["title", "summarize_article", "summarize_comments"]
+
+
+def test_separate_steps_can_run_as_independent_tasks(gemini):
+    # パイプラインではタイトルをコメントの取得と並行に作り、あとでまとめる
+    calls, _ = gemini
+    settings = {**SETTINGS, "FUSED_ENRICHMENT": False}
+
+    title = submit_title("元タイトル", "本文", YAHOO_SOURCE, settings, NullLogger())
+    assert calls == ["title"]
+    threads = summarize_threads(
+        "元タイトル", "本文", ["c1"], YAHOO_SOURCE, settings, NullLogger()
+    )
+
+    assert merge_separate_results(title.result(), threads) == enrich_article(
+        "元タイトル", "本文", ["c1"], YAHOO_SOURCE, settings, NullLogger()
+    )
+    # スレッド形式なら要約は問い合わせない
+    calls.clear()
+    assert summarize_threads("t", ["レス"], None, THREAD_SOURCE, settings, None) == [
+        "レス"
+    ]
+    assert calls == []
@@ -0,0 +1,91 @@
+"""
+各サイトパーサーの extract_detail_info_and_media を fixture の HTML で最後まで動かす確認。
+画像のダウンロード（save_media_from_urls）だけ差し替え、ネットワークには出ない。
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.scraping.parsers.registry import get_parser
+from src.common.utils.list_utils import extract_only_long_gif_urls
+
+FIXTURE_DIR = ROOT / "tests" / "fixtures" / "html"
+DETAIL_PARSER_NAMES = ["5ch", "nanjmatome", "smasoku", "basketballbbs", "yahoo_news"]
+BASE_URL = "https://example.com/archives/1.html"
+
+
+def write_gif(path: Path, seconds: float) -> None:
+    frames = [Image.new("P", (4, 4), color) for color in (0, 1)]
+    frames[0].save(
+        path,
+        save_all=True,
+        append_images=frames[1:],
+        duration=int(seconds * 1000 / len(frames)),
+    )
+
+
+@pytest.fixture
+def fake_save(tmp_path):
+    """ダウンロードせず、GIF は6秒の GIF、それ以外は空のファイルを保存したことにする。"""
+    saved = []
+
+    def save(media_urls, settings):
+        saved.append(list(media_urls))
+        media_infos = []
+        for i, media_url in enumerate(media_urls):
+            local_path = tmp_path / f"{i}{Path(media_url).suffix}"
+            if local_path.suffix == ".gif":
+                write_gif(local_path, 6)
+            else:
+                local_path.write_bytes(b"")
+            media_infos.append(
+                {"filename": local_path.name, "local_path": str(local_path)}
+            )
+        return media_infos
+
+    save.saved = saved
+    return save
+
+
+@pytest.mark.parametrize("parser_name", DETAIL_PARSER_NAMES)
+def test_extract_detail_info_and_media_runs_end_to_end(
+    parser_name, monkeypatch, fake_save
+):
+    html = (FIXTURE_DIR / parser_name / "detail.html").read_text(encoding="utf-8")
+    parser = get_parser(parser_name)
+    monkeypatch.setattr(parser, "save_media_from_urls", fake_save)
+
+    threads, pictures, media_infos = parser.extract_detail_info_and_media(
+        BASE_URL, html, settings={"CHANNEL_NAME": "test"}
+    )
+
+    assert threads
+    assert pictures
+    (media_urls,) = fake_save.saved
+    assert len(media_infos) == len(media_urls)
+
+
+def test_long_gifs_are_judged_from_saved_files(tmp_path):
+    write_gif(tmp_path / "long.gif", 6)
+    write_gif(tmp_path / "short.gif", 1)
+    media_urls = [
+        "https://example.com/long.gif",
+        "https://example.com/short.gif",
+        "https://example.com/failed.gif",
+    ]
+    media_infos = [
+        {"filename": "long.gif", "local_path": str(tmp_path / "long.gif")},
+        {"filename": "short.gif", "local_path": str(tmp_path / "short.gif")},
+        "",  # ダウンロード失敗
+    ]
+
+    assert extract_only_long_gif_urls(media_urls, media_infos) == [
+        "https://example.com/long.gif"
+    ]
@@ -0,0 +1,170 @@
+"""
+プロンプト前半の cachedContents 登録（context_cache.py）の確認。
+Gemini の代替サーバー（gemini_standin.py）に対して実際の call_gemini を動かす。
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.gemini import client, context_cache
+from src.common.gemini.build_prompt import (
+    build_enrichment_prompt,
+    build_enrichment_prompt_parts,
+    build_summarize_comments_prompt,
+    build_summarize_comments_prompt_parts,
+    build_title_prompt,
+    build_title_prompt_parts,
+)
+from src.common.gemini.client import call_gemini
+from src.common.gemini.governor import RateGovernor
+from tests.gemini_standin import GeminiStandIn
+
+
+class NullLogger:
+    def info(self, *args, **kwargs):
+        pass
+
+    warning = debug = info
+
+
+SCHEMA = {
+    "type": "object",
+    "properties": {"title": {"type": "string"}},
+    "required": ["title"],
+}
+PREFIX = "記事によらない指示と参考例。" * 20
+SOURCE = {"summarize_max_title_len": 80, "summarize_max_title_comment": 200}
+
+
+@pytest.fixture
+def settings(monkeypatch, tmp_path):
+    governor = RateGovernor(rpm=1000, tpm=10**7, max_concurrency=4)
+    monkeypatch.setattr(client, "get_governor", lambda settings: governor)
+    monkeypatch.setattr(context_cache, "_entries", {})
+    return {
+        "CHANNEL_NAME": "baseball",
+        "GEMINI_MODEL": "test-model",
+        "GEMINI_API_KEY": "key",
+        "MAX_GEMINI_TOKENS": 100,
+        "GEMINI_MAX_CONCURRENCY": 4,
+        "GEMINI_TIMEOUT": 10,
+        "GEMINI_DEADLINE": 30,
+        "GEMINI_RETRIES": 4,
+        "GEMINI_USAGE_DIR": tmp_path / "usage",
+        "GEMINI_CACHE_PATH": tmp_path / "gemini_cache.sqlite3",
+        "GEMINI_CACHE_TTL": 3600,
+        "GEMINI_CACHE_MAX_BYTES": 10**6,
+        "GEMINI_CONTEXT_CACHE": True,
+        "GEMINI_CONTEXT_CACHE_TTL": 3600,
+        "GEMINI_CONTEXT_CACHE_MIN_TOKENS": 100,
+    }
+
+
+def call(prompt, settings, standin, **kwargs):
+    kwargs.setdefault("use_cache", False)
+    return call_gemini(
+        prompt,
+        {**settings, "GEMINI_BASE_URL": standin.base_url},
+        NullLogger(),
+        schema=SCHEMA,
+        step="test",
+        **kwargs,
+    )
+
+
+def sent_texts(standin) -> list[tuple[str | None, str]]:
+    return [
+        (payload.get("cachedContent"), payload["contents"][0]["parts"][0]["text"])
+        for payload in standin.payloads
+    ]
+
+
+def test_prompt_parts_join_to_the_full_prompt():
+    assert "".join(build_title_prompt_parts("T", "本文")) == build_title_prompt(
+        "T", "本文"
+    )
+    assert "".join(
+        build_summarize_comments_prompt_parts(["c1", "c2"], "T", SOURCE)
+    ) == build_summarize_comments_prompt(["c1", "c2"], "T", SOURCE)
+    for comments, is_human in ((["c1"], True), (None, False)):
+        args = ("T", "本文", comments, SOURCE, is_human)
+        assert "".join(build_enrichment_prompt_parts(*args)) == build_enrichment_prompt(
+            *args
+        )
+
+
+def test_prefix_does_not_depend_on_the_article():
+    first, _ = build_enrichment_prompt_parts("T1", "本文1", ["c1"], SOURCE, True)
+    second, _ = build_enrichment_prompt_parts("T2", "本文2", ["c2"], SOURCE, True)
+    assert first == second
+
+
+def test_prefix_is_registered_once_and_referenced(settings, tmp_path):
+    with GeminiStandIn() as standin:
+        call("記事1", settings, standin, prefix=PREFIX)
+        call("記事2", settings, standin, prefix=PREFIX)
+
+    assert len(standin.cached_contents) == 1
+    (name,) = standin.cached_contents
+    assert sent_texts(standin) == [(name, "記事1"), (name, "記事2")]
+
+    (path,) = (tmp_path / "usage").glob("*.jsonl")
+    usage = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [u["cached_tokens"] for u in usage] == [len(PREFIX), len(PREFIX)]
+    assert usage[0]["prompt_tokens"] == len(PREFIX) + len("記事1")
+
+
+def test_short_prefix_is_sent_inline(settings):
+    with GeminiStandIn() as standin:
+        call("記事", settings, standin, prefix="短い前半")
+
+    assert standin.cached_contents == {}
+    assert sent_texts(standin) == [(None, "短い前半記事")]
+
+
+def test_disabled_context_cache_sends_inline(settings):
+    settings["GEMINI_CONTEXT_CACHE"] = False
+    with GeminiStandIn() as standin:
+        call("記事", settings, standin, prefix=PREFIX)
+
+    assert sent_texts(standin) == [(None, PREFIX + "記事")]
+
+
+def test_rejected_registration_falls_back_and_is_not_retried(settings):
+    with GeminiStandIn(min_cache_tokens=10**6) as standin:
+        call("記事1", settings, standin, prefix=PREFIX)
+        call("記事2", settings, standin, prefix=PREFIX)
+
+    assert sent_texts(standin) == [(None, PREFIX + "記事1"), (None, PREFIX + "記事2")]
+    assert len(context_cache._entries) == 1
+
+
+def test_expired_cached_content_is_sent_inline_then_registered_again(settings):
+    with GeminiStandIn() as standin:
+        call("記事1", settings, standin, prefix=PREFIX)
+        standin.expire_cached_contents()
+        assert call("記事2", settings, standin, prefix=PREFIX) == {
+            "title": "titleのテキスト"
+        }
+        call("記事3", settings, standin, prefix=PREFIX)
+
+    texts = sent_texts(standin)
+    assert texts[1][1] == "記事2" and texts[1][0] is not None
+    assert texts[2] == (None, PREFIX + "記事2")
+    assert texts[3] == (list(standin.cached_contents)[0], "記事3")
+
+
+def test_response_cache_key_matches_inline_prompt(settings):
+    with GeminiStandIn() as standin:
+        first = call("記事", settings, standin, prefix=PREFIX, use_cache=True)
+        second = call(PREFIX + "記事", settings, standin, use_cache=True)
+
+    assert first == second
+    assert len(standin.payloads) == 1
@@ -0,0 +1,92 @@
+"""
+Gemini の RPM / TPM / 同時実行数の制御（governor.py）の確認。
+"""
+
+import sys
+import threading
+from pathlib import Path
+from time import sleep
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.gemini.governor import RateGovernor, WINDOW_SECONDS
+
+
+def test_requests_per_minute():
+    governor = RateGovernor(rpm=3, tpm=10000, max_concurrency=4)
+
+    for _ in range(3):
+        entry, wait = governor.try_acquire(10)
+        assert entry is not None and wait == 0
+
+    entry, wait = governor.try_acquire(10)
+    assert entry is None
+    assert 0 < wait <= WINDOW_SECONDS
+
+
+def test_tokens_per_minute_waits_for_oldest_to_expire():
+    governor = RateGovernor(rpm=100, tpm=1000, max_concurrency=4)
+    first, _ = governor.try_acquire(600)
+    first[0] -= 30  # 30秒前に送ったことにする
+    governor.try_acquire(300)
+
+    entry, wait = governor.try_acquire(200)
+
+    assert entry is None
+    # 1件目（600）が窓から出れば入る
+    assert 29 < wait <= 30
+
+
+def test_settle_frees_overestimated_tokens():
+    governor = RateGovernor(rpm=100, tpm=1000, max_concurrency=4)
+    entry, _ = governor.try_acquire(900)
+    assert governor.try_acquire(500)[0] is None
+
+    governor.settle(entry, 100)
+
+    assert governor.try_acquire(500)[0] is not None
+
+
+def test_oversized_request_passes_when_window_is_empty():
+    governor = RateGovernor(rpm=10, tpm=100, max_concurrency=1)
+
+    entry, _ = governor.try_acquire(5000)
+
+    assert entry is not None
+
+
+def test_block_stops_all_requests():
+    governor = RateGovernor(rpm=100, tpm=10000, max_concurrency=4)
+    governor.block(5)
+
+    entry, wait = governor.try_acquire(1)
+
+    assert entry is None
+    assert 4 < wait <= 5
+
+
+def test_reserve_limits_concurrency():
+    governor = RateGovernor(rpm=100, tpm=100000, max_concurrency=2)
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal running, peak
+        with governor.reserve(10):
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            sleep(0.05)
+            with lock:
+                running -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak == 2
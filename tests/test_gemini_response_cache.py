@@ -0,0 +1,82 @@
+"""
+Gemini 応答キャッシュ（response_cache.py）の確認。
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.gemini import response_cache
+from src.common.gemini.response_cache import (
+    get_cached_response,
+    get_gemini_cache_stats,
+    make_cache_key,
+    put_cached_response,
+)
+
+
+@pytest.fixture
+def settings(tmp_path):
+    response_cache._stats.clear()
+    return {
+        "GEMINI_CACHE_PATH": tmp_path / "gemini_cache.sqlite3",
+        "GEMINI_CACHE_TTL": 3600,
+        "GEMINI_CACHE_MAX_BYTES": 10_000,
+    }
+
+
+def test_key_depends_on_model_prompt_schema_and_temperature():
+    base = make_cache_key("m", "p", {"type": "object"}, 0.2)
+
+    assert base == make_cache_key("m", "p", {"type": "object"}, 0.2)
+    assert base != make_cache_key("m2", "p", {"type": "object"}, 0.2)
+    assert base != make_cache_key("m", "p2", {"type": "object"}, 0.2)
+    assert base != make_cache_key("m", "p", None, 0.2)
+    assert base != make_cache_key("m", "p", {"type": "object"}, 0.5)
+
+
+def test_hit_miss_and_stats_per_step(settings):
+    key = make_cache_key("m", "p", None, 0.2)
+
+    assert get_cached_response(key, settings, step="judge") is None
+    put_cached_response(key, {"is_target": True, "reason": "野球"}, settings)
+    assert get_cached_response(key, settings, step="judge") == {
+        "is_target": True,
+        "reason": "野球",
+    }
+    get_cached_response(make_cache_key("m", "x", None, 0.2), settings, step="title")
+
+    assert get_gemini_cache_stats() == {
+        "judge": {"hit": 1, "miss": 1},
+        "title": {"hit": 0, "miss": 1},
+    }
+
+
+def test_cache_directory_is_created(settings, tmp_path):
+    settings["GEMINI_CACHE_PATH"] = tmp_path / "data" / "nested" / "cache.sqlite3"
+    key = make_cache_key("m", "p", None, 0.2)
+
+    assert get_cached_response(key, settings) is None
+    put_cached_response(key, {"a": 1}, settings)
+    assert get_cached_response(key, settings) == {"a": 1}
+
+
+def test_expired_response_is_not_used(settings):
+    key = make_cache_key("m", "p", None, 0.2)
+    put_cached_response(key, {"a": 1}, settings)
+
+    assert get_cached_response(key, {**settings, "GEMINI_CACHE_TTL": -1}) is None
+
+
+def test_least_recently_used_responses_are_evicted(settings):
+    keys = [make_cache_key("m", f"p{i}", None, 0.2) for i in range(50)]
+    for key in keys:
+        put_cached_response(key, {"text": "あ" * 100}, settings)
+
+    assert get_cached_response(keys[0], settings) is None
+    assert get_cached_response(keys[-1], settings) == {"text": "あ" * 100}
@@ -0,0 +1,199 @@
+"""
+call_gemini の再試行と失敗の分類の確認。
+Session は決まった応答を順に返すものに差し替え、sleep は待たずに記録する。
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.gemini import client
+from src.common.gemini.client import call_gemini, GeminiCallError
+from src.common.gemini.governor import RateGovernor, WINDOW_SECONDS
+
+
+class NullLogger:
+    def info(self, *args, **kwargs):
+        pass
+
+    warning = debug = info
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, data: dict | None = None, headers=None):
+        self.status_code = status_code
+        self.data = data or {}
+        self.headers = headers or {}
+        self.text = json.dumps(self.data)
+
+    def json(self):
+        return self.data
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.posts = 0
+
+    def post(self, url, json=None, timeout=None):
+        self.posts += 1
+        res = self.responses.pop(0)
+        if isinstance(res, Exception):
+            raise res
+        return res
+
+
+SETTINGS = {
+    "CHANNEL_NAME": "baseball",
+    "GEMINI_MODEL": "test-model",
+    "GEMINI_API_KEY": "key",
+    "GEMINI_BASE_URL": "https://gemini.invalid/v1beta",
+    "MAX_GEMINI_TOKENS": 100,
+    "GEMINI_RPM": 1000,
+    "GEMINI_TPM": 10**7,
+    "GEMINI_MAX_CONCURRENCY": 4,
+    "GEMINI_TIMEOUT": 60,
+    "GEMINI_DEADLINE": 180,
+    "GEMINI_RETRIES": 4,
+}
+
+
+def ok(result: dict) -> FakeResponse:
+    return FakeResponse(
+        200,
+        {
+            "candidates": [
+                {
+                    "content": {"parts": [{"text": json.dumps(result)}]},
+                    "finishReason": "STOP",
+                }
+            ],
+            "usageMetadata": {
+                "promptTokenCount": 120,
+                "candidatesTokenCount": 30,
+                "totalTokenCount": 150,
+            },
+        },
+    )
+
+
+@pytest.fixture
+def fake(monkeypatch, tmp_path):
+    waits = []
+    holder = {}
+
+    def install(*responses):
+        holder["session"] = FakeSession(responses)
+        return holder["session"]
+
+    monkeypatch.setattr(client, "get_gemini_session", lambda settings: holder["session"])
+    # 429 で止めたプロセス共有の governor が他のテストに残らないように
+    governor = RateGovernor(rpm=1000, tpm=10**7, max_concurrency=4)
+    monkeypatch.setattr(client, "get_governor", lambda settings: governor)
+    monkeypatch.setattr(client, "sleep", waits.append)
+    monkeypatch.setitem(SETTINGS, "GEMINI_USAGE_DIR", tmp_path)
+    return install, waits
+
+
+def call(**settings):
+    return call_gemini(
+        "prompt", {**SETTINGS, **settings}, NullLogger(), step="test", use_cache=False
+    )
+
+
+def usage_lines(tmp_path) -> list[dict]:
+    return [
+        json.loads(line)
+        for path in tmp_path.glob("*.jsonl")
+        for line in path.read_text(encoding="utf-8").splitlines()
+    ]
+
+
+def test_retries_transient_status_then_succeeds(fake, tmp_path):
+    install, waits = fake
+    session = install(FakeResponse(503), FakeResponse(500), ok({"a": 1}))
+
+    assert call() == {"a": 1}
+    assert session.posts == 3
+    assert len(waits) == 2
+
+    (usage,) = usage_lines(tmp_path)
+    assert usage["channel"] == "baseball"
+    assert usage["step"] == "test"
+    assert usage["status"] == "ok"
+    assert usage["retries"] == 2
+    assert (usage["prompt_tokens"], usage["response_tokens"]) == (120, 30)
+
+
+def test_honours_retry_after(fake):
+    install, waits = fake
+    install(FakeResponse(429, headers={"Retry-After": "1"}), ok({"a": 1}))
+
+    call()
+
+    assert waits == [1.0]
+
+
+def test_429_without_retry_after_blocks_for_the_quota_window(fake, monkeypatch):
+    install, waits = fake
+    install(FakeResponse(429), ok({"a": 1}))
+    blocks = []
+    monkeypatch.setattr(client.get_governor(SETTINGS), "block", blocks.append)
+
+    assert call() == {"a": 1}
+
+    assert blocks == [WINDOW_SECONDS]
+    # この呼び出しの再試行はバックオフの分だけ待つ
+    assert len(waits) == 1 and waits[0] < WINDOW_SECONDS
+
+
+def test_client_error_is_not_retried(fake):
+    install, _ = fake
+    session = install(FakeResponse(400, {"error": "bad schema"}))
+
+    with pytest.raises(GeminiCallError) as e:
+        call()
+
+    assert e.value.kind == "http"
+    assert e.value.status == 400
+    assert session.posts == 1
+
+
+def test_empty_candidates_exhaust_retries(fake, tmp_path):
+    install, _ = fake
+    session = install(*[FakeResponse(200, {"candidates": []})] * 4)
+
+    with pytest.raises(GeminiCallError) as e:
+        call()
+
+    assert e.value.kind == "empty"
+    assert session.posts == 4
+    (usage,) = usage_lines(tmp_path)
+    assert (usage["status"], usage["retries"]) == ("empty", 3)
+
+
+def test_blocked_prompt_is_not_retried(fake):
+    install, _ = fake
+    install(FakeResponse(200, {"promptFeedback": {"blockReason": "SAFETY"}}))
+
+    with pytest.raises(GeminiCallError) as e:
+        call()
+
+    assert e.value.kind == "blocked"
+
+
+def test_gives_up_at_deadline(fake):
+    install, waits = fake
+    install(FakeResponse(503, headers={"Retry-After": "120"}), ok({"a": 1}))
+
+    with pytest.raises(GeminiCallError) as e:
+        call(GEMINI_DEADLINE=30)
+
+    assert e.value.kind == "deadline"
+    assert waits == []
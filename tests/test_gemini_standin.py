@@ -0,0 +1,169 @@
+"""
+Gemini の代替サーバー（gemini_standin.py）に対して、実際の call_gemini / submit_gemini を動かす確認。
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.gemini import client
+from src.common.gemini.client import call_gemini, submit_gemini, GeminiCallError
+from src.common.gemini.governor import RateGovernor
+from src.common.gemini.response_cache import make_cache_key
+from src.common.pipeline.judge import build_batch_verdict_schema
+from tests.gemini_standin import GeminiStandIn, load_playback_from_cache
+
+
+class NullLogger:
+    def info(self, *args, **kwargs):
+        pass
+
+    warning = debug = info
+
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "is_target": {"type": "boolean"},
+    },
+    "required": ["title", "is_target"],
+}
+
+
+@pytest.fixture
+def settings(monkeypatch, tmp_path):
+    governor = RateGovernor(rpm=1000, tpm=10**7, max_concurrency=2)
+    monkeypatch.setattr(client, "get_governor", lambda settings: governor)
+    return {
+        "CHANNEL_NAME": "baseball",
+        "GEMINI_MODEL": "test-model",
+        "GEMINI_API_KEY": "key",
+        "MAX_GEMINI_TOKENS": 100,
+        "GEMINI_RPM": 1000,
+        "GEMINI_TPM": 10**7,
+        "GEMINI_MAX_CONCURRENCY": 2,
+        "GEMINI_TIMEOUT": 10,
+        "GEMINI_DEADLINE": 30,
+        "GEMINI_RETRIES": 4,
+        "GEMINI_USAGE_DIR": tmp_path / "usage",
+        "GEMINI_CACHE_PATH": tmp_path / "gemini_cache.sqlite3",
+        "GEMINI_CACHE_TTL": 3600,
+        "GEMINI_CACHE_MAX_BYTES": 10**6,
+    }
+
+
+def call(prompt, settings, standin, **kwargs):
+    kwargs.setdefault("use_cache", False)
+    return call_gemini(
+        prompt,
+        {**settings, "GEMINI_BASE_URL": standin.base_url},
+        NullLogger(),
+        step="test",
+        **kwargs,
+    )
+
+
+def test_returns_schema_shaped_json(settings):
+    with GeminiStandIn(true_keywords=("野球",)) as standin:
+        assert call("野球の記事", settings, standin, schema=SCHEMA) == {
+            "title": "titleのテキスト",
+            "is_target": True,
+        }
+        res = call("料理の記事", settings, standin, schema=SCHEMA)
+        assert res["is_target"] is False
+
+
+def test_batch_verdicts_cover_every_url_and_channel(settings):
+    schema = build_batch_verdict_schema(["u1", "u2"], ["baseball", "soccer"])
+
+    with GeminiStandIn() as standin:
+        res = call("判定", settings, standin, schema=schema)
+
+    pairs = {(v["url"], v["channel"]) for v in res["verdicts"]}
+    assert pairs == {
+        ("u1", "baseball"),
+        ("u1", "soccer"),
+        ("u2", "baseball"),
+        ("u2", "soccer"),
+    }
+
+
+def test_injected_faults_are_retried(settings, monkeypatch):
+    waits = []
+    monkeypatch.setattr(client, "sleep", waits.append)
+
+    with GeminiStandIn(faults=["503", "malformed", "empty"]) as standin:
+        assert call("p", settings, standin, schema=SCHEMA)["title"] == "titleのテキスト"
+        assert len(standin.requests) == 4
+    assert len(waits) == 3
+
+
+def test_non_json_response_body_is_retried(settings, monkeypatch):
+    monkeypatch.setattr(client, "sleep", lambda seconds: None)
+
+    with GeminiStandIn(faults=["non_json"]) as standin:
+        assert call("p", settings, standin, schema=SCHEMA)["title"] == "titleのテキスト"
+        assert len(standin.requests) == 2
+
+    with GeminiStandIn(faults=["non_json"] * 4) as standin:
+        with pytest.raises(GeminiCallError) as e:
+            call("p", settings, standin)
+    assert e.value.kind == "invalid"
+
+
+def test_gives_up_when_faults_persist(settings, monkeypatch):
+    monkeypatch.setattr(client, "sleep", lambda seconds: None)
+
+    with GeminiStandIn(faults=["500"] * 4) as standin:
+        with pytest.raises(GeminiCallError) as e:
+            call("p", settings, standin)
+    assert (e.value.kind, e.value.status) == ("http", 500)
+
+
+def test_plays_back_recorded_responses(settings):
+    key = make_cache_key("test-model", "p", SCHEMA, 0.2)
+    recorded = {"title": "記録したタイトル", "is_target": True}
+
+    with GeminiStandIn(playback={key: recorded}) as standin:
+        assert call("p", settings, standin, schema=SCHEMA) == recorded
+
+
+def test_loads_playback_from_response_cache(settings):
+    # 1回目は代替サーバーの応答がキャッシュに入り、その SQLite から再生用の応答を読める
+    with GeminiStandIn() as standin:
+        first = call("p", settings, standin, schema=SCHEMA, use_cache=True)
+
+    playback = load_playback_from_cache(settings["GEMINI_CACHE_PATH"])
+    assert playback == {make_cache_key("test-model", "p", SCHEMA, 0.2): first}
+
+
+def test_concurrency_is_bounded_by_governor(settings):
+    with GeminiStandIn(latency=0.1) as standin:
+        settings = {**settings, "GEMINI_BASE_URL": standin.base_url}
+        futures = [
+            submit_gemini(f"p{i}", settings, NullLogger(), step="test", use_cache=False)
+            for i in range(6)
+        ]
+        results = [f.result(timeout=10) for f in futures]
+
+    assert len(results) == 6
+    assert len(standin.requests) == 6
+    assert 1 <= standin.max_active <= 2
+
+
+def test_usage_is_recorded_from_usage_metadata(settings):
+    with GeminiStandIn() as standin:
+        call("12345", settings, standin, schema=SCHEMA)
+
+    (path,) = Path(settings["GEMINI_USAGE_DIR"]).glob("*.jsonl")
+    lines = path.read_text(encoding="utf-8").splitlines()
+    (usage,) = [json.loads(line) for line in lines]
+    assert usage["prompt_tokens"] == 5
+    assert usage["status"] == "ok"
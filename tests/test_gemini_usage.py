@@ -0,0 +1,49 @@
+"""
+Gemini の使用量の記録と集計（usage.py）の確認。
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.gemini import usage
+from src.common.gemini.usage import (
+    get_usage_records,
+    load_usage_records,
+    record_usage,
+    rollup_usage,
+    format_usage_rollup,
+)
+
+
+def test_rollup_by_channel_and_step(tmp_path, monkeypatch):
+    monkeypatch.setattr(usage, "_records", usage.deque(maxlen=100))
+    baseball = {"CHANNEL_NAME": "baseball", "GEMINI_USAGE_DIR": tmp_path}
+    soccer = {"CHANNEL_NAME": "soccer", "GEMINI_USAGE_DIR": tmp_path}
+    meta = {"promptTokenCount": 100, "candidatesTokenCount": 20, "totalTokenCount": 120}
+
+    record_usage(baseball, "judge", "ok", 1.5, usage=meta)
+    record_usage(baseball, "judge", "ok", 0.0, cached=True)
+    record_usage(baseball, "enrich", "deadline", 30.0, retries=3)
+    first = get_usage_records()[0]["at"]
+    record_usage(soccer, "judge", "ok", 2.0, retries=1, usage=meta)
+
+    (day_file,) = tmp_path.glob("*.jsonl")
+    records = load_usage_records(tmp_path, day_file.stem)
+    rollup = rollup_usage(records)
+
+    assert rollup[("baseball", "judge")]["calls"] == 2
+    assert rollup[("baseball", "judge")]["cache_hits"] == 1
+    assert rollup[("baseball", "judge")]["prompt_tokens"] == 100
+    assert rollup[("baseball", "enrich")]["errors"] == 1
+    assert rollup[("soccer", "judge")]["retries"] == 1
+
+    # 実行ごとの集計はプロセス内の記録から、チャンネルで絞る
+    run = rollup_usage(get_usage_records(first, "baseball"), keys=("step",))
+    assert set(run) == {("judge",), ("enrich",)}
+
+    # 合計時間の長いステップが先頭に来る
+    assert format_usage_rollup(rollup).splitlines()[0].startswith("baseball/enrich")
@@ -0,0 +1,89 @@
+"""
+ディスク上の HTML キャッシュ（html_cache.py）の有効期限と LRU 削除の確認。
+時刻は html_cache.time を差し替えた時計で進める。
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.scraping import html_cache
+from src.common.scraping.html_cache import get_cached_html, put_cached_html
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock(0.0)
+    monkeypatch.setattr(html_cache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def settings(tmp_path):
+    return {"HTTP_CACHE_DIR": tmp_path / "http_cache", "HTTP_CACHE_MAX_BYTES": 10**9}
+
+
+def cache_path(url: str, settings: dict) -> Path:
+    return html_cache._cache_path(url, settings["HTTP_CACHE_DIR"])
+
+
+def set_access_time(url: str, settings: dict, atime: float) -> None:
+    path = cache_path(url, settings)
+    os.utime(path, (atime, path.stat().st_mtime))
+
+
+def test_entry_expires_after_ttl(settings, clock):
+    url = "https://example.com/archives/1.html"
+    put_cached_html(url, "<html>1</html>", settings)
+    saved_at = cache_path(url, settings).stat().st_mtime
+
+    clock.now = saved_at + 60
+    assert get_cached_html(url, 60, settings) == "<html>1</html>"
+
+    clock.now = saved_at + 61
+    assert get_cached_html(url, 60, settings) is None
+
+
+def test_normalized_urls_share_an_entry(settings, clock):
+    put_cached_html("https://Example.com:443/a?b=2&a=1#top", "<html>a</html>", settings)
+    clock.now = cache_path("https://example.com/a?a=1&b=2", settings).stat().st_mtime
+
+    assert get_cached_html("https://example.com/a?a=1&b=2", 60, settings) == (
+        "<html>a</html>"
+    )
+
+
+def test_least_recently_used_entries_are_evicted(settings, clock):
+    urls = [f"https://example.com/archives/{i}.html" for i in range(4)]
+    body = "<html>" + "本文" * 500 + "</html>"
+    for url in urls[:3]:
+        put_cached_html(url, body, settings)
+    for atime, url in zip((1000, 2000, 3000), urls[:3]):
+        set_access_time(url, settings, atime)
+
+    # 0 番を読むと最終アクセスが一番新しくなる
+    clock.now = cache_path(urls[0], settings).stat().st_mtime
+    assert get_cached_html(urls[0], 60, settings) == body
+    assert cache_path(urls[0], settings).stat().st_atime == clock.now
+
+    # 4件目で上限（約2.5件分）を超え、上限の8割（2件分）まで古い順に消える
+    size = cache_path(urls[0], settings).stat().st_size
+    settings["HTTP_CACHE_MAX_BYTES"] = int(size * 2.5)
+    put_cached_html(urls[3], body, settings)
+
+    remaining = [url for url in urls if cache_path(url, settings).exists()]
+    assert remaining == [urls[0], urls[3]]
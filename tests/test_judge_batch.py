@@ -0,0 +1,143 @@
+"""
+まとめてのジャンル判定（judge.py）の確認。call_gemini は差し替える。
+"""
+
+import sys
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.pipeline import article_index, judge
+from src.common.pipeline.article_index import get_verdict, register_channel
+from src.common.pipeline.judge import judge_target_batch, plan_judge_batches
+
+
+class NullLogger:
+    def info(self, *args, **kwargs):
+        pass
+
+    warning = info
+
+
+SETTINGS = {
+    "CHANNEL_NAME": "baseball",
+    "GENRE": "野球",
+    "JUDGE_BATCH_TOKEN_BUDGET": 1000,
+    "JUDGE_BATCH_MAX_ARTICLES": 30,
+    "JUDGE_BATCH_COMMENT_CHARS": 100,
+    "ARTICLE_INDEX_VERDICT_TTL": 3600,
+    "ARTICLE_INDEX_MAX_ENTRIES": 100,
+}
+
+
+def make_article(i: int, comment_len: int = 50) -> tuple[str, dict]:
+    return (
+        f"https://example.com/{i}",
+        {
+            "title": f"記事{i}",
+            "genre": "スポーツ",
+            "comments": ["あ" * comment_len],
+            "num_comments": 10,
+        },
+    )
+
+
+def submit_with(fake_call_gemini):
+    """submit_gemini の代わりに、その場で fake_call_gemini を実行した Future を返す。"""
+
+    def fake_submit_gemini(prompt, settings, logger, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fake_call_gemini(prompt, settings, logger, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    return fake_submit_gemini
+
+
+@pytest.fixture(autouse=True)
+def prefilter_dir(tmp_path, monkeypatch):
+    # 判定は前段分類器の教師データとして書き出されるので、一時ディレクトリに向ける
+    monkeypatch.setitem(SETTINGS, "PREFILTER_DIR", tmp_path)
+    monkeypatch.setitem(SETTINGS, "PREFILTER_COMMENT_CHARS", 200)
+
+
+@pytest.fixture(autouse=True)
+def empty_index():
+    article_index._entries.clear()
+    article_index._channels.clear()
+    yield
+    article_index._entries.clear()
+    article_index._channels.clear()
+
+
+def test_batches_respect_token_budget_and_comment_cap():
+    articles = [make_article(i, comment_len=500) for i in range(20)]
+
+    batches = plan_judge_batches(articles, SETTINGS, num_channels=1)
+
+    # コメントは100文字で切られるので1件あたり約130トークン → 1000 に7件
+    assert [len(b) for b in batches] == [7, 7, 6]
+    assert [a for b in batches for a in b] == articles
+
+
+def test_batches_shrink_with_channel_count():
+    articles = [make_article(i, comment_len=1) for i in range(30)]
+
+    batches = plan_judge_batches(articles, SETTINGS, num_channels=8)
+
+    assert max(len(b) for b in batches) == judge.MAX_BATCH_OUTPUT_TOKENS // (
+        judge.OUTPUT_TOKENS_PER_VERDICT * 8
+    )
+
+
+def test_judge_target_batch_stores_verdicts_for_every_channel(monkeypatch):
+    register_channel({"CHANNEL_NAME": "soccer", "GENRE": "サッカー"})
+    articles = [make_article(i) for i in range(3)]
+    calls = []
+
+    def fake_call_gemini(prompt, settings, logger, schema=None, **kwargs):
+        calls.append(schema)
+        return {
+            "verdicts": [
+                {
+                    "url": url,
+                    "channel": channel,
+                    "is_target": channel == "baseball",
+                    "reason": "r",
+                }
+                for url, _ in articles[:2]
+                for channel in ("baseball", "soccer")
+            ]
+        }
+
+    monkeypatch.setattr(judge, "submit_gemini", submit_with(fake_call_gemini))
+    judge_target_batch(articles, SETTINGS, NullLogger())
+
+    assert len(calls) == 1
+    assert get_verdict(articles[0][0], "baseball", SETTINGS)["is_target"] is True
+    assert get_verdict(articles[1][0], "soccer", SETTINGS)["is_target"] is False
+    # 応答に含まれなかった記事は未判定のまま（呼び出し側で1件ずつ判定する）
+    assert get_verdict(articles[2][0], "baseball", SETTINGS) is None
+    # 判定はチャンネルごとの教師データにもなる
+    soccer_examples = (SETTINGS["PREFILTER_DIR"] / "soccer.examples.jsonl").read_text(
+        encoding="utf-8"
+    )
+    assert len(soccer_examples.splitlines()) == 2
+
+
+def test_failed_batch_leaves_articles_unjudged(monkeypatch):
+    def failing_call_gemini(*args, **kwargs):
+        raise RuntimeError("503")
+
+    monkeypatch.setattr(judge, "submit_gemini", submit_with(failing_call_gemini))
+    articles = [make_article(i) for i in range(2)]
+    judge_target_batch(articles, SETTINGS, NullLogger())
+
+    assert get_verdict(articles[0][0], "baseball", SETTINGS) is None
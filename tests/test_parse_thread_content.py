@@ -0,0 +1,80 @@
+"""
+まとめサイト系パーサーの parse_thread_content（lxml 1パス版）・
+extract_simple_info_from_html（lxml 版）が、従来の BeautifulSoup 版と同じ結果を返すかの確認。
+
+期待値 tests/fixtures/html/<parser_name>/thread_content.json・simple_info.json は
+BeautifulSoup 版で detail.html を処理した結果を保存したもの。
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.scraping.document import HtmlDocument
+from src.common.scraping.parsers.registry import get_parser
+
+FIXTURE_DIR = ROOT / "tests" / "fixtures" / "html"
+THREAD_PARSER_NAMES = ["5ch", "nanjmatome", "smasoku", "basketballbbs"]
+BASE_URL = "https://example.com/archives/1.html"
+
+
+def load_fixture(parser_name: str):
+    html = (FIXTURE_DIR / parser_name / "detail.html").read_text(encoding="utf-8")
+    expected = json.loads(
+        (FIXTURE_DIR / parser_name / "thread_content.json").read_text(encoding="utf-8")
+    )
+    return html, expected
+
+
+def load_simple_info(parser_name: str) -> dict:
+    return json.loads(
+        (FIXTURE_DIR / parser_name / "simple_info.json").read_text(encoding="utf-8")
+    )
+
+
+@pytest.mark.parametrize("parser_name", THREAD_PARSER_NAMES)
+def test_parse_thread_content_matches_bs4_output(parser_name):
+    html, expected = load_fixture(parser_name)
+    parser = get_parser(parser_name)
+
+    assert parser.parse_thread_content(BASE_URL, html) == expected
+
+
+@pytest.mark.parametrize("parser_name", THREAD_PARSER_NAMES)
+def test_parse_thread_content_accepts_document(parser_name):
+    html, expected = load_fixture(parser_name)
+    parser = get_parser(parser_name)
+
+    doc = HtmlDocument(html)
+    parser.extract_simple_info_from_html(doc, logger=None)
+    assert parser.parse_thread_content(BASE_URL, doc) == expected
+
+
+@pytest.mark.parametrize("parser_name", THREAD_PARSER_NAMES)
+def test_extract_simple_info_matches_bs4_output(parser_name):
+    html, _ = load_fixture(parser_name)
+    parser = get_parser(parser_name)
+
+    assert parser.extract_simple_info_from_html(html, logger=None) == (
+        load_simple_info(parser_name)
+    )
+
+
+@pytest.mark.parametrize("parser_name", THREAD_PARSER_NAMES)
+def test_document_is_parsed_once(parser_name):
+    html, expected = load_fixture(parser_name)
+    parser = get_parser(parser_name)
+
+    doc = HtmlDocument(html)
+    simple_info = parser.extract_simple_info_from_html(doc, logger=None)
+    threads = parser.parse_thread_content(BASE_URL, doc)
+
+    assert (simple_info, threads) == (load_simple_info(parser_name), expected)
+    # シンプル情報・スレッド本文とも lxml のツリーだけで済み、BeautifulSoup は作らない
+    assert doc._soup is None
@@ -0,0 +1,179 @@
+"""
+ジャンル判定の前段分類器（classifier/prefilter.py）の確認。
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.classifier.prefilter import (
+    build_text,
+    build_title_text,
+    evaluate,
+    load_examples,
+    predict_proba,
+    prefilter_verdict,
+    record_examples,
+    save_model,
+    split_examples,
+    train_model,
+)
+
+BASEBALL_WORDS = ["投手", "本塁打", "打率", "監督", "先発", "ドラフト", "甲子園"]
+OTHER_WORDS = ["首相", "株価", "新作映画", "ドラマ", "選挙", "円安", "新型スマホ"]
+
+
+def make_examples(n: int) -> list[dict]:
+    examples = []
+    for i in range(n):
+        is_target = i % 2 == 0
+        words = BASEBALL_WORDS if is_target else OTHER_WORDS
+        title = f"{words[i % len(words)]}の話題 {words[(i + 3) % len(words)]}も"
+        examples.append(
+            {
+                "url": f"https://example.com/{i}",
+                "title": title,
+                "text": build_text({"title": title, "genre": "ニュース"}, 200),
+                "is_target": is_target,
+            }
+        )
+    return examples
+
+
+@pytest.fixture
+def settings(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    return {
+        "CHANNEL_NAME": "baseball",
+        "LOG_DIR": log_dir,
+        "PREFILTER_ENABLED": True,
+        "PREFILTER_DIR": tmp_path / "prefilter",
+        "PREFILTER_REJECT_THRESHOLD": 0.05,
+        "PREFILTER_ACCEPT_THRESHOLD": 0.95,
+        "PREFILTER_MIN_SAMPLES": 50,
+        "PREFILTER_COMMENT_CHARS": 200,
+    }
+
+
+def test_separates_obvious_articles():
+    model = train_model(make_examples(200), comment_chars=200)
+
+    baseball = build_text({"title": "先発投手が本塁打を浴びる", "genre": "ニュース"}, 200)
+    other = build_text({"title": "首相が円安について会見", "genre": "ニュース"}, 200)
+
+    assert predict_proba(model, baseball) > 0.95
+    assert predict_proba(model, other) < 0.05
+
+
+def test_verdict_only_when_confident(settings):
+    save_model(train_model(make_examples(200), 200), settings)
+
+    rejected = prefilter_verdict({"title": "首相が円安について会見"}, settings)
+    unsure = prefilter_verdict({"title": "週末の天気"}, settings)
+
+    assert rejected["is_target"] is False
+    assert rejected["reason"].startswith("ローカル判定")
+    assert unsure is None
+
+
+def test_no_verdict_with_too_few_samples(settings):
+    save_model(train_model(make_examples(20), 200), settings)
+
+    assert prefilter_verdict({"title": "首相が円安について会見"}, settings) is None
+
+
+def test_evaluate_on_holdout(settings):
+    train, holdout = split_examples(make_examples(200))
+    report = evaluate(train, holdout, settings)
+
+    assert report["holdout"] == 40
+    assert report["reject_precision"] == 1.0
+    assert report["accept_precision"] == 1.0
+
+
+def test_load_examples_from_log_and_records(settings):
+    (settings["LOG_DIR"] / "app.log").write_text(
+        "2025-01-01 | INFO | baseball | channel=baseball | step=pipeline  | "
+        "ターゲットジャンル外の記事のためスキップします。タイトル:株価が急落,URL:https://a/1 理由:経済の記事\n"
+        "2025-01-01 | INFO | baseball | channel=baseball | step=pipeline  | "
+        "=== ターゲットジャンルのため詳しい記事内容を取得  大谷が本塁打... URL:https://a/2 ,理由:野球の記事 \n"
+        "2025-01-01 | INFO | baseball | channel=baseball | step=pipeline  | "
+        "ターゲットジャンル外の記事のためスキップします。タイトル:円安,URL:https://a/3 理由:ローカル判定で対象外 (p=0.010)\n",
+        encoding="utf-8",
+    )
+    record_examples(
+        "https://a/1",
+        {"title": "株価が急落", "genre": "経済", "comments": ["野球じゃない"]},
+        {"baseball": {"is_target": True, "reason": "再判定"}},
+        settings,
+    )
+
+    examples, title_only = load_examples(settings)
+
+    # 分類器自身の判定は教師データにしない / 同じ URL は記録した判定を使う
+    assert [(e["url"], e["is_target"]) for e in examples] == [
+        ("https://a/2", True),
+        ("https://a/1", True),
+    ]
+    # 記録が少ないうちはログと同じくタイトルのみにそろえる
+    assert title_only is True
+    assert examples[1]["text"] == build_title_text("株価が急落")
+
+
+def test_enough_records_train_without_the_log(settings):
+    (settings["LOG_DIR"] / "app.log").write_text(
+        "2025-01-01 | INFO | baseball | channel=baseball | step=pipeline  | "
+        "ターゲットジャンル外の記事のためスキップします。タイトル:株価が急落,URL:https://a/log 理由:経済の記事\n",
+        encoding="utf-8",
+    )
+    for i in range(settings["PREFILTER_MIN_SAMPLES"]):
+        record_examples(
+            f"https://a/{i}",
+            {"title": f"投手{i}", "genre": "野球", "comments": ["本塁打"]},
+            {"baseball": {"is_target": True, "reason": "野球"}},
+            settings,
+        )
+
+    examples, title_only = load_examples(settings)
+
+    assert title_only is False
+    assert len(examples) == settings["PREFILTER_MIN_SAMPLES"]
+    assert "https://a/log" not in {e["url"] for e in examples}
+    assert examples[0]["text"] == build_text(
+        {"title": "投手0", "genre": "野球", "comments": ["本塁打"]}, 200
+    )
+
+
+def test_title_only_model_scores_titles_only(settings):
+    examples = [{**e, "text": build_title_text(e["title"])} for e in make_examples(200)]
+    save_model(train_model(examples, 200, title_only=True), settings)
+
+    # コメントやジャンルが付いていても、タイトルだけで判定する
+    verdict = prefilter_verdict(
+        {"title": "首相が円安について会見", "genre": "野球", "comments": ["投手"] * 50},
+        settings,
+    )
+    assert verdict["is_target"] is False
+
+
+def test_log_titles_are_cut_to_the_same_length(settings):
+    long_title = "首相が円安と物価高への対策について記者会見で説明した"
+    (settings["LOG_DIR"] / "app.log").write_text(
+        "2025-01-01 | INFO | baseball | channel=baseball | step=pipeline  | "
+        f"ターゲットジャンル外の記事のためスキップします。タイトル:{long_title},URL:https://a/1 理由:政治の記事\n"
+        "2025-01-01 | INFO | baseball | channel=baseball | step=pipeline  | "
+        f"=== ターゲットジャンルのため詳しい記事内容を取得  {long_title[:20]}... URL:https://a/2 ,理由:野球の記事 \n",
+        encoding="utf-8",
+    )
+
+    examples, _ = load_examples(settings)
+
+    # 対象外の記事のタイトルも、対象記事のログと同じ20文字に揃える
+    assert [e["title"] for e in examples] == [long_title[:20], long_title[:20]]
+    assert examples[0]["text"] == examples[1]["text"]
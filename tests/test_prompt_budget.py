@@ -0,0 +1,71 @@
+"""
+プロンプトに入れるコメントの選び方（prompt_budget.py）の確認。
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.gemini.prompt_budget import count_replies, select_comments
+
+
+def make_thread(n: int) -> list[str]:
+    return [f"{i + 1}: レス{i + 1}です" for i in range(n)]
+
+
+def test_fits_unchanged():
+    comments = make_thread(5)
+
+    assert select_comments(comments, 1000) == comments
+
+
+def test_count_replies():
+    comments = ["スレ立て", ">>1 乙", "＞＞1 わかる", ">>2 >>2 それな"]
+
+    assert count_replies(comments) == [2, 1, 0, 0]
+
+
+def test_selection_stays_within_budget_and_order():
+    comments = make_thread(500)
+
+    selected = select_comments(comments, 300)
+
+    assert sum(len(c) + 1 for c in selected) <= 300
+    assert selected[0] == comments[0]
+    positions = [comments.index(c) for c in selected]
+    assert positions == sorted(positions)
+    # 先頭だけでなくスレッド全体から選ばれる
+    assert positions[-1] > 400
+
+
+def test_prefers_replied_and_long_comments():
+    comments = make_thread(200)
+    comments[120] = "121: これが本題の長いレスです。" * 3
+    comments[150] = "151: 話題のレス"
+    for i in range(160, 170):
+        comments[i] = f"{i + 1}: >>151 それな"
+
+    selected = select_comments(comments, 200)
+
+    assert comments[150] in selected
+    assert any(c.startswith("121:") for c in selected)
+
+
+def test_long_comments_are_clipped():
+    comments = ["あ" * 1000 for _ in range(10)]
+
+    selected = select_comments(comments, 500)
+
+    assert len(selected) >= 4
+    assert all(len(c) <= 100 for c in selected)
+
+
+def test_single_comment_uses_whole_budget():
+    assert select_comments(["あ" * 1000], 300) == ["あ" * 299]
+
+
+def test_string_input():
+    assert select_comments("本文" * 100, 10) == ["本文" * 5]
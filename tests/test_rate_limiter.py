@@ -0,0 +1,129 @@
+"""
+ホスト単位のレート制限（rate_limiter.py）と Retry-After の扱いの確認。
+時刻は rate_limiter.monotonic / sleep を差し替えた時計で進める。
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.scraping import rate_limiter
+from src.common.scraping.fetcher import throttle_host
+from src.common.scraping.rate_limiter import (
+    DEFAULT_BURST,
+    DEFAULT_RATE,
+    TokenBucket,
+    acquire,
+    configure_host_rate,
+)
+from src.common.utils.retry import parse_retry_after
+
+URL = "https://example.com/archives/1.html"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, headers: dict):
+        self.headers = headers
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limiter, "sleep", clock.sleep)
+    monkeypatch.setattr(rate_limiter, "_buckets", {})
+    return clock
+
+
+def test_bucket_allows_burst_then_refills_at_rate(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.try_acquire() == 0.0
+    # 長く空いても burst までしか貯まらない
+    clock.now += 60
+    assert [bucket.try_acquire() for _ in range(4)][-1] == pytest.approx(0.5)
+
+
+def test_acquire_waits_for_the_next_token(clock):
+    configure_host_rate(URL, rate=4.0, burst=1)
+
+    acquire(URL)
+    acquire(URL)
+
+    assert sum(clock.sleeps) == pytest.approx(0.25)
+
+
+def test_stricter_setting_wins_for_a_shared_host(clock):
+    configure_host_rate(URL, rate=1.0, burst=2)
+    configure_host_rate("https://EXAMPLE.com/other", rate=5.0, burst=1)
+
+    bucket = rate_limiter._get_bucket(URL)
+    assert (bucket.rate, bucket.burst) == (1.0, 1)
+    assert bucket.tokens <= 1
+
+    configure_host_rate(URL, rate=3.0, burst=4)
+    assert (bucket.rate, bucket.burst) == (1.0, 1)
+
+
+def test_unconfigured_host_uses_defaults(clock):
+    bucket = rate_limiter._get_bucket(URL)
+    assert (bucket.rate, bucket.burst) == (DEFAULT_RATE, DEFAULT_BURST)
+
+
+@pytest.mark.parametrize("rate, burst", [(0, 1), (-1.0, 1), (1.0, 0)])
+def test_invalid_rate_is_rejected(clock, rate, burst):
+    with pytest.raises(ValueError):
+        configure_host_rate(URL, rate=rate, burst=burst)
+    with pytest.raises(ValueError):
+        TokenBucket(rate, burst)
+    # 不正な値で既存のバケットは変わらない
+    bucket = rate_limiter._get_bucket(URL)
+    assert (bucket.rate, bucket.burst) == (DEFAULT_RATE, DEFAULT_BURST)
+
+
+def test_retry_after_blocks_the_host(clock):
+    configure_host_rate(URL, rate=10.0, burst=5)
+
+    assert throttle_host(FakeResponse({"Retry-After": "7"}), URL, attempt=1) == 7.0
+
+    bucket = rate_limiter._get_bucket(URL)
+    assert bucket.try_acquire() == pytest.approx(7.0)
+    acquire(URL)
+    assert sum(clock.sleeps) == pytest.approx(7.0)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert parse_retry_after(format_datetime(retry_at, usegmt=True)) == pytest.approx(
+        30, abs=2
+    )
+    past = datetime.now(timezone.utc) - timedelta(seconds=30)
+    assert parse_retry_after(format_datetime(past, usegmt=True)) == 0.0
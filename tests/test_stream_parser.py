@@ -0,0 +1,97 @@
+"""
+stream_parser（受信しながらのパースと不要部分の破棄）の確認。
+
+STREAM_KEEP 以外を捨てたツリーでも、シンプル情報・スレッド本文の抽出結果が
+元の HTML 全体から抽出したものと同じになることを見る。
+"""
+
+import logging
+import sys
+from pathlib import Path
+
+import lxml.html
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.scraping.document import HtmlDocument
+from src.common.scraping.parsers.registry import get_parser
+from src.common.scraping.stream_parser import parse_html_stream, sniff_encoding
+from tests.test_parse_thread_content import BASE_URL, THREAD_PARSER_NAMES
+
+FIXTURE_DIR = ROOT / "tests" / "fixtures" / "html"
+CHUNK_SIZE = 4096
+
+logger = logging.getLogger("NewsPipe.test")
+logger.addHandler(logging.NullHandler())
+
+
+def to_chunks(data: bytes, size: int = CHUNK_SIZE) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def with_sidebar(html: str) -> str:
+    """記事と関係のない大きな部分木を足す。"""
+    sidebar = (
+        '<div class="sidebar"><ul>'
+        + '<li><a href="/archives/0.html">関連記事</a></li>' * 2000
+        + "</ul></div><!-- sidebar -->"
+    )
+    return html.replace("</body>", sidebar + "</body>")
+
+
+@pytest.mark.parametrize("parser_name", THREAD_PARSER_NAMES)
+def test_pruned_tree_gives_same_results(parser_name):
+    parser = get_parser(parser_name)
+    html = with_sidebar(
+        (FIXTURE_DIR / parser_name / "detail.html").read_text(encoding="utf-8")
+    )
+
+    tree, truncated = parse_html_stream(
+        to_chunks(html.encode("utf-8")), parser.STREAM_KEEP, max_bytes=10**8
+    )
+    doc = HtmlDocument.from_tree(tree)
+
+    assert not truncated
+    assert parser.extract_simple_info_from_html(
+        doc, logger
+    ) == parser.extract_simple_info_from_html(html, logger)
+    assert parser.parse_thread_content(BASE_URL, doc) == parser.parse_thread_content(
+        BASE_URL, html
+    )
+    # ツリーを文字列に戻して BeautifulSoup で読み直すことはしない
+    assert doc._html is None and doc._soup is None
+    assert 'class="sidebar"' not in doc.html
+
+
+def test_without_keep_nothing_is_discarded():
+    html = with_sidebar("<html><body><p>本文</p></body></html>").encode("utf-8")
+
+    tree, _ = parse_html_stream(to_chunks(html, 100), None, max_bytes=10**8)
+
+    assert len(tree.xpath("//li")) == 2000
+
+
+def test_stops_reading_at_max_bytes():
+    html = with_sidebar("<html><body><p>本文</p></body></html>").encode("utf-8")
+
+    tree, truncated = parse_html_stream(to_chunks(html), None, max_bytes=10_000)
+
+    assert truncated
+    assert tree.xpath("//p")[0].text == "本文"
+    assert len(lxml.html.tostring(tree)) < len(html)
+
+
+def test_empty_body_gives_empty_document():
+    tree, truncated = parse_html_stream([], [("div", "t_b")], max_bytes=100)
+
+    assert not truncated
+    assert tree.tag == "html"
+
+
+def test_sniff_encoding():
+    assert sniff_encoding("text/html; charset=EUC-JP", b"") == "EUC-JP"
+    assert sniff_encoding("text/html", b'<meta charset="shift_jis">') == "shift_jis"
+    assert sniff_encoding(None, b"<html>") == "utf-8"
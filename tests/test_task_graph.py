@@ -0,0 +1,120 @@
+"""
+記事ごとのタスクグラフ（task_graph.py）の確認。
+"""
+
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import sleep
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.pipeline.task_graph import TaskGraph, TaskError
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+
+def test_results_are_passed_by_dependency_name(executor):
+    graph = TaskGraph(executor)
+    graph.add("detail", lambda: ["本文"])
+    graph.add("comments", lambda: ["c1", "c2"])
+    graph.add(
+        "enrich",
+        lambda detail, comments: detail + comments,
+        deps=("detail", "comments"),
+    )
+
+    results = graph.run()
+
+    assert results["enrich"] == ["本文", "c1", "c2"]
+    assert set(graph.timings) == {"detail", "comments", "enrich"}
+
+
+def test_independent_tasks_run_concurrently(executor):
+    # 2つが同時に実行されていないと Barrier を抜けられない
+    barrier = threading.Barrier(2, timeout=5)
+    graph = TaskGraph(executor)
+    graph.add("detail", barrier.wait)
+    graph.add("comments", barrier.wait)
+    graph.add("enrich", lambda detail, comments: "ok", deps=("detail", "comments"))
+
+    assert graph.run()["enrich"] == "ok"
+
+
+def test_dependent_task_waits_for_its_dependencies(executor):
+    order = []
+    graph = TaskGraph(executor)
+    graph.add("detail", lambda: (sleep(0.05), order.append("detail")))
+    graph.add("enrich", lambda detail: order.append("enrich"), deps=("detail",))
+
+    graph.run()
+
+    assert order == ["detail", "enrich"]
+
+
+def test_tasks_sharing_a_resource_do_not_overlap(executor):
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def use_drive():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        sleep(0.05)
+        with lock:
+            active.pop()
+
+    graph = TaskGraph(executor)
+    for name in ("upload_media", "thumbnail", "main_images"):
+        graph.add(name, use_drive, resources=("drive",))
+    graph.run()
+
+    assert max(peak) == 1
+
+
+def test_failure_skips_dependents_and_waits_for_running_tasks(executor):
+    ran = []
+
+    def fail():
+        raise ValueError("broken html")
+
+    def slow():
+        sleep(0.1)
+        ran.append("comments")
+
+    graph = TaskGraph(executor)
+    graph.add("detail", fail)
+    graph.add("comments", slow)
+    graph.add(
+        "enrich",
+        lambda detail, comments: ran.append("enrich"),
+        deps=("detail", "comments"),
+    )
+
+    with pytest.raises(TaskError) as e:
+        graph.run()
+
+    assert e.value.task == "detail"
+    assert isinstance(e.value.error, ValueError)
+    assert e.value.__cause__ is e.value.error
+    assert ran == ["comments"]
+
+
+def test_dependencies_must_be_added_first(executor):
+    graph = TaskGraph(executor)
+    graph.add("detail", lambda: None)
+
+    with pytest.raises(ValueError):
+        graph.add("enrich", lambda comments: None, deps=("comments",))
+    with pytest.raises(ValueError):
+        graph.add("detail", lambda: None)
@@ -0,0 +1,52 @@
+"""
+parse_articles_from_top_page_fast（lxml 版）が
+従来の parse_articles_from_top_page（BeautifulSoup 版）と同じ結果を返すかの確認。
+
+tests/fixtures/html/<parser_name>/top_page.html を入力に使うのでネットワーク不要。
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.scraping.parsers.registry import get_parser
+
+FIXTURE_DIR = ROOT / "tests" / "fixtures" / "html"
+PARSER_NAMES = [
+    "yahoo_news",
+    "yahoo_news_with_query",
+    "5ch",
+    "nanjmatome",
+    "smasoku",
+    "basketballbbs",
+]
+
+
+def load_top_page(parser_name: str) -> str:
+    path = FIXTURE_DIR / parser_name / "top_page.html"
+    return path.read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("parser_name", PARSER_NAMES)
+def test_fast_top_page_parse_matches(parser_name):
+    html = load_top_page(parser_name)
+    parser = get_parser(parser_name)
+
+    expected = parser.parse_articles_from_top_page(html)
+    actual = parser.parse_articles_from_top_page_fast(html)
+
+    assert expected, "フィクスチャから記事URLが1件も取れていない"
+    assert actual == expected
+    assert all(type(url) is str for url in actual)
+
+
+@pytest.mark.parametrize("parser_name", ["yahoo_news", "5ch", "nanjmatome"])
+def test_fast_top_page_parse_empty_html(parser_name):
+    parser = get_parser(parser_name)
+    assert parser.parse_articles_from_top_page_fast("") == []
+    assert parser.parse_articles_from_top_page("") == []
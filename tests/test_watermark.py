@@ -0,0 +1,70 @@
+"""
+一覧ページのウォーターマーク（watermark.py）の確認。
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.pipeline.watermark import (
+    load_watermark,
+    save_watermark,
+    select_new_articles,
+)
+
+SOURCE_URL = "https://example.com/"
+
+
+def make_settings(tmp_path) -> dict:
+    return {
+        "CHANNEL_NAME": "test",
+        "WATERMARK_DIR": tmp_path,
+        "WATERMARK_SIZE": 5,
+    }
+
+
+def test_select_stops_after_consecutive_known_urls():
+    watermark = {"seen": ["c", "d", "e", "f"], "pending": []}
+    page = ["a", "b", "c", "d", "e", "x", "f"]
+
+    assert select_new_articles(page, watermark, stop_after_known=3) == ["a", "b"]
+
+
+def test_single_known_url_does_not_stop_the_scan():
+    watermark = {"seen": ["b", "d", "e", "f"], "pending": []}
+    page = ["a", "b", "c", "d", "e", "f"]
+
+    assert select_new_articles(page, watermark, stop_after_known=3) == ["a", "c"]
+
+
+def test_pending_urls_are_rechecked_below_the_cut():
+    watermark = {"seen": ["b", "c", "d"], "pending": ["z"]}
+    page = ["a", "b", "c", "d", "z"]
+
+    assert select_new_articles(page, watermark, stop_after_known=3) == ["a", "z"]
+
+
+def test_empty_watermark_selects_everything(tmp_path):
+    watermark = load_watermark(SOURCE_URL, make_settings(tmp_path))
+
+    assert select_new_articles(["a", "b"], watermark, stop_after_known=3) == [
+        "a",
+        "b",
+    ]
+
+
+def test_save_prepends_seen_and_replaces_pending(tmp_path):
+    settings = make_settings(tmp_path)
+    save_watermark(SOURCE_URL, ["c", "d"], ["p1"], settings)
+    save_watermark(SOURCE_URL, ["a", "b", "p1"], ["p2"], settings)
+
+    watermark = load_watermark(SOURCE_URL, settings)
+    assert watermark["seen"] == ["a", "b", "p1", "c", "d"]
+    assert watermark["pending"] == ["p2"]
+
+    # WATERMARK_SIZE を超えた古いものは捨てる
+    save_watermark(SOURCE_URL, ["new"], [], settings)
+    assert load_watermark(SOURCE_URL, settings)["seen"] == ["new", "a", "b", "p1", "c"]
@@ -0,0 +1,100 @@
+"""
+yahoo_news.extract_comments のページ並列取得と打ち切り上限の確認。
+
+fetch_html_async を差し替え、tests/fixtures/html/yahoo_news/comments_page*.html を返す。
+3ページ目はコメントが0件（最終ページを越えた状態）。
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.common.scraping.parsers.registry import get_parser
+
+FIXTURE_DIR = ROOT / "tests" / "fixtures" / "html" / "yahoo_news"
+ARTICLE_URL = "https://news.yahoo.co.jp/articles/abc"
+SETTINGS = {"HTTP_CACHE_TTL": 0, "PREFETCH_PER_HOST": 4}
+
+
+def load_comment_page(page: int) -> str:
+    path = FIXTURE_DIR / f"comments_page{page}.html"
+    return path.read_text(encoding="utf-8") if path.exists() else ""
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    module = get_parser("yahoo_news")
+    requested = []
+
+    async def fake_fetch_html_async(url, settings, cache_ttl=0):
+        requested.append(url)
+        page = int(url.split("?page=")[1]) if "?page=" in url else 1
+        return load_comment_page(page)
+
+    monkeypatch.setattr(module, "fetch_html_async", fake_fetch_html_async)
+    return module, requested
+
+
+def test_comment_page_text_matches_bs4():
+    from bs4 import BeautifulSoup
+
+    html = load_comment_page(1)
+    soup = BeautifulSoup(html, "lxml")
+    expected = [
+        tag.get_text(strip=True)
+        for tag in soup.find_all("p", class_="sc-169yn8p-10 hYFULX")
+    ]
+
+    assert get_parser("yahoo_news").parse_comment_page(html) == expected
+
+
+def test_extract_comments_reads_pages_in_order_until_empty(yahoo):
+    module, requested = yahoo
+    source = {"comment_add_url_word": "comments", "comment_max_pages": 5}
+    comments = module.extract_comments(ARTICLE_URL, source, SETTINGS)
+
+    assert len(comments) == 20
+    assert comments[0].startswith("ページ1のコメント1")
+    assert comments[10].startswith("ページ2のコメント1")
+    assert requested[0] == f"{ARTICLE_URL}/comments"
+
+
+def test_extract_comments_stops_at_count_budget(yahoo):
+    source = {
+        "comment_add_url_word": "comments",
+        "comment_max_pages": 3,
+        "comment_max_count": 12,
+    }
+    module, _ = yahoo
+    comments = module.extract_comments(ARTICLE_URL, source, SETTINGS)
+
+    assert len(comments) == 12
+    assert comments[-1].startswith("ページ2のコメント2")
+
+
+def test_extract_comments_stops_at_char_budget(yahoo):
+    source = {
+        "comment_add_url_word": "comments",
+        "comment_max_pages": 3,
+        "comment_max_chars": 50,
+    }
+    module, _ = yahoo
+    comments = module.extract_comments(ARTICLE_URL, source, SETTINGS)
+
+    # 上限に達した時点で打ち切る（最後の1件ぶんだけ超えることがある）
+    assert sum(len(c) for c in comments[:-1]) < 50
+    assert sum(len(c) for c in comments) >= 50
+
+
+def test_extract_comments_does_not_fetch_far_past_the_last_page(yahoo):
+    module, requested = yahoo
+    source = {"comment_add_url_word": "comments", "comment_max_pages": 20}
+    module.extract_comments(ARTICLE_URL, source, SETTINGS)
+
+    # 3ページ目（空）まで読んだ時点で、先読みは PREFETCH_PER_HOST 枚の範囲に収まる
+    assert len(requested) <= 3 + SETTINGS["PREFETCH_PER_HOST"] - 1